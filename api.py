@@ -1,13 +1,35 @@
 # api.py (v4.2.0 - AI FIX + DETAYLI SKORLAR)
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
 from pydantic import BaseModel
+from typing import Optional
 import uvicorn
 import time
+import asyncio
+import codecs
+import json
 import requests
+import httpx
 import os
-from scorer import QualityScorer
+from scorer import QualityScorer, is_partial, is_storable, score_snapshot
+from response_builder import build_score_response, sorted_places
 import config as cfg
+import local_extract
+import osm_fetcher
+import result_cache
+import snapshot
+import commentary
+import heatmap
+import metrics
+import prewarm
+import process_pool
+import response_encoding
+import upstream
+from singleflight import SingleFlight
+from batch_scorer import BatchRun, PointParser
+from response_encoding import CompressionMiddleware, FastJSONResponse
 
 # --- GÜVENLİK ---
 if not cfg.CLIENT_ID: cfg.CLIENT_ID = os.environ.get("SH_CLIENT_ID")
@@ -15,7 +37,25 @@ if not cfg.CLIENT_SECRET: cfg.CLIENT_SECRET = os.environ.get("SH_CLIENT_SECRET")
 
 GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY")
 
-app = FastAPI(title="Yaşam Kalitesi Skoru API", version="4.2.0")
+# Aynı hücre + ayar için eşzamanlı istekler tek hesaplamayı paylaşır
+_ucustaki = SingleFlight()
+
+@asynccontextmanager
+async def lifespan(app):
+    # Yerel veri kaynağı seçiliyse bölgesel özüt ilk istekte değil açılışta yüklenir
+    local_extract.get_store(cfg)
+    # Süreç havuzu işçileri açılışta başlar; ağır içe aktarmalar ilk isteğe kalmaz
+    await asyncio.to_thread(process_pool.warm, cfg)
+    commentary.start(fetch_ai_comment_async)
+    # Popüler hücreler TTL'leri dolmadan arka planda yeniden hesaplanır
+    prewarm.start(_isit)
+    yield
+    await prewarm.stop()
+    await commentary.stop()
+    process_pool.shutdown()
+    await upstream.close()
+
+app = FastAPI(title="Yaşam Kalitesi Skoru API", version="4.2.0", lifespan=lifespan, default_response_class=FastJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -24,19 +64,22 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Tek parça JSON yanıtlar Accept-Encoding'e göre brotli / gzip ile sıkıştırılır (akış yanıtları hariç)
+app.add_middleware(CompressionMiddleware, settings=cfg.YANIT_AYARLARI)
 
 class SkorIstegi(BaseModel):
     lat: float
     lon: float
+    butce_ms: Optional[int] = None  # Gecikme bütçesi; aşan aşamalar bayat / eksik döner
 
-def generate_ai_comment(skorlar, ozellikler, detaylar):
-    """AI yorumu üret - hata kontrolü ile"""
-    
-    # KEY KONTROLÜ
-    if not GEMINI_API_KEY or GEMINI_API_KEY == "None":
-        print("⚠️  GEMINI_API_KEY bulunamadı!")
-        return "🏠 Bu konum harika görünüyor! Detaylı analiz için skorları inceleyin."
-    
+class YenidenSkorIstegi(BaseModel):
+    ozet_id: Optional[str] = None
+    lat: Optional[float] = None
+    lon: Optional[float] = None
+    agirliklar: dict = {}
+
+def _ai_request(skorlar, ozellikler, detaylar):
+    """Gemini isteği için (url, payload) döndürür."""
     # Detaylardan bilgi çıkar
     yakin_mekanlar = []
     if 'sosyal' in detaylar and detaylar['sosyal']:
@@ -57,7 +100,7 @@ def generate_ai_comment(skorlar, ozellikler, detaylar):
     İki cümleyle, samimi ve ikna edici şekilde yaz. Türkçe.
     """
     
-    url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash:generateContent?key={GEMINI_API_KEY}"
+    url = f"{upstream.url('gemini')}?key={GEMINI_API_KEY}"
     
     payload = {
         "contents": [{
@@ -68,29 +111,73 @@ def generate_ai_comment(skorlar, ozellikler, detaylar):
             "maxOutputTokens": 150
         }
     }
+    return url, payload
+
+def _ai_parse(response):
+    """Başarılı yanıtta yorum metni, aksi halde None (yedek metni çağıran seçer)."""
+    if response.status_code == 200:
+        data = response.json()
+        yorum = data['candidates'][0]['content']['parts'][0]['text']
+        print("✅ AI yorumu alındı!")
+        return yorum.strip()
+    elif response.status_code == 400:
+        print(f"❌ AI Hatası: API Key geçersiz - {response.text}")
+    else:
+        print(f"⚠️  AI HTTP {response.status_code}: {response.text[:200]}")
+    return None
+
+def _ai_key_missing():
+    if not GEMINI_API_KEY or GEMINI_API_KEY == "None":
+        print("⚠️  GEMINI_API_KEY bulunamadı!")
+        return True
+    return False
+
+def fetch_ai_comment(skorlar, ozellikler, detaylar):
+    """Gemini yorumu ya da None - hata kontrolü ile"""
+    
+    # KEY KONTROLÜ
+    if _ai_key_missing(): return None
     
+    url, payload = _ai_request(skorlar, ozellikler, detaylar)
     try:
+        upstream.get_bucket("gemini").acquire()
         print("🤖 AI isteği gönderiliyor...")
-        response = requests.post(url, json=payload, timeout=10)
-        
-        if response.status_code == 200:
-            data = response.json()
-            yorum = data['candidates'][0]['content']['parts'][0]['text']
-            print("✅ AI yorumu alındı!")
-            return yorum.strip()
-        elif response.status_code == 400:
-            print(f"❌ AI Hatası: API Key geçersiz - {response.text}")
-            return "🏠 Güzel bir konum! Skorları inceleyerek daha fazla bilgi alabilirsiniz."
-        else:
-            print(f"⚠️  AI HTTP {response.status_code}: {response.text[:200]}")
-            return "🏠 Konumunuz analiz edildi! Detaylı skorları aşağıda görebilirsiniz."
-            
+        with metrics.upstream_timer("gemini"):
+            response = upstream.get_session().post(url, json=payload, timeout=10)
+        metrics.record_response("gemini", response)
+        return _ai_parse(response)
+    except upstream.UpstreamBusy:
+        print("⏳ AI kuyruğu dolu, şablon yorum kullanılıyor")
     except requests.Timeout:
         print("⏱️  AI timeout!")
-        return "🏠 Harika bir konum! Detaylı analize göz atın."
     except Exception as e:
         print(f"❌ AI Hatası: {e}")
-        return "🏠 Veriler başarıyla analiz edildi!"
+    return None
+
+async def fetch_ai_comment_async(skorlar, ozellikler, detaylar):
+    """fetch_ai_comment'in paylaşılan async istemciyi kullanan sürümü (arka plan yorum işçileri çağırır)"""
+    if _ai_key_missing(): return None
+    
+    url, payload = _ai_request(skorlar, ozellikler, detaylar)
+    try:
+        await upstream.get_bucket("gemini").acquire_async()
+        print("🤖 AI isteği gönderiliyor (async)...")
+        async with upstream.get_limit("gemini"):
+            with metrics.upstream_timer("gemini"):
+                response = await upstream.get_async_client().post(url, json=payload, timeout=10)
+        metrics.record_response("gemini", response)
+        return _ai_parse(response)
+    except upstream.UpstreamBusy:
+        print("⏳ AI kuyruğu dolu, şablon yorum kullanılıyor")
+    except httpx.TimeoutException:
+        print("⏱️  AI timeout!")
+    except Exception as e:
+        print(f"❌ AI Hatası: {e}")
+    return None
+
+def generate_ai_comment(skorlar, ozellikler, detaylar):
+    """Toplu mod: yorum önbelleği -> Gemini -> yerel şablon"""
+    return commentary.comment_sync(skorlar, ozellikler, detaylar, fetch_ai_comment)
 
 @app.get("/")
 def ana_sayfa():
@@ -102,66 +189,266 @@ def ana_sayfa():
         "ozellikler": ["Hızlı Analiz", "Detaylı Skorlar", "AI Yorumu"]
     }
 
-@app.post("/hesapla")
-def skor_hesapla(istek: SkorIstegi):
-    print(f"\n📍 İstek geldi: {istek.lat}, {istek.lon}")
+async def _skor_govdesi(lat, lon, deadline=None):
+    """Tek bir hücre için (yanıt gövdesi, tamlık bilgisi). Süre aşımlı / bayat veriyle doldurulmuş sonuç
+    önbelleğe yazılmaz. AI yorumu commentary.attach ile sonradan eklenir."""
+    motor = await asyncio.to_thread(QualityScorer, lat=lat, lon=lon, config=cfg)
+    ozet = await motor.extract_async(deadline, lambda: snapshot.latest(lat, lon, cfg))
+    sonuc = score_snapshot(ozet, cfg)
+    
+    govde = {**build_score_response(sonuc), "yakin_yerler": sorted_places(sonuc), "ozet_id": snapshot.put(ozet, cfg)}
+    tamlik = {"kismi": is_partial(ozet), "tamlik": ozet["tamlik"]}
+    if "bayat_yas_sn" in ozet: tamlik["bayat_yas_sn"] = ozet["bayat_yas_sn"]
+    tamlik["kesintili"] = not is_storable(ozet)
+    if not tamlik["kesintili"]: await asyncio.to_thread(result_cache.put, lat, lon, cfg, govde)
+    return govde, tamlik
+
+async def _isit(lat, lon):
+    """Önbellek ısıtıcısının hesabı; aynı hücre için gelen canlı istek bu hesaba bağlanır."""
+    await _ucustaki.do(result_cache.cache_key(lat, lon, cfg), lambda: _skor_govdesi(lat, lon))
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrikler():
+    """Prometheus metin formatında aşama / upstream / önbellek metrikleri."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+async def _hesapla(lat, lon, butce_ms=None, profil=False, onbellek=None):
+    """(yanıt, sonuç kaydının zamanı ya da None). onbellek: GET yolunda önceden yapılmış result_cache.lookup sonucu.
+    Kayıt zamanı yoksa (kesintili sonuç önbelleğe yazılmadı) yanıt tarayıcı / CDN'de tutulmamalı."""
+    print(f"\n📍 İstek geldi: {lat}, {lon}")
     baslangic = time.time()
+    asamalar = metrics.start_profile()
+    butce = cfg.SURE_BUTCESI_AYARLARI
+    if butce_ms is not None and butce_ms < butce["min_ms"]:
+        raise HTTPException(status_code=400, detail=f"butce_ms en az {butce['min_ms']} olmalı")
+    prewarm.record(lat, lon)
+    # Bütçe istek gelişinden sayılır (sonuç önbelleği bakışı dahil)
+    deadline = None if butce_ms is None else time.monotonic() + min(butce_ms, butce["max_ms"]) / 1000
     
     try:
-        motor = QualityScorer(lat=istek.lat, lon=istek.lon, config=cfg)
-        sonuc = motor.get_final_score()
-        
-        analiz_egim = sonuc['ekstra_analiz'].get('egim', {})
-        analiz_vibe = sonuc['ekstra_analiz'].get('vibe', {})
-        mekanlar = sorted(sonuc.get("mekanlar", []), key=lambda x: x["mesafe"])
-        detaylar = sonuc.get("detaylar", {})
-        
-        cevap_data = {
-            "ozellikler": {
-                "cografya": {
-                    "rakim": f"{analiz_egim.get('rakim', '0')}m",
-                    "yurunebilirlik": analiz_egim.get('durum', '-'),
-                    "egim_orani": f"%{analiz_egim.get('egim_yuzde', 0)}"
-                },
-                "mahalle_karakteri": {
-                    "etiket": analiz_vibe.get('etiket', '-'),
-                    "aciklama": analiz_vibe.get('aciklama', '-')
-                }
-            },
-            "skor_ozeti": {
-                "genel_skor": round(sonuc["genel_skor"], 1),
-                "detaylar": {
-                    "yesil_sosyal": round(sonuc["alt_skorlar"]["yesil_sosyal"], 1),
-                    "yerlesim": round(sonuc["alt_skorlar"]["yerlesim"], 1),
-                    "gurultu": round(sonuc["alt_skorlar"]["gurultu"], 1)
-                }
-            },
-            "detayli_analiz": detaylar  # YENI!
-        }
-        
-        # AI Yorumunu Al
-        cevap_data["ai_yorumu"] = generate_ai_comment(
-            cevap_data["skor_ozeti"], 
-            cevap_data["ozellikler"],
-            detaylar
-        )
+        if onbellek is None:
+            with metrics.stage_timer("sonuc_onbellegi"):
+                onbellek = await asyncio.to_thread(result_cache.lookup, lat, lon, cfg)
+        if onbellek is not None:
+            govde, kayit = onbellek
+            yas = time.time() - kayit
+            print(f"⚡ Önbellekten döndü ({int(yas)}s önce hesaplanmış)")
+            metrics.observe("istek_suresi_saniye", time.time() - baslangic, uc="/hesapla", onbellek="isabet")
+            meta = {
+                "islem_suresi": f"{round(time.time() - baslangic, 3)} saniye",
+                "koordinat": {"lat": lat, "lon": lon},
+                "onbellek": {"isabet": True, "yas_sn": int(yas)}
+            }
+            if profil: meta["profil_ms"] = asamalar
+            return {"durum": "basarili", "meta": meta, **(await commentary.attach(govde))}, kayit
+
+        if deadline is None:
+            anahtar = result_cache.cache_key(lat, lon, cfg)
+            (govde, tamlik), paylasildi = await _ucustaki.do(anahtar, lambda: _skor_govdesi(lat, lon))
+            if paylasildi: print("🔗 Aynı hücre için süren hesaplamaya bağlandı")
+        else:
+            # Bütçeli istek kendi süre sınırıyla hesaplar; sınırsız uçuştaki hesaba bağlanıp beklemez
+            govde, tamlik = await _skor_govdesi(lat, lon, deadline)
+            paylasildi = False
+        if govde["skor_ozeti"]["genel_skor"] is None:
+            if tamlik["tamlik"]["osm_veri"] == "hata":
+                raise HTTPException(status_code=502, detail="OSM verisi alınamadı ve bu konum için kayıtlı veri yok")
+            raise HTTPException(status_code=504, detail="Süre bütçesi içinde skor hesaplanamadı ve bu konum için kayıtlı veri yok")
+        if tamlik["kismi"]: print(f"⚠️  Kısmi sonuç: {tamlik['tamlik']}")
         
         sure = round(time.time() - baslangic, 2)
         print(f"✅ Tamamlandı ({sure}s)")
+        metrics.observe("istek_suresi_saniye", time.time() - baslangic, uc="/hesapla", onbellek="iskalama")
         
-        return {
-            "durum": "basarili",
-            "meta": {
-                "islem_suresi": f"{sure} saniye",
-                "koordinat": {"lat": istek.lat, "lon": istek.lon}
-            },
-            **cevap_data,
-            "yakin_yerler": mekanlar
+        meta = {
+            "islem_suresi": f"{sure} saniye",
+            "koordinat": {"lat": lat, "lon": lon},
+            "onbellek": {"isabet": False, "yas_sn": 0},
+            "paylasilan_hesap": paylasildi,
+            **tamlik
         }
+        if butce_ms is not None: meta["butce_ms"] = butce_ms
+        # Paylaşılan hesapta aşamalar ilk isteğin profiline yazılır, bu istekte boş kalır
+        if profil: meta["profil_ms"] = asamalar
+        durum = "kismi" if tamlik["kismi"] else "basarili"
+        yanit = {"durum": durum, "meta": meta, **(await commentary.attach(govde, ai=not tamlik["kesintili"]))}
+        kayit = None if tamlik["kesintili"] else await asyncio.to_thread(result_cache.lookup, lat, lon, cfg)
+        return yanit, (kayit[1] if kayit else None)
 
+    except HTTPException:
+        raise
+    except upstream.UpstreamBusy as e:
+        print(f"⏳ {e}")
+        raise HTTPException(status_code=429, detail=str(e), headers=upstream.retry_after_header(e))
     except Exception as e:
         print(f"❌ HATA: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def _etiket(lat, lon, kayit):
+    """ETag: mekansal hücre + skor ayarlarının parmak izi (result_cache anahtarı) + sonuç kaydının zamanı."""
+    return response_encoding.etag(result_cache.cache_key(lat, lon, cfg), kayit)
+
+def _onbellek_basliklari(etiket):
+    s = cfg.YANIT_AYARLARI
+    return {"ETag": etiket, "Vary": "Accept-Encoding",
+            "Cache-Control": f"public, max-age={s['onbellek_sn']}, stale-while-revalidate={s['bayat_sunum_sn']}"}
+
+@app.post("/hesapla")
+async def skor_hesapla(istek: SkorIstegi, profil: bool = False):
+    yanit, _ = await _hesapla(istek.lat, istek.lon, istek.butce_ms, profil)
+    return FastJSONResponse(yanit)
+
+@app.get("/hesapla")
+async def skor_getir(request: Request, lat: float, lon: float, butce_ms: Optional[int] = None, profil: bool = False):
+    """POST /hesapla'nın tarayıcı / CDN önbelleğine uygun hali. If-None-Match güncel ETag'i içeriyorsa
+    skor, yorum ve gövde üretilmeden 304 döner."""
+    baslangic = time.time()
+    onbellek = await asyncio.to_thread(result_cache.lookup, lat, lon, cfg)
+    if onbellek is not None:
+        etiket = _etiket(lat, lon, onbellek[1])
+        if response_encoding.etag_matches(request.headers.get("if-none-match"), etiket):
+            prewarm.record(lat, lon)
+            metrics.observe("istek_suresi_saniye", time.time() - baslangic, uc="/hesapla", onbellek="kosullu")
+            return Response(status_code=304, headers=_onbellek_basliklari(etiket))
+    yanit, kayit = await _hesapla(lat, lon, butce_ms, profil, onbellek)
+    if kayit is None: return FastJSONResponse(yanit, headers={"Cache-Control": "no-store"})
+    return FastJSONResponse(yanit, headers=_onbellek_basliklari(_etiket(lat, lon, kayit)))
+
+@app.post("/yeniden-skorla")
+async def yeniden_skorla(istek: YenidenSkorIstegi):
+    """Kayıtlı özeti (ozet_id ya da lat/lon hücresi) özel ağırlıklarla yeniden skorlar; veri çekilmez."""
+    if istek.ozet_id is None and (istek.lat is None or istek.lon is None):
+        raise HTTPException(status_code=400, detail="ozet_id ya da lat + lon gerekli")
+    try:
+        ayarlar = snapshot.with_weights(cfg, istek.agirliklar)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    ozet_id = istek.ozet_id or snapshot.snapshot_id(istek.lat, istek.lon, cfg)
+    ozet = await asyncio.to_thread(snapshot.get, ozet_id, cfg)
+    if ozet is None:
+        raise HTTPException(status_code=404, detail="Özet bulunamadı; önce /hesapla ile bu konumu hesaplayın")
+    
+    baslangic = time.perf_counter()
+    sonuc = score_snapshot(ozet, ayarlar)
+    sure_us = round((time.perf_counter() - baslangic) * 1e6, 1)
+    meta = {"ozet_id": ozet_id, "skorlama_suresi_us": sure_us,
+            "koordinat": {"lat": ozet["lat"], "lon": ozet["lon"]}, "agirliklar": ayarlar.FINAL_AGIRLIKLAR}
+    return FastJSONResponse({"durum": "basarili", "meta": meta, **build_score_response(sonuc), "yakin_yerler": sorted_places(sonuc)})
+
+@app.get("/yorum/{yorum_id}")
+async def yorum_durumu(yorum_id: str, bekle: float = 0):
+    """Arka plan AI yorumunun durumu; bekle > 0 ise hazır olana kadar (en fazla akis_bekleme_sn) bekler."""
+    durum = await commentary.status(yorum_id, min(bekle, cfg.AI_YORUM_AYARLARI["akis_bekleme_sn"]))
+    if durum is None: raise HTTPException(status_code=404, detail="Yorum bulunamadı")
+    return durum
+
+@app.get("/yorum/{yorum_id}/akis")
+async def yorum_akisi(yorum_id: str):
+    """Yorum hazır olunca tek bir SSE 'yorum' olayı gönderir."""
+    async def olaylar():
+        yield ": bekleniyor\n\n"
+        durum = await commentary.status(yorum_id, cfg.AI_YORUM_AYARLARI["akis_bekleme_sn"])
+        if durum is None: durum = {"yorum_id": yorum_id, "durum": "bulunamadi", "yorum": None, "kaynak": None}
+        yield f"event: yorum\ndata: {json.dumps(durum, ensure_ascii=False)}\n\n"
+    return StreamingResponse(olaylar(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+GIRDI_HATALARI = (ValueError, KeyError, IndexError, TypeError)
+
+class _TopluGirdi:
+    """İstek gövdesini parça parça okuyup noktaya çevirir (UTF-8 çok baytlı karakterler parça sınırında bölünebilir)."""
+    def __init__(self, request):
+        self.govde = request.stream().__aiter__()
+        self.cozucu = codecs.getincrementaldecoder("utf-8")()
+        self.ayristirici = PointParser()
+        self.bitti = False
+
+    async def oku(self):
+        """Sıradaki parçanın noktaları; gövde bitince kalanlar döner ve bitti True olur."""
+        try:
+            return self.ayristirici.feed(self.cozucu.decode(await self.govde.__anext__()))
+        except StopAsyncIteration:
+            self.bitti = True
+            return self.ayristirici.feed(self.cozucu.decode(b"", final=True)) + self.ayristirici.close()
+
+def _toplu_satir(r):
+    return json.dumps(r, ensure_ascii=False) + "\n"
+
+class _GovdeyleAkanYanit(StreamingResponse):
+    """İstek gövdesi okunurken akan yanıt. StreamingResponse (ASGI < 2.4, ör. uvicorn) bağlantı kopmasını receive()
+    ile dinler ve gövde parçalarını yutar; burada dinleyici yoktur, kopma üretecin kendisinde izlenir."""
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+
+@app.post("/hesapla/toplu")
+async def toplu_skor_hesapla(request: Request, yorum: bool = False):
+    """JSON liste, NDJSON veya CSV koordinatları alır, sonuçları NDJSON olarak akıtır.
+    NDJSON / CSV gövde satır satır okunur: her parçanın noktaları gelir gelmez skorlanmaya başlar, ilk sonuçlar
+    gövdenin sonunu beklemez. Bölünemeyen JSON belgesi önce bütünüyle okunur."""
+    max_nokta = cfg.TOPLU_AYARLARI["max_nokta"]
+    girdi = _TopluGirdi(request)
+    # İlk noktalar yanıt başlamadan okunur: biçim hatası ve nokta sınırı hâlâ 400 / 413 olarak dönebilir
+    ilk = []
+    try:
+        while not ilk and not girdi.bitti: ilk = await girdi.oku()
+    except GIRDI_HATALARI as e:
+        raise HTTPException(status_code=400, detail=f"Geçersiz koordinat listesi: {e}")
+    if len(ilk) > max_nokta:
+        raise HTTPException(status_code=413, detail=f"En fazla {max_nokta} nokta gönderilebilir")
+
+    async def satirlar():
+        toplu = BatchRun(cfg, generate_ai_comment if yorum else None)
+        bekleyen = {asyncio.wrap_future(f) for f in toplu.submit(ilk)}
+        okuma = None if girdi.bitti else asyncio.ensure_future(girdi.oku())
+        kopma = None
+        hata = None
+        try:
+            while okuma or bekleyen:
+                # Gövde bittikten sonra receive() yalnızca bağlantı kopmasını bildirir
+                if okuma is None and kopma is None: kopma = asyncio.ensure_future(request.receive())
+                biten, _ = await asyncio.wait([*bekleyen, okuma or kopma], return_when=asyncio.FIRST_COMPLETED)
+                if kopma in biten:
+                    if kopma.result()["type"] == "http.disconnect": return
+                    kopma = None  # Hata sonrası okunmadan kalan gövde parçası
+                for f in biten - {okuma, kopma}:
+                    bekleyen.discard(f)
+                    for r in f.result(): yield _toplu_satir(r)
+                if okuma not in biten: continue
+                okuma, parca = None, okuma
+                # Yanıt başladıktan sonraki girdi hataları son satırda bildirilir; gönderilmiş noktalar tamamlanır
+                try:
+                    noktalar = parca.result()
+                except GIRDI_HATALARI as e:
+                    hata = f"Geçersiz koordinat listesi: {e}"
+                    continue
+                if toplu.count + len(noktalar) > max_nokta:
+                    hata = f"En fazla {max_nokta} nokta gönderilebilir"
+                    continue
+                bekleyen |= {asyncio.wrap_future(f) for f in toplu.submit(noktalar)}
+                if not girdi.bitti: okuma = asyncio.ensure_future(girdi.oku())
+            if hata: yield _toplu_satir({"durum": "hata", "hata": hata})
+        finally:
+            for t in (okuma, kopma):
+                if t: t.cancel()
+            toplu.close()
+
+    return _GovdeyleAkanYanit(satirlar(), media_type="application/x-ndjson")
+
+@app.get("/isi-haritasi")
+def isi_haritasi(bbox: str, cozunurluk: int = None):
+    """bbox=min_lon,min_lat,max_lon,max_lat için skor gridlerini GeoTIFF olarak döndürür."""
+    try:
+        kutu = tuple(float(x) for x in bbox.split(","))
+        if len(kutu) != 4 or kutu[0] >= kutu[2] or kutu[1] >= kutu[3]: raise ValueError("bbox sırası hatalı")
+        veri = heatmap.render_geotiff(kutu, cfg, cozunurluk)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except upstream.UpstreamBusy as e:
+        raise HTTPException(status_code=429, detail=str(e), headers=upstream.retry_after_header(e))
+    except osm_fetcher.FetchError as e:
+        raise HTTPException(status_code=502, detail=str(e))
+    return Response(content=veri, media_type="image/tiff",
+                    headers={"Content-Disposition": 'attachment; filename="yasam_skoru.tif"'})
+
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
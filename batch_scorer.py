@@ -0,0 +1,231 @@
+# batch_scorer.py
+# (v1.0.0 - Toplu Skorlama)
+# Binlerce koordinatı mekansal kümelere ayırır; her küme için OSM verisini bir kez çeker
+# ve tüm noktaları aynı indeks üzerinde skorlar.
+#
+# Kullanım: python batch_scorer.py noktalar.ndjson > sonuclar.ndjson
+
+import concurrent.futures
+import csv
+import io
+import json
+import math
+import sys
+import time
+from collections import defaultdict
+
+import local_extract
+import osm_fetcher
+import projection
+import spatial_index
+from response_builder import build_score_response, sorted_places
+import upstream
+from scorer import QualityScorer, get_elevations_batch, slope_points
+
+ELEVATION_BATCH_POINTS = 20  # open-meteo tek istekte en fazla 100 koordinat = 20 nokta x 5
+
+
+class SharedFeatures:
+    def __init__(self, crs_utm, features, geometry_settings=None):
+        """Bir kümedeki tüm noktaların paylaştığı UTM verisi ve indeks."""
+        self.crs_utm = crs_utm
+        self.features = features
+        self.index = spatial_index.FeatureIndex(features, geometry_settings)
+
+
+def parse_points(text):
+    """JSON liste, {"koordinatlar": [...]}, NDJSON veya lat,lon başlıklı CSV'den (lat, lon) listesi."""
+    text = text.strip()
+    if not text: return []
+    if text[0] in "[{":
+        try:
+            data = json.loads(text)
+        except json.JSONDecodeError:
+            data = [json.loads(line) for line in text.splitlines() if line.strip()]
+        if isinstance(data, dict):
+            # Tek satırlık NDJSON da geçerli bir JSON nesnesidir
+            if "koordinatlar" in data: data = data["koordinatlar"]
+            elif "lat" in data and "lon" in data: data = [data]
+            else: raise ValueError("Nesnede 'koordinatlar' listesi ya da lat/lon alanları yok")
+        items = data
+    else:
+        items = list(csv.DictReader(io.StringIO(text)))
+
+    return [_point(item) for item in items]
+
+
+def _point(item):
+    if isinstance(item, dict): return float(item["lat"]), float(item["lon"])
+    return float(item[0]), float(item[1])
+
+
+def _sniff(line):
+    """İlk dolu satırdan girdi biçimi: "ndjson", "csv" ya da "belge" (satırlara bölünemeyen tek JSON belgesi)."""
+    if line[0] == "[": return "belge"
+    if line[0] == "{":
+        try:
+            data = json.loads(line)
+        except json.JSONDecodeError:
+            return "belge"  # Birden çok satıra yayılmış JSON nesnesi
+        return "ndjson" if isinstance(data, dict) and "lat" in data and "lon" in data else "belge"
+    return "csv"
+
+
+class PointParser:
+    """parse_points'in artımlı hali: gövde parça parça beslenir, tamamlanan NDJSON / CSV satırları hemen nokta olur.
+    JSON liste / {"koordinatlar": [...]} belgeleri bölünemez; bunlar close()'da parse_points ile bir kerede okunur."""
+
+    def __init__(self):
+        self.buffer = ""
+        self.mode = None
+        self.header = None
+
+    def feed(self, text):
+        self.buffer += text
+        if self.mode is None:
+            start = self.buffer.lstrip()
+            end = start.find("\n")
+            if end < 0: return []  # İlk satır henüz tamamlanmadı
+            self.mode, self.buffer = _sniff(start[:end].strip()), start
+        if self.mode == "belge": return []
+        *lines, self.buffer = self.buffer.split("\n")
+        return self._parse(lines)
+
+    def close(self):
+        text, self.buffer = self.buffer, ""
+        if self.mode is None and text.strip(): self.mode = _sniff(text.strip())
+        if self.mode in (None, "belge"): return parse_points(text)
+        return self._parse([text])
+
+    def _parse(self, lines):
+        points = []
+        for line in lines:
+            line = line.strip()
+            if not line: continue
+            if self.mode == "ndjson":
+                points.append(_point(json.loads(line)))
+            elif self.header is None:
+                self.header = next(csv.reader([line]))
+            else:
+                points.append(_point(dict(zip(self.header, next(csv.reader([line]))))))
+        return points
+
+
+def cluster_points(points, cell_deg, max_points, start=0):
+    """Noktaları sabit boyutlu enlem/boylam hücrelerine göre gruplar; büyük hücreleri böler.
+    start: ilk noktanın girdi genelindeki sırası (akışta parça parça gelen noktalar için)."""
+    cells = defaultdict(list)
+    for i, (lat, lon) in enumerate(points, start):
+        cells[(math.floor(lat / cell_deg), math.floor(lon / cell_deg))].append((i, lat, lon))
+    clusters = []
+    for members in cells.values():
+        for k in range(0, len(members), max_points):
+            clusters.append(members[k:k + max_points])
+    return clusters
+
+
+def _spread_m(center, members):
+    clat, clon = center
+    kx = 111320 * math.cos(math.radians(clat))
+    return max(math.hypot((lat - clat) * 111320, (lon - clon) * kx) for _, lat, lon in members)
+
+
+def fetch_cluster(members, config):
+    """Küme merkezinden, en uzak noktayı da kapsayacak yarıçapla tek sorgu."""
+    center = (sum(m[1] for m in members) / len(members), sum(m[2] for m in members) / len(members))
+    crs_utm = projection.utm_crs(*center)
+    tags = osm_fetcher.build_union_tags(config)
+    dist = osm_fetcher.max_search_radius(config) + _spread_m(center, members)
+    features = osm_fetcher.fetch_features(center, tags, dist, crs_utm,
+                                          getattr(config, "OSM_KARO_AYARLARI", None),
+                                          local_extract.get_store(config))
+    return SharedFeatures(crs_utm, features, getattr(config, "GEOMETRI_AYARLARI", None))
+
+
+def _wait_busy(fn, *args):
+    """Toplu iş arka plan işidir: upstream kuyruğu doluysa reddetmek yerine Retry-After kadar bekleyip dener."""
+    while True:
+        try:
+            return fn(*args)
+        except upstream.UpstreamBusy as e:
+            print(f"⏳ {e.name} yoğun, {e.retry_after:.1f}s bekleniyor")
+            time.sleep(e.retry_after)
+
+
+def fetch_elevations(members):
+    """Kümedeki tüm eğim noktalarının rakımlarını 100'lük paketlerle çeker."""
+    out = {}
+    for k in range(0, len(members), ELEVATION_BATCH_POINTS):
+        chunk = members[k:k + ELEVATION_BATCH_POINTS]
+        elevs = _wait_busy(get_elevations_batch, [p for _, lat, lon in chunk for p in slope_points(lat, lon)])
+        if not elevs: continue
+        for n, (i, _, _) in enumerate(chunk):
+            out[i] = elevs[n * 5:(n + 1) * 5]
+    return out
+
+
+def score_cluster(members, config, comment_fn=None):
+    try:
+        shared = _wait_busy(fetch_cluster, members, config)
+    except osm_fetcher.FetchError as e:
+        # Boş veriyle skorlanmaz: kümedeki her nokta hata satırı alır, diğer kümeler sürer
+        return [{"sira": i, "durum": "hata", "koordinat": {"lat": lat, "lon": lon}, "hata": str(e)} for i, lat, lon in members]
+    elevations = fetch_elevations(members)
+    results = []
+    for i, lat, lon in members:
+        koordinat = {"lat": lat, "lon": lon}
+        try:
+            motor = QualityScorer(lat, lon, config, shared=shared)
+            motor.elevations = elevations.get(i)
+            sonuc = motor.get_final_score()
+            cevap = build_score_response(sonuc)
+            if comment_fn:
+                cevap["ai_yorumu"] = comment_fn(cevap["skor_ozeti"], cevap["ozellikler"], sonuc.get("detaylar", {}))
+            results.append({"sira": i, "durum": "basarili", "koordinat": koordinat, **cevap,
+                            "yakin_yerler": sorted_places(sonuc)})
+        except Exception as e:
+            results.append({"sira": i, "durum": "hata", "koordinat": koordinat, "hata": str(e)})
+    return results
+
+
+class BatchRun:
+    """Noktaları parça parça kabul eden toplu skorlama: her parça kümelenip beklemeden iş parçacıklarına verilir."""
+
+    def __init__(self, config, comment_fn=None):
+        self.config = config
+        self.comment_fn = comment_fn
+        self.settings = config.TOPLU_AYARLARI
+        self.count = 0
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.settings["is_parcacigi"])
+
+    def submit(self, points):
+        """Parçanın kümelerini gönderir; küme başına Future (sonuç satırları listesi) döndürür."""
+        if not points: return []
+        clusters = cluster_points(points, self.settings["kume_boyutu"], self.settings["max_kume_noktasi"], self.count)
+        self.count += len(points)
+        print(f"📦 Toplu skorlama: {len(points)} nokta, {len(clusters)} küme")
+        return [self.executor.submit(score_cluster, c, self.config, self.comment_fn) for c in clusters]
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def score_many(points, config, comment_fn=None):
+    """Sonuçları kümeler tamamlandıkça üretir (sıra alanı girdi sırasını verir)."""
+    run = BatchRun(config, comment_fn)
+    try:
+        for f in concurrent.futures.as_completed(run.submit(points)):
+            yield from f.result()
+    finally:
+        run.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Kullanım: python batch_scorer.py <noktalar.json|.ndjson|.csv>", file=sys.stderr)
+        sys.exit(1)
+    import config
+    with open(sys.argv[1], encoding="utf-8") as f:
+        noktalar = parse_points(f.read())
+    for satir in score_many(noktalar, config):
+        sys.stdout.write(json.dumps(satir, ensure_ascii=False) + "\n")
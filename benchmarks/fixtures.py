@@ -0,0 +1,187 @@
+# benchmarks/fixtures.py
+# (v1.0.0 - Benchmark Fikstürleri)
+# Sahte sunucunun (replay_server.py) yanıtladığı Overpass / open-meteo / Gemini verisini üretir.
+#
+#   --sentetik : ağ gerekmez; tohumlu, her makinede birebir aynı veri (varsayılan)
+#   --kaydet   : senaryo bölgelerini gerçek Overpass ve open-meteo'dan bir kez indirir
+#
+# Kullanım (depo kökünden):
+#   python benchmarks/fixtures.py --sentetik
+#   python benchmarks/fixtures.py --kaydet
+
+import argparse
+import gzip
+import hashlib
+import json
+import math
+import os
+import random
+import sys
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from scenarios import KAPSAMA_DERECE, SENARYOLAR, points  # noqa: E402
+
+FIXTURE_DIR = os.path.join(BENCH_DIR, "fixtures")
+DOSYALAR = ("manifest.json", "overpass.json.gz", "elevation.json", "gemini.json")
+
+GEMINI_YANITI = {
+    "candidates": [{"content": {"parts": [{"text": "Benchmark yorumu: sakin, ulaşımı kolay ve sosyal olanakları "
+                                                   "yakın bir konum. Aileler için dengeli bir seçenek."}]}}]
+}
+
+
+def synthetic_elevation(lat, lon):
+    """Sentetik mod için pürüzsüz, deterministik rakım yüzeyi (m)."""
+    return round(50 + 35 * math.sin(lat * 300) + 25 * math.cos(lon * 250) + 10 * math.sin((lat + lon) * 1200), 1)
+
+
+def load(name, path=FIXTURE_DIR):
+    """Fikstür dosyasını okur (.gz uzantılılar açılarak)."""
+    opener = gzip.open if name.endswith(".gz") else open
+    with opener(os.path.join(path, name), "rt", encoding="utf-8") as f: return json.load(f)
+
+
+def fixture_hash():
+    """Fikstür setinin parmak izi; baseline ile aynı veri üzerinde mi ölçüldüğünü doğrulamak için."""
+    h = hashlib.sha1()
+    for name in DOSYALAR:
+        path = os.path.join(FIXTURE_DIR, name)
+        if os.path.exists(path):
+            with open(path, "rb") as f: h.update(f.read())
+    return h.hexdigest()[:16]
+
+
+def _tag_choices(config):
+    import osm_fetcher
+    choices = []
+    for key, values in osm_fetcher.build_union_tags(config).items():
+        if values is True: choices.append((key, "yes"))
+        else: choices.extend((key, v) for v in values)
+    return sorted(choices)
+
+
+def build_synthetic(config, seed=42):
+    """Senaryo başına yogunluk kadar etiketli nokta / alan / çizgi içeren Overpass JSON'u."""
+    rng = random.Random(seed)
+    choices = _tag_choices(config)
+    elements = []
+    next_id = [1]
+
+    def node(lat, lon, tags=None):
+        el = {"type": "node", "id": next_id[0], "lat": round(lat, 7), "lon": round(lon, 7)}
+        if tags: el["tags"] = tags
+        next_id[0] += 1
+        elements.append(el)
+        return el["id"]
+
+    def way(coords, tags, closed=False):
+        refs = [node(lat, lon) for lat, lon in coords]
+        if closed: refs.append(refs[0])
+        elements.append({"type": "way", "id": next_id[0], "nodes": refs, "tags": tags})
+        next_id[0] += 1
+
+    for s in SENARYOLAR:
+        for i in range(s["yogunluk"]):
+            key, value = rng.choice(choices)
+            tags = {key: value}
+            if i % 2: tags["name"] = f"{s['ad']} {key} {i}"
+            lat = s["lat"] + rng.uniform(-KAPSAMA_DERECE, KAPSAMA_DERECE)
+            lon = s["lon"] + rng.uniform(-KAPSAMA_DERECE, KAPSAMA_DERECE)
+            kind = rng.random()
+            if key == "highway" and value != "bus_stop":
+                way([(lat, lon), (lat + 0.001, lon + 0.004), (lat - 0.002, lon + 0.006)], tags)
+            elif kind < 0.2 and key in ("landuse", "leisure", "natural", "amenity", "building"):
+                d = rng.uniform(0.0005, 0.003)
+                way([(lat, lon), (lat, lon + d), (lat + d, lon + d), (lat + d, lon)], tags, closed=True)
+            else:
+                node(lat, lon, tags)
+
+        if s["ad"] == "sahil":
+            # Merkezin ~1 km doğusunda kuzey-güney uzanan kıyı çizgisi
+            coast = [(s["lat"] - KAPSAMA_DERECE + k * 0.006, s["lon"] + 0.012 + 0.002 * math.sin(k)) for k in range(21)]
+            way(coast, {"natural": "coastline"})
+
+    return {"version": 0.6, "generator": "benchmarks/fixtures.py (sentetik)", "elements": elements}
+
+
+def _overpass_query(tags, bbox):
+    """bbox: (güney, batı, kuzey, doğu). Etiketli node/way ve way düğümleri (ilişkiler hariç)."""
+    box = ",".join(str(v) for v in bbox)
+    parts = []
+    for key, values in tags.items():
+        filters = [f'["{key}"]'] if values is True else [f'["{key}"="{v}"]' for v in values]
+        for flt in filters:
+            parts.append(f"node{flt}({box});way{flt}({box});")
+    return f"[out:json][timeout:300];({''.join(parts)});(._;>;);out;"
+
+
+def record(config):
+    """Senaryo bölgelerini gerçek upstream'lerden indirir (tek seferlik, ağ gerekir)."""
+    import requests
+    import osm_fetcher
+    import upstream
+    from scorer import slope_points
+
+    tags = osm_fetcher.build_union_tags(config)
+    elements = {}
+    for s in SENARYOLAR:
+        bbox = (s["lat"] - KAPSAMA_DERECE, s["lon"] - KAPSAMA_DERECE, s["lat"] + KAPSAMA_DERECE, s["lon"] + KAPSAMA_DERECE)
+        print(f"📡 Overpass: {s['ad']}...")
+        resp = requests.post(upstream.url("overpass").rstrip("/") + "/interpreter",
+                             data={"data": _overpass_query(tags, bbox)}, timeout=600)
+        resp.raise_for_status()
+        for el in resp.json()["elements"]:
+            elements[(el["type"], el["id"])] = el
+    overpass = {"version": 0.6, "generator": "benchmarks/fixtures.py (kayıt)", "elements": list(elements.values())}
+
+    coords = [(s["lat"], s["lon"]) for s in SENARYOLAR] + [(lat, lon) for _, lat, lon in points(400)]
+    locations = [p for lat, lon in coords for p in slope_points(lat, lon)]
+    elevation = {}
+    for k in range(0, len(locations), 100):
+        chunk = locations[k:k + 100]
+        resp = requests.get(upstream.url("open_meteo"), timeout=30, params={
+            "latitude": ",".join(str(p["latitude"]) for p in chunk),
+            "longitude": ",".join(str(p["longitude"]) for p in chunk)})
+        resp.raise_for_status()
+        for p, h in zip(chunk, resp.json()["elevation"]):
+            elevation[f"{p['latitude']:.6f},{p['longitude']:.6f}"] = h
+    print(f"⛰️  {len(elevation)} rakım kaydedildi")
+    return overpass, elevation
+
+
+def write(kaynak, overpass, elevation):
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    files = {
+        "manifest.json": {"kaynak": kaynak, "senaryolar": SENARYOLAR},
+        "overpass.json.gz": overpass,
+        "elevation.json": elevation,
+        "gemini.json": GEMINI_YANITI,
+    }
+    for name, data in files.items():
+        raw = json.dumps(data, ensure_ascii=False, sort_keys=True).encode("utf-8")
+        # Overpass verisi depoda sıkıştırılmış tutulur; mtime=0 ile aynı veri her seferinde aynı baytları üretir
+        if name.endswith(".gz"): raw = gzip.compress(raw, mtime=0)
+        with open(os.path.join(FIXTURE_DIR, name), "wb") as f: f.write(raw)
+    print(f"✅ Fikstürler yazıldı: {FIXTURE_DIR} ({len(overpass['elements'])} OSM öğesi, parmak izi {fixture_hash()})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark fikstürlerini üretir.")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--sentetik", action="store_true", help="Ağsız, tohumlu sentetik veri (varsayılan)")
+    mode.add_argument("--kaydet", action="store_true", help="Gerçek Overpass / open-meteo'dan kaydet")
+    parser.add_argument("--tohum", type=int, default=42)
+    args = parser.parse_args()
+
+    import config
+    if args.kaydet:
+        overpass, elevation = record(config)
+        write("kayit", overpass, elevation)
+    else:
+        write("sentetik", build_synthetic(config, args.tohum), {})
+
+
+if __name__ == "__main__":
+    main()
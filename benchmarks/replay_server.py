@@ -0,0 +1,176 @@
+# benchmarks/replay_server.py
+# (v1.0.0 - Kayıttan Yanıt Veren Sahte Upstream Sunucusu)
+# Overpass (/api/interpreter, /api/status), open-meteo (/v1/elevation) ve Gemini (/gemini) uçlarını
+# benchmarks/fixtures verisinden yanıtlar. Overpass sorgusundaki poly kutusu ve etiket filtreleri uygulanır,
+# böylece yanıt boyutları gerçek sorgulara benzer. İsteğe bağlı sabit gecikme ağ süresini taklit eder.
+#
+# Kullanım (depo kökünden):
+#   python benchmarks/replay_server.py --port 8765 --gecikme overpass=800,open_meteo=60,gemini=500
+#   OVERPASS_URL=http://127.0.0.1:8765/api ELEVATION_URL=http://127.0.0.1:8765/v1/elevation \
+#   GEMINI_URL=http://127.0.0.1:8765/gemini uvicorn api:app
+
+import argparse
+import ast
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+from fixtures import FIXTURE_DIR, load, synthetic_elevation
+
+POLY_RE = re.compile(r"\(poly:'([^']*)'\)")
+TAG_RE = re.compile(r"\[('(?:[^'\\]|\\.)*')(?:=('(?:[^'\\]|\\.)*'))?\]\(poly:")
+STATUS = ("Connected as: 0\nCurrent time: 2024-01-01T00:00:00Z\nAnnounced endpoint: none\n"
+          "Rate limit: 0\n6 slots available now.\nCurrently running queries (pid, space limit, time limit, start time):\n")
+
+
+class FixtureStore:
+    def __init__(self, path=FIXTURE_DIR):
+        """Fikstürleri belleğe yükler ve düğümler için bbox filtresine uygun diziler kurar."""
+        self.manifest = load("manifest.json", path)
+        self.gemini = json.dumps(load("gemini.json", path)).encode()
+        self.elevation = load("elevation.json", path)
+        elements = load("overpass.json.gz", path)["elements"]
+
+        self.nodes = {el["id"]: el for el in elements if el["type"] == "node"}
+        self.ways = [el for el in elements if el["type"] == "way"]
+        self.node_ids = np.array(list(self.nodes), dtype=np.int64)
+        self.node_lat = np.array([self.nodes[i]["lat"] for i in self.node_ids])
+        self.node_lon = np.array([self.nodes[i]["lon"] for i in self.node_ids])
+        self.tagged_nodes = [el for el in self.nodes.values() if el.get("tags")]
+
+        if self.elevation:
+            keys = list(self.elevation)
+            self.elev_xy = np.array([[float(v) for v in k.split(",")] for k in keys])
+            self.elev_values = np.array([self.elevation[k] for k in keys])
+
+    @staticmethod
+    def _matches(tags, filters):
+        return any(k in tags and (v is None or tags[k] == v) for k, v in filters)
+
+    def overpass(self, query):
+        """Sorgunun poly kutusu ve etiketlerine uyan node/way'ler ile way düğümleri."""
+        polys = POLY_RE.findall(query)
+        if not polys: return {"version": 0.6, "elements": []}
+        coords = [float(v) for p in polys for v in p.split()]
+        lats, lons = coords[0::2], coords[1::2]
+        south, north, west, east = min(lats), max(lats), min(lons), max(lons)
+        filters = {(ast.literal_eval(k), ast.literal_eval(v) if v else None) for k, v in TAG_RE.findall(query)}
+
+        inside = (self.node_lat >= south) & (self.node_lat <= north) & (self.node_lon >= west) & (self.node_lon <= east)
+        inside_ids = set(self.node_ids[inside].tolist())
+        out = [el for el in self.tagged_nodes if el["id"] in inside_ids and self._matches(el["tags"], filters)]
+        refs = set()
+        for way in self.ways:
+            if self._matches(way["tags"], filters) and any(r in inside_ids for r in way["nodes"]):
+                out.append(way)
+                refs.update(way["nodes"])
+        seen = {el["id"] for el in out if el["type"] == "node"}
+        out.extend(self.nodes[r] for r in refs if r not in seen)
+        return {"version": 0.6, "generator": "replay_server", "elements": out}
+
+    def elevations(self, lats, lons):
+        if self.manifest["kaynak"] == "sentetik" or not self.elevation:
+            return [synthetic_elevation(a, o) for a, o in zip(lats, lons)]
+        out = []
+        for a, o in zip(lats, lons):
+            h = self.elevation.get(f"{a:.6f},{o:.6f}")
+            if h is None:
+                # Kayıtta olmayan nokta: en yakın kayıtlı rakım
+                h = float(self.elev_values[np.argmin(((self.elev_xy - (a, o)) ** 2).sum(axis=1))])
+            out.append(h)
+        return out
+
+
+def make_handler(store, delays, counters):
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, body, content_type="application/json", status=200):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _count(self, name, size):
+            with lock:
+                c = counters.setdefault(name, {"istek": 0, "bayt": 0})
+                c["istek"] += 1
+                c["bayt"] += size
+
+        def _delay(self, name):
+            if delays.get(name): time.sleep(delays[name] / 1000)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path.endswith("/status"):
+                return self._send(STATUS.encode(), "text/plain")
+            if url.path.endswith("/elevation"):
+                q = parse_qs(url.query)
+                lats = [float(v) for v in q["latitude"][0].split(",")]
+                lons = [float(v) for v in q["longitude"][0].split(",")]
+                body = json.dumps({"elevation": store.elevations(lats, lons)}).encode()
+                self._delay("open_meteo")
+                self._count("open_meteo", len(body))
+                return self._send(body)
+            self._send(b'{"hata": "bilinmeyen uc"}', status=404)
+
+        def do_POST(self):
+            url = urlparse(self.path)
+            raw = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            if url.path.endswith("/interpreter"):
+                query = parse_qs(raw.decode())["data"][0]
+                body = json.dumps(store.overpass(query)).encode()
+                self._delay("overpass")
+                self._count("overpass", len(body))
+                return self._send(body)
+            if url.path.endswith("/gemini"):
+                self._delay("gemini")
+                self._count("gemini", len(store.gemini))
+                return self._send(store.gemini)
+            self._send(b'{"hata": "bilinmeyen uc"}', status=404)
+
+    return Handler
+
+
+def parse_delays(text):
+    """"overpass=800,open_meteo=60" -> {"overpass": 800.0, ...} (ms)."""
+    if not text: return {}
+    return {k.strip(): float(v) for k, v in (part.split("=") for part in text.split(","))}
+
+
+def start(port=0, delays=None, store=None):
+    """Sunucuyu arka plan iş parçacığında başlatır; (sunucu, taban_adres, sayaçlar) döndürür."""
+    counters = {}
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(store or FixtureStore(), delays or {}, counters))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="replay-server", daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}", counters
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fikstürlerden yanıt veren sahte upstream sunucusu.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--gecikme", default="", help="Upstream başına yapay gecikme (ms), ör. overpass=800,gemini=500")
+    args = parser.parse_args()
+    server, base, _ = start(args.port, parse_delays(args.gecikme))
+    print(f"🎭 Sahte upstream sunucusu: {base}")
+    print(f"   OVERPASS_URL={base}/api ELEVATION_URL={base}/v1/elevation GEMINI_URL={base}/gemini")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+# benchmarks/run.py
+# (v1.0.0 - Çevrimdışı Performans Ölçümü)
+# Sahte upstream sunucusunu başlatır, servisi ona yönlendirir ve ölçer:
+#   1) QualityScorer.get_final_score: senaryo başına uçtan uca ve aşama bazında süreler
+#   2) /hesapla: eşzamanlı isteklerde gecikme yüzdelikleri ve verim (istek/sn)
+#   3) Tepe RSS ve upstream'e giden istek / bayt sayıları
+# Sonuç JSON olarak yazılır; --karsilastir ile kayıtlı bir baseline'a göre gerileme raporlanır.
+# Depoda sentetik fikstürler (benchmarks/fixtures) ve bunlarla alınmış benchmarks/baseline.json bulunur;
+# baseline makineye bağlıdır (bkz. "ortam"), başka bir makinede önce --kaydet ile yenilenmelidir.
+#
+# Kullanım (depo kökünden):
+#   python benchmarks/fixtures.py --sentetik
+#   python benchmarks/run.py --kaydet benchmarks/baseline.json
+#   python benchmarks/run.py --karsilastir benchmarks/baseline.json --gecikme overpass=800,open_meteo=60
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT)
+
+import replay_server  # noqa: E402
+from fixtures import FIXTURE_DIR, fixture_hash  # noqa: E402
+from scenarios import SENARYOLAR, points  # noqa: E402
+
+# Bu eşiğin altındaki süre farkları ölçüm gürültüsü sayılır
+MIN_FARK_MS = 2.0
+
+
+def peak_rss_mb():
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def summary(values):
+    a = np.asarray(values, dtype=float)
+    return {"p50": round(float(np.percentile(a, 50)), 1), "p95": round(float(np.percentile(a, 95)), 1),
+            "p99": round(float(np.percentile(a, 99)), 1), "ort": round(float(a.mean()), 1)}
+
+
+def configure(base, keep_caches, real_limits):
+    """Servis modülleri içe aktarılmadan önce upstream adreslerini sahte sunucuya çevirir."""
+    os.environ["OVERPASS_URL"] = f"{base}/api"
+    os.environ["ELEVATION_URL"] = f"{base}/v1/elevation"
+    os.environ["GEMINI_URL"] = f"{base}/gemini"
+    os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+    # Önbellek veritabanı her koşuda boş bir geçici klasörde oluşur
+    os.chdir(tempfile.mkdtemp(prefix="yasam_skoru_bench_"))
+
+    import config
+    import osmnx as ox
+    ox.settings.use_cache = False
+    if not keep_caches:
+        config.SONUC_ONBELLEGI_AYARLARI["aktif"] = False
+        config.OSM_KARO_AYARLARI["aktif"] = False
+    if not real_limits:
+        # Fikstürler yereldir; ölçülen şey servisin kendisi olsun, jeton kovası değil
+        for limits in config.UPSTREAM_HIZ_LIMITLERI.values():
+            limits.update({"hiz": 1e6, "patlama": 1e6})
+    return config
+
+
+def bench_scorer(config, repeats):
+    import metrics
+    from scorer import QualityScorer
+
+    out = {}
+    for s in SENARYOLAR:
+        totals, stages = [], {}
+        for i in range(repeats + 1):
+            with redirect_stdout(io.StringIO()):
+                profile = metrics.start_profile()
+                t = time.perf_counter()
+                sonuc = QualityScorer(s["lat"], s["lon"], config).get_final_score()
+                elapsed = (time.perf_counter() - t) * 1000
+            if i == 0: continue  # Isınma turu (import, JIT'siz ilk çağrı maliyetleri)
+            totals.append(elapsed)
+            for stage, ms in profile.items():
+                stages.setdefault(stage, []).append(ms)
+        out[s["ad"]] = {
+            "uctan_uca_ms": summary(totals),
+            "asamalar_ms": {k: round(float(np.median(v)), 1) for k, v in sorted(stages.items())},
+            "skor": round(sonuc["genel_skor"], 2),
+            "mekan_sayisi": len(sonuc["mekanlar"]),
+        }
+        print(f"  {s['ad']:<14} p50 {out[s['ad']]['uctan_uca_ms']['p50']:>8} ms   skor {out[s['ad']]['skor']}")
+    return out
+
+
+async def _bench_api(count, concurrency):
+    import httpx
+    import api
+
+    latencies, statuses = [], {}
+    gate = asyncio.Semaphore(concurrency)
+
+    async def one(client, lat, lon):
+        async with gate:
+            t = time.perf_counter()
+            r = await client.post("/hesapla", json={"lat": lat, "lon": lon})
+            latencies.append((time.perf_counter() - t) * 1000)
+            statuses[str(r.status_code)] = statuses.get(str(r.status_code), 0) + 1
+
+    async with api.lifespan(api.app):
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=300) as client:
+            with redirect_stdout(io.StringIO()):
+                await one(client, SENARYOLAR[0]["lat"], SENARYOLAR[0]["lon"])  # Isınma
+                latencies.clear()
+                statuses.clear()
+                t = time.perf_counter()
+                await asyncio.gather(*(one(client, lat, lon) for _, lat, lon in points(count)))
+                wall = time.perf_counter() - t
+
+    return {"istek": count, "eszamanli": concurrency, "sure_s": round(wall, 2),
+            "verim_istek_sn": round(count / wall, 2), "gecikme_ms": summary(latencies), "durumlar": statuses}
+
+
+def run(args):
+    if not os.path.exists(os.path.join(FIXTURE_DIR, "manifest.json")):
+        sys.exit("Fikstür yok: önce 'python benchmarks/fixtures.py --sentetik' çalıştırın.")
+    server, base, counters = replay_server.start(delays=replay_server.parse_delays(args.gecikme))
+    config = configure(base, args.onbellek, args.gercek_sinirlar)
+
+    print(f"🏁 Benchmark (fikstür {fixture_hash()}, sunucu {base})")
+    result = {
+        "ortam": {"python": platform.python_version(), "platform": platform.platform(), "cpu": os.cpu_count()},
+        "fikstur": fixture_hash(),
+        "ayarlar": {"tekrar": args.tekrar, "istek": args.istek, "eszamanli": args.eszamanli,
+                    "gecikme": args.gecikme, "onbellek": args.onbellek},
+        "tepe_rss_mb": {"baslangic": peak_rss_mb()},
+    }
+
+    print("▶ get_final_score (sıralı)")
+    result["tek_nokta"] = bench_scorer(config, args.tekrar)
+    result["tepe_rss_mb"]["tek_nokta"] = peak_rss_mb()
+
+    print(f"▶ /hesapla ({args.istek} istek, {args.eszamanli} eşzamanlı)")
+    result["hesapla"] = asyncio.run(_bench_api(args.istek, args.eszamanli))
+    result["tepe_rss_mb"]["hesapla"] = peak_rss_mb()
+    h = result["hesapla"]
+    print(f"  verim {h['verim_istek_sn']} istek/sn, p50 {h['gecikme_ms']['p50']} ms, "
+          f"p95 {h['gecikme_ms']['p95']} ms, durumlar {h['durumlar']}")
+
+    result["upstream"] = counters
+    server.shutdown()
+    return result
+
+
+# --- Baseline karşılaştırması ---
+
+def _metrics(result):
+    """Karşılaştırılan metrikler: ad -> (değer, küçük_daha_iyi_mi, süre_mi)."""
+    out = {}
+    for name, r in result["tek_nokta"].items():
+        out[f"tek_nokta.{name}.p50_ms"] = (r["uctan_uca_ms"]["p50"], True, True)
+        out[f"tek_nokta.{name}.p95_ms"] = (r["uctan_uca_ms"]["p95"], True, True)
+        for stage, ms in r["asamalar_ms"].items():
+            out[f"tek_nokta.{name}.{stage}_ms"] = (ms, True, True)
+    h = result["hesapla"]
+    out["hesapla.p50_ms"] = (h["gecikme_ms"]["p50"], True, True)
+    out["hesapla.p95_ms"] = (h["gecikme_ms"]["p95"], True, True)
+    out["hesapla.verim_istek_sn"] = (h["verim_istek_sn"], False, False)
+    out["tepe_rss_mb"] = (result["tepe_rss_mb"]["hesapla"], True, False)
+    return out
+
+
+def compare(baseline, current, tolerance):
+    """Tabloyu yazdırır; gerileme veya skor değişikliği varsa False döndürür."""
+    ok = True
+    if baseline.get("fikstur") != current["fikstur"]:
+        print(f"⚠️  Fikstürler farklı (baseline {baseline.get('fikstur')}, şimdi {current['fikstur']}); "
+              "karşılaştırma anlamsız olabilir.")
+    if baseline.get("ayarlar") != current["ayarlar"]:
+        print(f"⚠️  Ayarlar farklı: baseline {baseline.get('ayarlar')}")
+
+    old, new = _metrics(baseline), _metrics(current)
+    print(f"\n{'metrik':<44}{'baseline':>12}{'şimdi':>12}{'değişim':>10}")
+    for name, (value, lower_better, is_time) in new.items():
+        if name not in old:
+            print(f"{name:<44}{'-':>12}{value:>12}{'yeni':>10}")
+            continue
+        before = old[name][0]
+        change = (value - before) / before * 100 if before else 0.0
+        worse = change > tolerance if lower_better else change < -tolerance
+        if is_time and abs(value - before) < MIN_FARK_MS: worse = False
+        mark = "  ❌" if worse else "  ✅" if (change < -tolerance if lower_better else change > tolerance) else ""
+        print(f"{name:<44}{before:>12}{value:>12}{change:>9.1f}%{mark}")
+        ok = ok and not worse
+
+    for name, r in current["tek_nokta"].items():
+        before = baseline["tek_nokta"].get(name, {}).get("skor")
+        if before is not None and abs(before - r["skor"]) > 0.01:
+            print(f"❗ Skor değişti: {name} {before} -> {r['skor']}")
+            ok = False
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Kayıtlı fikstürlerle çevrimdışı performans ölçümü.")
+    parser.add_argument("--tekrar", type=int, default=5, help="Senaryo başına get_final_score tekrarı")
+    parser.add_argument("--istek", type=int, default=200, help="/hesapla istek sayısı")
+    parser.add_argument("--eszamanli", type=int, default=16, help="/hesapla eşzamanlılık")
+    parser.add_argument("--gecikme", default="", help="Sahte upstream gecikmesi (ms), ör. overpass=800,open_meteo=60")
+    parser.add_argument("--onbellek", action="store_true", help="Sonuç ve OSM karo önbelleklerini açık bırak")
+    parser.add_argument("--gercek-sinirlar", action="store_true", help="config'deki upstream hız sınırlarını uygula")
+    parser.add_argument("--cikti", help="Sonuç JSON dosyası")
+    parser.add_argument("--kaydet", help="Sonucu baseline olarak bu dosyaya yaz")
+    parser.add_argument("--karsilastir", help="Bu baseline ile karşılaştır (gerilemede çıkış kodu 1)")
+    parser.add_argument("--tolerans", type=float, default=15.0, help="Gerileme eşiği (%%)")
+    args = parser.parse_args()
+
+    # Göreli yollar, çalışma klasörü geçici klasöre taşınmadan önce çözülür
+    paths = {k: os.path.abspath(v) if v else None for k, v in
+             (("cikti", args.cikti), ("kaydet", args.kaydet), ("karsilastir", args.karsilastir))}
+    result = run(args)
+
+    for key in ("cikti", "kaydet"):
+        if paths[key]:
+            with open(paths[key], "w", encoding="utf-8") as f:
+                json.dump(result, f, ensure_ascii=False, indent=2)
+            print(f"💾 {paths[key]}")
+    if paths["karsilastir"]:
+        with open(paths["karsilastir"], encoding="utf-8") as f:
+            baseline = json.load(f)
+        if not compare(baseline, result, args.tolerans):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
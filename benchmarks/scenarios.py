@@ -0,0 +1,27 @@
+# benchmarks/scenarios.py
+# (v1.0.0 - Sabit Benchmark Senaryoları)
+# Tüm ölçümler bu koordinatlar üzerinde yapılır; eşzamanlılık testi için her senaryonun
+# çevresinde tohumlu (tekrarlanabilir) sapmalarla ek noktalar üretilir.
+
+import random
+
+SENARYOLAR = [
+    {"ad": "sehir_merkezi", "lat": 41.0369, "lon": 28.9850, "aciklama": "Yoğun şehir merkezi (Taksim)", "yogunluk": 4000},
+    {"ad": "banliyo", "lat": 41.0016, "lon": 28.6419, "aciklama": "Banliyö konut bölgesi (Beylikdüzü)", "yogunluk": 1200},
+    {"ad": "sahil", "lat": 40.9640, "lon": 29.0630, "aciklama": "Sahil şeridi (Caddebostan)", "yogunluk": 900},
+    {"ad": "kirsal", "lat": 41.3500, "lon": 28.3000, "aciklama": "Boş kırsal alan (Çatalca)", "yogunluk": 30},
+]
+
+KAPSAMA_DERECE = 0.06  # Fikstürlerin senaryo merkezi çevresinde kapsadığı yarı genişlik (~6 km)
+SAPMA_DERECE = 0.005  # Eşzamanlılık noktalarının merkezden en fazla sapması (~500 m)
+
+
+def points(count, seed=42):
+    """Senaryolar arasında dönüşümlü, merkez çevresinde sapmalı count adet (ad, lat, lon)."""
+    rng = random.Random(seed)
+    out = []
+    for i in range(count):
+        s = SENARYOLAR[i % len(SENARYOLAR)]
+        out.append((s["ad"], round(s["lat"] + rng.uniform(-SAPMA_DERECE, SAPMA_DERECE), 6),
+                    round(s["lon"] + rng.uniform(-SAPMA_DERECE, SAPMA_DERECE), 6)))
+    return out
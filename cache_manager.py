@@ -1,79 +1,376 @@
 # cache_manager.py
-# (v3.0.0 - Genel Veri Yönetimi)
+# (v4.1.0 - Havuzlu, Toplu Yazan, Çok Katmanlı Anahtar-Değer Deposu)
+#
+# Katmanlar: süreç içi LRU -> SQLite (WAL). Okumalar iş parçacığı başına kalıcı bağlantı kullanır;
+# yazmalar önce belleğe, sonra arka plan yazıcısıyla toplu UPSERT olarak diske gider.
+# kv_cache metin anahtarlıdır; kv_cells cell_key tamsayı hücre anahtarlı, (veri_tipi, hücre) sıralı tutulur:
+# bir hücrenin alt hücreleri tek aralık taramasıyla okunur, eksik hücrede komşu / ata hücreye düşülür.
 
+import atexit
+import contextvars
+import json
+import math
+import queue
 import sqlite3
-import os
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from contextlib import contextmanager
 from datetime import datetime
 
+import cell_key
+
 DB_FILE = "yasam_skoru_cache.db"
+MEMORY_CAPACITY = 10000
+WRITE_BATCH = 500
+
+_local = threading.local()
+_memory = OrderedDict()
+_memory_lock = threading.Lock()
+_write_queue = queue.Queue()
+_writer = None
+_writer_lock = threading.Lock()
+_stats = defaultdict(lambda: {"bellek_isabet": 0, "disk_isabet": 0, "iskalama": 0})
+_stats_lock = threading.Lock()
+_refresh_ratio = contextvars.ContextVar("yenileme_orani", default=1.0)
+
+UPSERT_SQL = '''
+    INSERT INTO kv_cache (grid_id, data_type, value, last_updated) VALUES (?, ?, ?, ?)
+    ON CONFLICT(grid_id, data_type) DO UPDATE SET value = excluded.value, last_updated = excluded.last_updated
+'''
+UPSERT_CELL_SQL = '''
+    INSERT INTO kv_cells (data_type, cell, value, last_updated) VALUES (?, ?, ?, ?)
+    ON CONFLICT(data_type, cell) DO UPDATE SET value = excluded.value, last_updated = excluded.last_updated
+'''
+IN_CHUNK = 500  # SQLite parametre sınırı altında kalmak için IN sorgusu parça boyutu
+
+
+def _connect():
+    conn = sqlite3.connect(DB_FILE, timeout=30, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def get_connection():
+    """İş parçacığı başına kalıcı SQLite bağlantısı."""
+    conn = getattr(_local, "conn", None)
+    if conn is None or getattr(_local, "db_file", None) != DB_FILE:
+        conn = _connect()
+        _local.conn = conn
+        _local.db_file = DB_FILE
+    return conn
 
 
 def init_db():
-    """Veritabanı ve tabloyu oluşturur."""
-    conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
-
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS environmental_cache (
-            grid_id TEXT PRIMARY KEY,
-            ndvi_value REAL,
-            no2_value REAL,
-            last_updated TEXT
+    """Veritabanı ve tabloyu oluşturur, eski environmental_cache verisini taşır."""
+    conn = get_connection()
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS kv_cache (
+            grid_id TEXT NOT NULL,
+            data_type TEXT NOT NULL,
+            value TEXT,
+            last_updated REAL,
+            PRIMARY KEY (grid_id, data_type)
         )
     ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS kv_cells (
+            data_type TEXT NOT NULL,
+            cell INTEGER NOT NULL,
+            value TEXT,
+            last_updated REAL,
+            PRIMARY KEY (data_type, cell)
+        ) WITHOUT ROWID
+    ''')
 
+    old = conn.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='environmental_cache'").fetchone()
+    if old:
+        rows = conn.execute("SELECT grid_id, ndvi_value, no2_value, last_updated FROM environmental_cache").fetchall()
+        items = []
+        for grid_id, ndvi, no2, updated in rows:
+            try:
+                ts = datetime.fromisoformat(updated).timestamp()
+            except (TypeError, ValueError):
+                ts = time.time()
+            # Eski sürümün ıskalamada yazdığı sabit yedek NDVI (0.3491) gerçek veri değildir, taşınmaz
+            if ndvi is not None and ndvi != 0.3491: items.append((grid_id, "ndvi", json.dumps(ndvi), ts))
+            if no2 is not None: items.append((grid_id, "no2", json.dumps(no2), ts))
+        conn.executemany("INSERT OR IGNORE INTO kv_cache (grid_id, data_type, value, last_updated) VALUES (?, ?, ?, ?)",
+                         items)
+        conn.execute("DROP TABLE environmental_cache")
+        print(f"  [CACHE] environmental_cache taşındı ({len(items)} kayıt).")
+    _migrate_ndvi(conn)
     conn.commit()
-    conn.close()
+
+
+def _migrate_ndvi(conn):
+    """get_grid_id anahtarlı eski NDVI kayıtlarını kv_cells'e taşır; aynı hücreye düşenlerin ortalaması alınır."""
+    rows = conn.execute("SELECT grid_id, value, last_updated FROM kv_cache WHERE data_type = 'ndvi'").fetchall()
+    if not rows: return
+    import config
+    level = config.HUCRE_AYARLARI["ndvi"]["seviye"]
+    merged = {}
+    for grid_id, value, ts in rows:
+        value = json.loads(value) if value is not None else None
+        if value is None: continue
+        lat, lon = (float(v) for v in grid_id.split("_"))
+        m = merged.setdefault(cell_key.cell_id(lat, lon, level), [0.0, 0, ts])
+        m[0], m[1], m[2] = m[0] + value, m[1] + 1, max(m[2], ts)
+    conn.executemany("INSERT OR IGNORE INTO kv_cells (data_type, cell, value, last_updated) VALUES ('ndvi', ?, ?, ?)",
+                     [(cell, json.dumps(round(total / n, 4)), ts) for cell, (total, n, ts) in merged.items()])
+    conn.execute("DELETE FROM kv_cache WHERE data_type = 'ndvi'")
+    print(f"  [CACHE] {len(rows)} eski NDVI kaydı {len(merged)} hücreye taşındı (seviye {level}).")
+
+
+def grid_id_from_index(gi, gj):
+    """Tamsayı hücre indeksinden (round(lat*200), round(lon*200)) grid anahtarı."""
+    return f"{gi / 200}_{gj / 200}"
 
 
 def get_grid_id(lat, lon):
-    grid_lat = round(lat * 200) / 200
-    grid_lon = round(lon * 200) / 200
-    return f"{grid_lat}_{grid_lon}"
+    """Eski metin anahtar (~500m); yeni hücre verileri cell_key ile kv_cells'te tutulur."""
+    return grid_id_from_index(round(lat * 200), round(lon * 200))
 
 
-def get_cached_data(lat, lon, data_type="ndvi"):
-    grid_id = get_grid_id(lat, lon)
-    conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
-    column = "ndvi_value" if data_type == "ndvi" else "no2_value"
+# --- Bellek katmanı ---
+
+def _remember(key, entry):
+    with _memory_lock:
+        _memory[key] = entry
+        _memory.move_to_end(key)
+        while len(_memory) > MEMORY_CAPACITY:
+            _memory.popitem(last=False)
+
+
+def _count(data_type, field):
+    with _stats_lock:
+        _stats[data_type][field] += 1
 
+
+# --- Arka plan yazıcısı ---
+
+def _writer_loop():
+    conn = _connect()
+    while True:
+        batch = [_write_queue.get()]
+        while len(batch) < WRITE_BATCH:
+            try:
+                batch.append(_write_queue.get_nowait())
+            except queue.Empty:
+                break
+        try:
+            groups = defaultdict(list)
+            for sql, row in batch: groups[sql].append(row)
+            for sql, rows in groups.items(): conn.executemany(sql, rows)
+            conn.commit()
+        except Exception as e:
+            print(f"  [CACHE] Yazma hatası: {e}")
+        finally:
+            for _ in batch: _write_queue.task_done()
+
+
+def _ensure_writer():
+    global _writer
+    with _writer_lock:
+        if _writer is None or not _writer.is_alive():
+            _writer = threading.Thread(target=_writer_loop, name="cache-writer", daemon=True)
+            _writer.start()
+
+
+def write(sql, rows):
+    """Kendi tablosunu yöneten modüllerin (tile_cache) yazmaları da aynı arka plan yazıcısından toplu geçer."""
+    _ensure_writer()
+    for row in rows: _write_queue.put((sql, row))
+
+
+def flush():
+    """Kuyruktaki tüm yazmalar diske inene kadar bekler."""
+    if _writer is not None: _write_queue.join()
+
+
+# --- Süre kontrolü ---
+
+@contextmanager
+def refresh_ahead(ratio):
+    """Bu bağlamda TTL'inin ratio kadarını doldurmuş kayıtlar süresi dolmuş sayılır (önbellek ısıtma)."""
+    token = _refresh_ratio.set(ratio)
     try:
-        cursor.execute(f"SELECT {column} FROM environmental_cache WHERE grid_id = ?", (grid_id,))
-        result = cursor.fetchone()
+        yield
+    finally:
+        _refresh_ratio.reset(token)
+
+
+def expired(age, ttl):
+    return age > ttl * _refresh_ratio.get()
+
+
+# --- Genel anahtar-değer API'si ---
+
+def _read(mkey, data_type, sql, params):
+    with _memory_lock:
+        entry = _memory.get(mkey)
+        if entry is not None: _memory.move_to_end(mkey)
+    if entry is not None:
+        _count(data_type, "bellek_isabet")
+        return entry
+
+    try:
+        row = get_connection().execute(sql, params).fetchone()
     except Exception:
-        result = None
+        row = None
+    if row is None or row[0] is None:
+        _count(data_type, "iskalama")
+        return None
+    entry = (json.loads(row[0]), row[1])
+    _remember(mkey, entry)
+    _count(data_type, "disk_isabet")
+    return entry
+
+
+def get_entry(key, data_type):
+    """(değer, son_güncelleme_epoch) ya da None."""
+    return _read((key, data_type), data_type, "SELECT value, last_updated FROM kv_cache WHERE grid_id = ? AND data_type = ?",
+                 (key, data_type))
+
+
+def get_value(key, data_type, max_age=None):
+    entry = get_entry(key, data_type)
+    if entry is None: return None
+    if max_age is not None and expired(time.time() - entry[1], max_age): return None
+    return entry[0]
+
+
+def set_many(items):
+    """items: [(anahtar, veri_tipi, değer)] - belleğe hemen, diske arka planda yazılır."""
+    now = time.time()
+    rows = []
+    for key, data_type, value in items:
+        _remember((key, data_type), (value, now))
+        rows.append((UPSERT_SQL, (key, data_type, json.dumps(value, ensure_ascii=False), now)))
+    _ensure_writer()
+    for row in rows: _write_queue.put(row)
+
+
+def set_value(key, data_type, value):
+    set_many([(key, data_type, value)])
+
+
+def stats():
+    """Veri tipi başına isabet/ıskalama sayaçları ve isabet oranı."""
+    with _stats_lock:
+        out = {}
+        for data_type, s in _stats.items():
+            total = s["bellek_isabet"] + s["disk_isabet"] + s["iskalama"]
+            out[data_type] = {**s, "isabet_orani": round((total - s["iskalama"]) / total, 3) if total else 0.0}
+    return out
+
+
+# --- Hücre katmanı (cell_key tamsayı anahtarları) ---
+
+def get_cell_entry(cell, data_type):
+    """(değer, son_güncelleme_epoch) ya da None."""
+    return _read((cell, data_type), data_type, "SELECT value, last_updated FROM kv_cells WHERE data_type = ? AND cell = ?",
+                 (data_type, cell))
+
+
+def get_cell_value(cell, data_type, max_age=None):
+    entry = get_cell_entry(cell, data_type)
+    if entry is None: return None
+    if max_age is not None and expired(time.time() - entry[1], max_age): return None
+    return entry[0]
+
 
-    conn.close()
-    if result and result[0] is not None: return result[0]
-    return None
+def get_cell_values(cells, data_type):
+    """{hücre: değer} - bellekte olmayanlar parça başına tek IN sorgusuyla okunur; kayıt olmayan hücre dönmez."""
+    out, missing = {}, []
+    with _memory_lock:
+        for cell in cells:
+            entry = _memory.get((cell, data_type))
+            if entry is None:
+                missing.append(cell)
+            else:
+                out[cell] = entry[0]
+    conn = get_connection()
+    for i in range(0, len(missing), IN_CHUNK):
+        part = missing[i:i + IN_CHUNK]
+        sql = f"SELECT cell, value, last_updated FROM kv_cells WHERE data_type = ? AND cell IN ({','.join('?' * len(part))})"
+        for cell, value, updated in conn.execute(sql, (data_type, *part)).fetchall():
+            if value is None: continue
+            out[cell] = json.loads(value)
+            _remember((cell, data_type), (out[cell], updated))
+    with _stats_lock:
+        s = _stats[data_type]
+        s["bellek_isabet"] += len(cells) - len(missing)
+        s["disk_isabet"] += len(out) - (len(cells) - len(missing))
+        s["iskalama"] += len(cells) - len(out)
+    return out
+
+
+def set_cells(items):
+    """items: [(hücre, veri_tipi, değer)] - belleğe hemen, diske arka planda yazılır."""
+    now = time.time()
+    rows = []
+    for cell, data_type, value in items:
+        _remember((cell, data_type), (value, now))
+        rows.append((UPSERT_CELL_SQL, (data_type, cell, json.dumps(value, ensure_ascii=False), now)))
+    _ensure_writer()
+    for row in rows: _write_queue.put(row)
+
+
+def scan_cells(data_type, cell=None):
+    """[(hücre, değer, son_güncelleme_epoch)] - cell verilirse yalnız onun ve alt hücrelerinin kayıtları (tek
+    aralık taraması), verilmezse veri tipinin tümü. Yalnız diske inmiş kayıtlar görünür (gerekirse önce flush)."""
+    sql = "SELECT cell, value, last_updated FROM kv_cells WHERE data_type = ?"
+    params = (data_type,)
+    if cell is not None:
+        sql += " AND cell BETWEEN ? AND ?"
+        params += (cell_key.range_min(cell), cell_key.range_max(cell))
+    rows = get_connection().execute(sql, params).fetchall()
+    return [(c, json.loads(value), updated) for c, value, updated in rows if value is not None]
+
+
+def _distance_weight(lat, lon, cell):
+    """Noktadan hücre merkezine yaklaşık mesafenin tersi (boylam farkı enlemle ölçeklenir)."""
+    clat, clon = cell_key.center(cell)
+    d = math.hypot(clat - lat, (clon - lon) * math.cos(math.radians(lat)))
+    return 1 / max(d, 1e-9)
+
+
+def lookup_cell(lat, lon, data_type, settings):
+    """Çok çözünürlüklü sayısal okuma: (değer, kaynak) ya da (None, None).
+    settings: {"seviye", "min_seviye", "min_komsu"}. Kaynak "hucre" (tam isabet), "komsu" (en az min_komsu kayıtlı
+    komşunun mesafe ağırlıklı ortalaması) ya da "ust" (min_seviye'ye kadar ilk kayıtlı ata hücrenin değeri,
+    yoksa altındaki kayıtların ortalaması)."""
+    cell = cell_key.cell_id(lat, lon, settings["seviye"])
+    value = get_cell_value(cell, data_type)
+    if value is not None: return value, "hucre"
+
+    found = get_cell_values(cell_key.neighbors(cell), data_type)
+    if len(found) >= settings.get("min_komsu", 2):
+        weights = {c: _distance_weight(lat, lon, c) for c in found}
+        return sum(found[c] * w for c, w in weights.items()) / sum(weights.values()), "komsu"
+
+    for level in range(settings["seviye"] - 1, settings.get("min_seviye", settings["seviye"]) - 1, -1):
+        ancestor = cell_key.parent(cell, level)
+        rows = scan_cells(data_type, ancestor)
+        if not rows: continue
+        own = [v for c, v, _ in rows if c == ancestor]
+        return (own[0] if own else sum(v for _, v, _ in rows) / len(rows)), "ust"
+    return None, None
+
+
+# --- Eski API (grid tabanlı) ---
+
+def get_cached_data(lat, lon, data_type="ndvi"):
+    return get_value(get_grid_id(lat, lon), data_type)
 
 
 def save_data_to_cache(lat, lon, data_type, value):
     grid_id = get_grid_id(lat, lon)
-    now = datetime.now().isoformat()
-    column = "ndvi_value" if data_type == "ndvi" else "no2_value"
-
-    conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
-
-    cursor.execute("SELECT * FROM environmental_cache WHERE grid_id = ?", (grid_id,))
-    exists = cursor.fetchone()
-
-    if exists:
-        cursor.execute(f"UPDATE environmental_cache SET {column} = ?, last_updated = ? WHERE grid_id = ?",
-                       (value, now, grid_id))
-    else:
-        if data_type == "ndvi":
-            cursor.execute("INSERT INTO environmental_cache (grid_id, ndvi_value, last_updated) VALUES (?, ?, ?)",
-                           (grid_id, value, now))
-        else:
-            cursor.execute("INSERT INTO environmental_cache (grid_id, no2_value, last_updated) VALUES (?, ?, ?)",
-                           (grid_id, value, now))
-
-    conn.commit()
-    conn.close()
+    set_value(grid_id, data_type, value)
     print(f"  [CACHE] {data_type.upper()} kaydedildi. Grid: {grid_id}")
 
 
-init_db()
\ No newline at end of file
+init_db()
+atexit.register(flush)
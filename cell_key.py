@@ -0,0 +1,127 @@
+# cell_key.py
+# (v1.0.0 - Hiyerarşik Tamsayı Hücre Anahtarları)
+# Enlem/boylam, seviye z'de 2^z x 2^z eşit açılı bir gride bölünür (hücre 180/2^z derece enlem x 360/2^z boylam).
+# Anahtar, hücrenin (x, y) indekslerinin Morton (Z-sırası) serpiştirmesi ve sonuna eklenen bir işaret bitidir
+# (S2 hücre kimlikleri gibi): float biçimlendirme yoktur (-0.0 / yuvarlama artıkları oluşmaz), seviye anahtarın
+# en düşük 1 bitinden okunur ve bir hücrenin tüm alt hücreleri [range_min, range_max] tamsayı aralığına düşer;
+# SQLite'ta tek bir BETWEEN sorgusuyla taranabilir. En ince seviye MAX_LEVEL (~2cm), anahtar 61 bit.
+
+import numpy as np
+
+MAX_LEVEL = 30
+
+# 8 komşu: (dx, dy)
+YONLER = ((-1, -1), (0, -1), (1, -1), (-1, 0), (1, 0), (-1, 1), (0, 1), (1, 1))
+
+
+def _spread(v):
+    """32 bitlik tamsayının bitlerini araya birer sıfır koyarak 64 bite yayar (int ya da numpy dizisi)."""
+    v = v & 0xFFFFFFFF
+    v = (v | (v << 16)) & 0x0000FFFF0000FFFF
+    v = (v | (v << 8)) & 0x00FF00FF00FF00FF
+    v = (v | (v << 4)) & 0x0F0F0F0F0F0F0F0F
+    v = (v | (v << 2)) & 0x3333333333333333
+    return (v | (v << 1)) & 0x5555555555555555
+
+
+def _compact(v):
+    v = v & 0x5555555555555555
+    v = (v | (v >> 1)) & 0x3333333333333333
+    v = (v | (v >> 2)) & 0x0F0F0F0F0F0F0F0F
+    v = (v | (v >> 4)) & 0x00FF00FF00FF00FF
+    v = (v | (v >> 8)) & 0x0000FFFF0000FFFF
+    return (v | (v >> 16)) & 0xFFFFFFFF
+
+
+def _encode(x, y, level):
+    return ((((_spread(x) | (_spread(y) << 1)) << 1) | 1) << (2 * (MAX_LEVEL - level)))
+
+
+def _indices(lat, lon, level):
+    n = 1 << level
+    x = min(max(int((lon + 180.0) / 360.0 * n), 0), n - 1)
+    y = min(max(int((lat + 90.0) / 180.0 * n), 0), n - 1)
+    return x, y
+
+
+def cell_id(lat, lon, level):
+    """Noktayı içeren seviye-level hücresinin anahtarı."""
+    if not 0 <= level <= MAX_LEVEL: raise ValueError(f"Seviye 0-{MAX_LEVEL} arasında olmalı: {level}")
+    return _encode(*_indices(lat, lon, level), level)
+
+
+def cell_ids(lats, lons, level):
+    """cell_id'nin numpy sürümü (int64 dizisi)."""
+    n = 1 << level
+    x = np.clip(np.floor((np.asarray(lons, dtype=np.float64) + 180.0) / 360.0 * n), 0, n - 1).astype(np.int64)
+    y = np.clip(np.floor((np.asarray(lats, dtype=np.float64) + 90.0) / 180.0 * n), 0, n - 1).astype(np.int64)
+    return _encode(x, y, level)
+
+
+def _lsb(cell):
+    return cell & -cell
+
+
+def level(cell):
+    return MAX_LEVEL - (_lsb(cell).bit_length() - 1) // 2
+
+
+def decode(cell):
+    """(seviye, x, y)"""
+    z = level(cell)
+    morton = cell >> (2 * (MAX_LEVEL - z) + 1)
+    return z, _compact(morton), _compact(morton >> 1)
+
+
+def parent(cell, level_=None):
+    """Üst seviyedeki ata hücre (varsayılan bir üst seviye)."""
+    z = level(cell)
+    target = z - 1 if level_ is None else level_
+    if not 0 <= target <= z: raise ValueError(f"Ata seviyesi 0-{z} arasında olmalı: {target}")
+    lsb = 1 << (2 * (MAX_LEVEL - target))
+    return (cell & -lsb) | lsb
+
+
+def children(cell):
+    """Bir alt seviyedeki 4 hücre (Z sırasıyla)."""
+    lsb = _lsb(cell)
+    if lsb == 1: raise ValueError("En ince seviyedeki hücrenin alt hücresi yok")
+    step = lsb >> 2
+    return [cell - lsb + step + i * 2 * step for i in range(4)]
+
+
+def range_min(cell):
+    return cell - (_lsb(cell) - 1)
+
+
+def range_max(cell):
+    """range_min..range_max: hücrenin kendisi ve tüm alt hücreleri."""
+    return cell + (_lsb(cell) - 1)
+
+
+def contains(cell, other):
+    return range_min(cell) <= other <= range_max(cell)
+
+
+def neighbors(cell):
+    """Aynı seviyedeki en fazla 8 komşu; boylam 180. meridyende sarılır, kutuplarda kesilir."""
+    z, x, y = decode(cell)
+    n = 1 << z
+    out = []
+    for dx, dy in YONLER:
+        ny = y + dy
+        if 0 <= ny < n: out.append(_encode((x + dx) % n, ny, z))
+    return out
+
+
+def bounds(cell):
+    """(min_lon, min_lat, max_lon, max_lat)"""
+    z, x, y = decode(cell)
+    n = 1 << z
+    return x / n * 360.0 - 180.0, y / n * 180.0 - 90.0, (x + 1) / n * 360.0 - 180.0, (y + 1) / n * 180.0 - 90.0
+
+
+def center(cell):
+    """(lat, lon)"""
+    min_lon, min_lat, max_lon, max_lat = bounds(cell)
+    return (min_lat + max_lat) / 2, (min_lon + max_lon) / 2
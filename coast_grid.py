@@ -0,0 +1,159 @@
+# coast_grid.py
+# (v1.0.0 - Önceden Hesaplanmış Kıyı Mesafesi Gridi)
+# deniz_kenari (kıyı çizgisi / plaj / körfez) geometrileri çok uzun çizgi ve poligonlardır; her istekte kesin
+# mesafe ölçmek yerine bir şehir kutusu için UTM piksel merkezlerinden en yakın kıyıya mesafe bir kez
+# hesaplanıp GeoTIFF'e yazılır. İstek anında mesafe bellekteki gridden çift doğrusal (bilinear) tek okumadır.
+# Mesafe alanı 1-Lipschitz olduğundan okuma hatası piksel köşegeninin yarısını aşmaz.
+#
+# Kullanım:
+#   python coast_grid.py --bbox 28.6,40.8,29.4,41.3 --cikti kiyi_mesafe.tif --cozunurluk 25
+#   python coast_grid.py --bbox 28.6,40.8,29.4,41.3 --cikti kiyi_mesafe.tif --ozut turkiye.parquet
+#   KIYI_MESAFE_DOSYASI=kiyi_mesafe.tif uvicorn api:app
+
+import argparse
+import math
+import threading
+
+import numpy as np
+import shapely
+
+import projection
+
+METRE_PER_DERECE = 111320
+SATIR_PARCASI = 256  # Grid satırları bu boyutta parçalarla işlenir (bellek)
+
+_GRID = None
+_LOCK = threading.Lock()
+
+
+class CoastGrid:
+    def __init__(self, path):
+        import rasterio  # KIYI_MESAFE_DOSYASI ayarlı değilse rasterio hiç yüklenmez
+        with rasterio.open(path) as ds:
+            self.data = ds.read(1).astype(np.float32)
+            self.inverse = ~ds.transform
+            self.crs = ds.crs.to_string()
+            # Bu mesafe ve üstü "en az bu kadar" anlamına gelir (hesapta kullanılan üst sınır)
+            self.max_distance = float(ds.tags().get("max_mesafe_m", np.inf))
+        self.height, self.width = self.data.shape
+        print(f"✅ Kıyı mesafesi gridi yüklendi: {path} ({self.width}x{self.height}, {self.crs})")
+
+    def distance_at(self, lat, lon):
+        """Noktanın en yakın kıyıya mesafesi (m); grid dışında None."""
+        value = float(self.distances_at(np.array([lat]), np.array([lon]))[0])
+        return None if math.isnan(value) else value
+
+    def distances_at(self, lats, lons):
+        """distance_at'in dizi hali (ısı haritası pikselleri için); grid dışındaki noktalar NaN."""
+        x, y = projection.transformer(projection.WGS84, self.crs).transform(lons, lats)
+        col, row = self.inverse * (np.asarray(x, dtype=float), np.asarray(y, dtype=float))
+        inside = (col >= 0) & (col < self.width) & (row >= 0) & (row < self.height)
+        # Piksel merkezleri (i + 0.5) üzerinde çift doğrusal ağırlıklar; kenarda en yakın piksel
+        fx, fy = col - 0.5, row - 0.5
+        c0 = np.clip(np.floor(fx), 0, self.width - 1).astype(np.intp)
+        r0 = np.clip(np.floor(fy), 0, self.height - 1).astype(np.intp)
+        c1, r1 = np.minimum(c0 + 1, self.width - 1), np.minimum(r0 + 1, self.height - 1)
+        tx, ty = np.clip(fx - c0, 0.0, 1.0), np.clip(fy - r0, 0.0, 1.0)
+        # Ağırlıklar float32 gridle aynı hassasiyette çarpılır
+        f32 = lambda a: a.astype(np.float32)
+        d = self.data
+        top = d[r0, c0] * f32(1 - tx) + d[r0, c1] * f32(tx)
+        bottom = d[r1, c0] * f32(1 - tx) + d[r1, c1] * f32(tx)
+        return np.where(inside, top * f32(1 - ty) + bottom * f32(ty), np.nan).astype(float)
+
+def get_grid(config):
+    """KIYI_MESAFE_DOSYASI ayarlıysa (ilk çağrıda yükleyerek) gridi döndürür."""
+    global _GRID
+    path = getattr(config, "KIYI_MESAFE_DOSYASI", None)
+    if not path: return None
+    with _LOCK:
+        if _GRID is None:
+            _GRID = CoastGrid(path)
+    return _GRID
+
+
+# --- Grid üretimi ---
+
+def coast_tags(config):
+    return config.YESIL_SOSYAL_AYARLARI["POZITIF_ETKENLER"]["etiketler"]["deniz_kenari"]["osm_tags"]
+
+
+def _expanded(bbox, margin_m):
+    """Kutu dışında kalan ama kenardaki piksellere yakın kıyılar da hesaba girsin diye genişletilmiş kutu."""
+    lat = (bbox[1] + bbox[3]) / 2
+    dlat = margin_m / METRE_PER_DERECE
+    dlon = margin_m / (METRE_PER_DERECE * max(math.cos(math.radians(lat)), 0.01))
+    return (bbox[0] - dlon, bbox[1] - dlat, bbox[2] + dlon, bbox[3] + dlat)
+
+
+def load_coast(bbox, config, margin_m, extract=None):
+    """Kutu + kenar payı içindeki kıyı geometrileri (WGS84): yerel özütten ya da tek Overpass sorgusuyla."""
+    import local_extract
+    import osm_fetcher
+    import upstream
+    tags = coast_tags(config)
+    area = _expanded(bbox, margin_m)
+    if extract:
+        gdf = local_extract._read(extract, tags)
+        gdf = gdf.cx[area[0]:area[2], area[1]:area[3]]
+    else:
+        upstream.get_bucket("overpass").acquire()
+        with upstream.thread_limit("overpass"):
+            gdf = upstream.osmnx().features.features_from_bbox(bbox=area, tags=tags)
+    gdf = osm_fetcher.slim(gdf, tags)
+    return gdf[osm_fetcher.tag_mask(gdf, tags)] if not gdf.empty else gdf
+
+
+def build(bbox, config, resolution, max_distance, extract=None):
+    """(mesafe dizisi, transform, crs) - piksel merkezlerinden en yakın kıyı geometrisine mesafe, en fazla max_distance."""
+    from rasterio.transform import from_origin
+    clat, clon = (bbox[1] + bbox[3]) / 2, (bbox[0] + bbox[2]) / 2
+    crs = projection.utm_crs(clat, clon)
+    minx, miny, maxx, maxy = projection.transformer(projection.WGS84, crs).transform_bounds(*bbox)
+    width = max(1, int(math.ceil((maxx - minx) / resolution)))
+    height = max(1, int(math.ceil((maxy - miny) / resolution)))
+
+    coast = load_coast(bbox, config, max_distance, extract)
+    print(f"🌊 {len(coast)} kıyı geometrisi, grid {width}x{height} ({resolution}m)")
+    out = np.full((height, width), max_distance, dtype=np.float32)
+    if not coast.empty:
+        tree = shapely.STRtree(np.asarray(coast.to_crs(crs).geometry.values, dtype=object))
+        xs = minx + (np.arange(width) + 0.5) * resolution
+        for r0 in range(0, height, SATIR_PARCASI):
+            ys = maxy - (np.arange(r0, min(r0 + SATIR_PARCASI, height)) + 0.5) * resolution
+            xx, yy = np.meshgrid(xs, ys)
+            points = shapely.points(xx.ravel(), yy.ravel())
+            (pi, _), d = tree.query_nearest(points, max_distance=max_distance, return_distance=True, all_matches=False)
+            block = np.full(len(points), max_distance, dtype=np.float32)
+            block[pi] = d
+            out[r0:r0 + len(ys)] = block.reshape(len(ys), width)
+    return out, from_origin(minx, maxy, resolution, resolution), crs
+
+
+def write(path, data, transform, crs, max_distance):
+    import rasterio
+    with rasterio.open(path, "w", driver="GTiff", width=data.shape[1], height=data.shape[0], count=1,
+                       dtype="float32", crs=crs, transform=transform, tiled=True, compress="deflate") as dst:
+        dst.write(data, 1)
+        dst.update_tags(max_mesafe_m=str(max_distance))
+    print(f"✅ Kıyı mesafesi gridi yazıldı: {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Şehir kutusu için kıyı mesafesi gridini (GeoTIFF) üretir.")
+    parser.add_argument("--bbox", required=True, help="min_lon,min_lat,max_lon,max_lat")
+    parser.add_argument("--cikti", required=True, help="Yazılacak GeoTIFF")
+    parser.add_argument("--cozunurluk", type=float, default=25.0, help="Piksel boyutu (m)")
+    parser.add_argument("--max-mesafe", type=float, default=5000.0,
+                        help="Üst sınır (m); deniz_kenari arama yarıçapından küçük olmamalı")
+    parser.add_argument("--ozut", help="Overpass yerine yerel OSM özütü (.parquet/.gpkg/.osm/.osm.pbf)")
+    args = parser.parse_args()
+
+    import config
+    bbox = tuple(float(v) for v in args.bbox.split(","))
+    data, transform, crs = build(bbox, config, args.cozunurluk, args.max_mesafe, args.ozut)
+    write(args.cikti, data, transform, crs, args.max_mesafe)
+
+
+if __name__ == "__main__":
+    main()
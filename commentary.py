@@ -0,0 +1,204 @@
+# commentary.py
+# (v1.0.0 - Arka Plan AI Yorumları)
+# /hesapla skoru beklemeden döner: yorum önce parmak izi önbelleğine bakılarak, yoksa yerel şablonla
+# doldurulur ve Gemini isteği arka plan işçi kuyruğuna bırakılır. İstemci sonucu GET /yorum/{id}
+# ya da /yorum/{id}/akis (SSE) ile alır. Yorum kimliği parmak izinin kendisidir.
+
+import asyncio
+import hashlib
+import json
+import time
+
+import cache_manager
+import config
+import metrics
+
+DATA_TYPE = "yorum"
+
+_jobs = {}  # yorum_id -> iş durumu
+_queue = None
+_workers = []
+_loop = None
+_generate = None
+
+
+def _bucket(value, size):
+    return int(round(float(value) / size) * size)
+
+
+def _nearby(detaylar, limit=2):
+    """Yorumda anılan yakın mekanlar: (isim, mesafe) - prompt ile aynı seçim."""
+    sosyal = (detaylar or {}).get("sosyal") or {}
+    return [(v["closest"], v["distance"]) for v in list(sosyal.values())[:limit]]
+
+
+def fingerprint(skorlar, ozellikler, detaylar):
+    """Kovalanmış skorlar + mahalle etiketi + arazi + yakın mekanlardan yorum kimliği."""
+    s = config.AI_YORUM_AYARLARI
+    data = {
+        "genel": _bucket(skorlar["genel_skor"], s["skor_kovasi"]),
+        "alt": {k: _bucket(v, s["skor_kovasi"]) for k, v in sorted(skorlar["detaylar"].items()) if v is not None},
+        "mahalle": ozellikler["mahalle_karakteri"]["etiket"],
+        "arazi": ozellikler["cografya"]["yurunebilirlik"],
+        "yakin": [(name, _bucket(d, s["mesafe_kovasi_m"])) for name, d in _nearby(detaylar)],
+    }
+    return hashlib.sha1(json.dumps(data, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()[:20]
+
+
+def template_comment(skorlar, ozellikler, detaylar):
+    """Model yavaşken ya da yokken kullanılan anlık, yerel iki cümlelik yorum."""
+    genel = skorlar["genel_skor"]
+    seviye = "çok güçlü" if genel >= 85 else "güçlü" if genel >= 70 else "dengeli" if genel >= 50 else "gelişmeye açık"
+    gurultu = skorlar["detaylar"]["gurultu"]
+    mahalle = ozellikler["mahalle_karakteri"]["etiket"].split(" ", 1)[-1]
+    arazi = ozellikler["cografya"]["yurunebilirlik"]
+
+    # Kısmi sonuçta bilinmeyen mahalle / gürültü cümleden çıkarılır
+    parcalar = [] if mahalle == "Bilinmiyor" else [f"{mahalle} karakterinde"]
+    if gurultu is not None:
+        parcalar.append(("sakin" if gurultu >= 70 else "orta hareketli" if gurultu >= 40 else "hareketli") + " bir çevre")
+    ilk = f"🏠 {genel}/100 puanla {seviye} bir konum" + (": " + ", ".join(parcalar) if parcalar else "") + "."
+    yakin = _nearby(detaylar, 1)
+    if yakin:
+        return f"{ilk} {yakin[0][0]} yalnızca {yakin[0][1]}m uzakta, arazi {arazi.lower()}."
+    return f"{ilk} Arazi {arazi.lower()}; detaylı skorları aşağıda inceleyebilirsiniz."
+
+
+def _inputs(govde):
+    return govde["skor_ozeti"], govde["ozellikler"], govde.get("detayli_analiz", {})
+
+
+def _remembered(yorum_id):
+    ttl = config.AI_YORUM_AYARLARI["ttl_saat"] * 3600
+    return cache_manager.get_value(yorum_id, DATA_TYPE, ttl)
+
+
+# --- İşçi kuyruğu ---
+
+def start(generate):
+    """generate: async (skorlar, ozellikler, detaylar) -> metin ya da None. İşçiler ilk işte başlar."""
+    global _generate
+    _generate = generate
+
+
+def _ensure_workers():
+    """Kuyruk ve işçiler çalışan olay döngüsüne bağlıdır; döngü değiştiyse yeniden kurulur."""
+    global _queue, _workers, _loop
+    loop = asyncio.get_running_loop()
+    if _loop is loop: return
+    s = config.AI_YORUM_AYARLARI
+    _loop = loop
+    _queue = asyncio.Queue(maxsize=s["kuyruk_boyutu"])
+    _jobs.clear()
+    _workers = [loop.create_task(_worker()) for _ in range(s["isci"])]
+
+
+async def _worker():
+    timeout = config.AI_YORUM_AYARLARI["zaman_asimi_sn"]
+    while True:
+        yorum_id = await _queue.get()
+        job = _jobs.get(yorum_id)
+        try:
+            if job is None: continue
+            try:
+                text = await asyncio.wait_for(_generate(*job["girdi"]), timeout)
+            except Exception as e:
+                print(f"⚠️  AI yorumu üretilemedi ({metrics.error_kind(e)}): {e}")
+                text = None
+            if text:
+                cache_manager.set_value(yorum_id, DATA_TYPE, text)
+                job.update(durum="hazir", yorum=text, kaynak="ai")
+            else:
+                job.update(durum="sablon", kaynak="sablon")
+            metrics.inc("ai_yorum_toplam", kaynak=job["kaynak"])
+            job["bitti"] = time.time()
+            job["olay"].set()
+        finally:
+            _queue.task_done()
+
+
+def _prune():
+    keep = config.AI_YORUM_AYARLARI["is_saklama_sn"]
+    now = time.time()
+    for k in [k for k, j in _jobs.items() if j.get("bitti") and now - j["bitti"] > keep]:
+        del _jobs[k]
+
+
+def _status(yorum_id, job):
+    return {"yorum_id": yorum_id, "durum": job["durum"], "yorum": job["yorum"], "kaynak": job["kaynak"]}
+
+
+async def attach(govde, ai=True):
+    """Yanıt gövdesine yorumu ekler: önbellekte varsa hazır metin, yoksa şablon + arka plan işi (ai=False ise yalnız şablon)."""
+    skorlar, ozellikler, detaylar = _inputs(govde)
+    yorum_id = fingerprint(skorlar, ozellikler, detaylar)
+    text = await asyncio.to_thread(_remembered, yorum_id)
+    if text is not None:
+        metrics.inc("ai_yorum_toplam", kaynak="onbellek")
+        return {**govde, "ai_yorumu": text, "yorum_id": yorum_id, "yorum_durumu": "hazir"}
+
+    if not ai:
+        # Kısmi sonuç: iş kaydı açılmaz, aynı parmak izli tam sonuç sonradan AI yorumu alabilsin
+        return {**govde, "ai_yorumu": template_comment(skorlar, ozellikler, detaylar), "yorum_id": None,
+                "yorum_durumu": "sablon"}
+
+    _ensure_workers()
+    job = _jobs.get(yorum_id)
+    if job is None:
+        _prune()
+        job = {"durum": "bekliyor", "yorum": template_comment(skorlar, ozellikler, detaylar), "kaynak": "sablon",
+               "girdi": (skorlar, ozellikler, detaylar), "olay": asyncio.Event()}
+        if _generate is None:
+            job["durum"] = "sablon"
+        else:
+            try:
+                _queue.put_nowait(yorum_id)
+            except asyncio.QueueFull:
+                # Kuyruk doluysa şablon metin kalıcı yanıt olur
+                metrics.inc("ai_yorum_toplam", kaynak="kuyruk_dolu")
+                job["durum"] = "sablon"
+        if job["durum"] == "sablon":
+            job["bitti"] = time.time()
+            job["olay"].set()
+        _jobs[yorum_id] = job
+    return {**govde, "ai_yorumu": job["yorum"], "yorum_id": yorum_id, "yorum_durumu": job["durum"]}
+
+
+async def status(yorum_id, wait=0):
+    """Yorum durumu; wait > 0 ise hazır olana kadar (en fazla wait sn) bekler. Bilinmeyen kimlikte None."""
+    job = _jobs.get(yorum_id) if _loop is asyncio.get_running_loop() else None
+    if job is not None and wait and not job["olay"].is_set():
+        try:
+            await asyncio.wait_for(job["olay"].wait(), wait)
+        except asyncio.TimeoutError:
+            pass
+    if job is not None and job["durum"] != "bekliyor":
+        return _status(yorum_id, job)
+
+    text = await asyncio.to_thread(_remembered, yorum_id)
+    if text is not None:
+        return {"yorum_id": yorum_id, "durum": "hazir", "yorum": text, "kaynak": "ai"}
+    return _status(yorum_id, job) if job is not None else None
+
+
+def comment_sync(skorlar, ozellikler, detaylar, fetch):
+    """Toplu mod için eşzamanlı yol: önbellek -> fetch (Gemini) -> şablon."""
+    yorum_id = fingerprint(skorlar, ozellikler, detaylar)
+    text = _remembered(yorum_id)
+    if text is not None:
+        metrics.inc("ai_yorum_toplam", kaynak="onbellek")
+        return text
+    text = fetch(skorlar, ozellikler, detaylar)
+    if text:
+        cache_manager.set_value(yorum_id, DATA_TYPE, text)
+        metrics.inc("ai_yorum_toplam", kaynak="ai")
+        return text
+    metrics.inc("ai_yorum_toplam", kaynak="sablon")
+    return template_comment(skorlar, ozellikler, detaylar)
+
+
+async def stop():
+    global _loop, _workers
+    for task in _workers: task.cancel()
+    _workers = []
+    _loop = None
@@ -9,9 +9,22 @@ import os
 CLIENT_ID = os.environ.get("SH_CLIENT_ID")
 CLIENT_SECRET = os.environ.get("SH_CLIENT_SECRET")
 
+# --- VERİ KAYNAĞI ---
+# "overpass": istek anında Overpass (karo önbelleği ile), "yerel": başlangıçta yüklenen bölgesel özüt.
+VERI_KAYNAGI = os.environ.get("OSM_VERI_KAYNAGI", "overpass")
+YEREL_OSM_DOSYASI = os.environ.get("YEREL_OSM_DOSYASI")  # .parquet / .gpkg / .osm / .osm.pbf
+
+# --- UPSTREAM ADRESLERİ ---
+# Benchmark'ta (benchmarks/replay_server.py) ortam değişkenleriyle yerel sahte sunucuya yönlendirilir.
+UPSTREAM_ADRESLERI = {
+    "overpass": os.environ.get("OVERPASS_URL", "https://overpass-api.de/api"),
+    "open_meteo": os.environ.get("ELEVATION_URL", "https://api.open-meteo.com/v1/elevation"),
+    "gemini": os.environ.get("GEMINI_URL", "https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash:generateContent")
+}
+
 # --- 1. YEŞİL & SOSYAL SKOR (LÜKSLER) ---
 YESIL_SOSYAL_AYARLARI = {
-    "NDVI": { "agirlik": 0.3, "min_esik": 0.15, "max_esik": 0.55 },
+    "NDVI": { "agirlik": 0.3, "min_esik": 0.15, "max_esik": 0.55, "varsayilan": 0.3491 },
     "POZITIF_ETKENLER": {
         "agirlik": 0.7,
         "yakinlik_agirligi": 0.7,
@@ -39,7 +52,7 @@ YERLESIM_AYARLARI = {
 
 # --- 3. GÜRÜLTÜ SKORU ---
 GURULTU_AYARLARI = {
-    "max_etki_mesafesi": 500, "min_esik": 200, "max_esik": 5000, 
+    "max_etki_mesafesi": 500, "min_esik": 200, "max_esik": 5000, "sonumleyici_aktif": True,
     "SONUMLEYICILER": { 'leisure=park': -50, 'natural=wood': -100, 'natural=water': -30 },
     "ETKENLER": {
         "highway": { "motorway": 100, "primary": 80, "trunk": 80, "secondary": 50, "tertiary": 20 },
@@ -52,7 +65,10 @@ GURULTU_AYARLARI = {
 }
 
 # --- 4. EĞİM ANALİZİ ---
+# DEM_DOSYASI ayarlıysa rakım/eğim yerel GeoTIFF'ten hesaplanır, yoksa open-meteo kullanılır.
+DEM_DOSYASI = os.environ.get("DEM_DOSYASI")
 EGIM_AYARLARI = {
+    "dem_yaricap": 150,
     "kategoriler": {
         "duz": { "max_egim": 3, "etiket": "Düzayak (Mükemmel)", "puan": 100 },
         "hafif": { "max_egim": 8, "etiket": "Hafif Eğimli", "puan": 85 },
@@ -73,3 +89,93 @@ VIBE_AYARLARI = {
 
 # --- 6. FİNAL AĞIRLIKLAR ---
 FINAL_AGIRLIKLAR = { "yesil_sosyal": 0.35, "yerlesim": 0.45, "gurultu": 0.20 }
+
+# --- 7. OSM KARO ÖNBELLEĞİ ---
+# Ham OSM verisi karo_boyutu (derece) karolarda saklanır; ttl_saat sonra yenilenir, max_boyut_mb aşılınca LRU ile silinir.
+OSM_KARO_AYARLARI = { "aktif": True, "karo_boyutu": 0.02, "ttl_saat": 168, "max_boyut_mb": 512 }
+
+# --- 8. TOPLU SKORLAMA ---
+# Noktalar kume_boyutu (derece) hücrelerde gruplanır; her küme için OSM verisi bir kez çekilir.
+TOPLU_AYARLARI = { "kume_boyutu": 0.01, "max_kume_noktasi": 200, "is_parcacigi": 4, "max_nokta": 20000 }
+
+# --- 9. UPSTREAM EŞZAMANLILIK SINIRLARI ---
+# Worker başına aynı anda açık tutulabilecek çağrı sayısı.
+UPSTREAM_LIMITLERI = { "overpass": 4, "open_meteo": 8, "gemini": 4 }
+
+# --- 10. SONUÇ ÖNBELLEĞİ ---
+# hucre_boyutu (derece) ~0.0005 = ~50m; anahtar ayrıca skor ayarlarının parmak izini içerir.
+SONUC_ONBELLEGI_AYARLARI = { "aktif": True, "hucre_boyutu": 0.0005, "ttl_saat": 24 }
+
+# --- 11. ISI HARİTASI ---
+# /isi-haritasi çıktısı: cozunurluk_m varsayılan piksel boyutu (min_cozunurluk_m altı reddedilir), max_piksel istek başına sınır,
+# onbellek_adedi bellekte tutulan GeoTIFF sayısı.
+ISI_HARITASI_AYARLARI = { "cozunurluk_m": 50, "min_cozunurluk_m": 10, "max_piksel": 250000, "onbellek_adedi": 8 }
+
+# --- 12. UPSTREAM HIZ SINIRLARI ---
+# Süreç genelinde jeton kovası: hiz saniyede istek, patlama anlık izin, max_kuyruk sırada bekleyebilecek çağrı (dolunca 429 + Retry-After).
+UPSTREAM_HIZ_LIMITLERI = {
+    "overpass": { "hiz": 1.0, "patlama": 4, "max_kuyruk": 16 },
+    "open_meteo": { "hiz": 8.0, "patlama": 16, "max_kuyruk": 64 },
+    "gemini": { "hiz": 2.0, "patlama": 4, "max_kuyruk": 16 }
+}
+# Skor aşamaları istek başına havuz yerine bu boyutta paylaşılan bir iş parçacığı havuzunda çalışır.
+ASAMA_IS_PARCACIGI = 8
+
+# --- 13. AI YORUMLARI ---
+# Yorumlar arka plan işçilerinde üretilir; /hesapla hemen şablon metinle döner. Skorlar skor_kovasi puanlık,
+# mesafeler mesafe_kovasi_m metrelik kovalara yuvarlanarak parmak izi çıkarılır; benzer konumlar aynı yorumu paylaşır.
+AI_YORUM_AYARLARI = {
+    "isci": 2, "kuyruk_boyutu": 256, "zaman_asimi_sn": 10,
+    "skor_kovasi": 5, "mesafe_kovasi_m": 100, "ttl_saat": 168,
+    "akis_bekleme_sn": 30, "is_saklama_sn": 900
+}
+
+# --- 14. ÖZELLİK ÖZETLERİ ---
+# /hesapla veri toplama çıktısını (mesafeler, adetler, gürültü, rakım) saklar; /yeniden-skorla özel ağırlıklarla
+# bu özeti ağa çıkmadan yeniden skorlar. hucre_boyutu (derece) koordinatla aramada kullanılır.
+OZET_AYARLARI = { "aktif": True, "hucre_boyutu": 0.0005, "ttl_saat": 168 }
+
+# --- 15. GEOMETRİ HIZLANDIRMA ---
+# kose_esigi'nden çok köşeli geometriler (kıyı, orman, sanayi) basitlestirme_m toleransıyla sadeleştirilip OSM
+# kimliğiyle bellekte tutulur; mesafeler en fazla tolerans kadar sapar. basitlestirme_m = 0 kapatır.
+GEOMETRI_AYARLARI = { "basitlestirme_m": 1.0, "kose_esigi": 256, "onbellek_adedi": 20000 }
+# Ayarlıysa deniz_kenari mesafesi coast_grid.py ile üretilen GeoTIFF'ten okunur (grid dışı noktalar geometriyle).
+KIYI_MESAFE_DOSYASI = os.environ.get("KIYI_MESAFE_DOSYASI")
+
+# --- 16. SÜRE BÜTÇESİ ---
+# /hesapla isteğinde butce_ms verilirse ona yetişmeyen aşamalar hücrenin son tam özetinden (bayat) doldurulur
+# ya da eksik işaretlenir. hesaplama_payi_ms OSM indirmesinden sonra bellek içi aşamalara ayrılan süredir.
+SURE_BUTCESI_AYARLARI = { "min_ms": 50, "max_ms": 60000, "hesaplama_payi_ms": 150 }
+
+# --- 17. SÜREÇ HAVUZU ---
+# OSM'e bağlı CPU aşamaları (gürültü, yerleşim, sosyal tesis, vibe) GIL'e takılmasın diye paylaşılan süreç
+# havuzunda çalışır; veri paylaşılan bellekle geçer. isci = 0 kapatır (aşamalar iş parçacıklarında), varsayılan
+# çekirdek sayısı - 1. min_ozellik'ten az kayıtlı veri paketleme maliyetine değmez, iş parçacığında kalır.
+ISLEM_HAVUZU_AYARLARI = { "isci": int(os.environ.get("ISLEM_HAVUZU_ISCI", max(0, (os.cpu_count() or 1) - 1))),
+                          "min_ozellik": 300 }
+
+# --- 18. ÖNBELLEK ISITMA ---
+# /hesapla koordinatları HUCRE_AYARLARI["populerlik"] hücrelerinde yari_omur_saat ile sönümlenen sayaçlarla tutulur
+# (hücre başına en popüler alt_nokta sonuç hücresi). Her aralik_sn'de skoru min_skor üstündeki en popüler hucre_sayisi hücrenin,
+# sonucu TTL'inin yenileme_orani kadarını dolduran noktaları isci eşzamanlı yeniden hesaplanır; upstream kovalarında
+# yedek_jeton'dan az jeton kalınca (canlı trafik) beklenir. ndvi_gun > 0 ve Sentinel Hub kimliği varsa NDVI'si
+# olmayan popüler hücreler son ndvi_gun günün mozaiğiyle doldurulur. aktif = False kaydı ve ısıtmayı kapatır.
+ONBELLEK_ISITMA_AYARLARI = {
+    "aktif": True, "yari_omur_saat": 72, "max_hucre": 5000, "alt_nokta": 4, "hucre_sayisi": 300,
+    "min_skor": 2.0, "yenileme_orani": 0.8, "aralik_sn": 300, "isci": 1, "yedek_jeton": 2, "ndvi_gun": 90
+}
+
+# --- 19. HİYERARŞİK HÜCRELER ---
+# cell_key tamsayı hücre anahtarlarında veri tipi başına seviye: z seviyesinde hücre 180/2^z derece enlem x 360/2^z
+# boylam (z=16 ~305x460m, z=18 ~76x115m @41°K). Eksik hücrede önce en az min_komsu kayıtlı komşunun mesafe ağırlıklı
+# ortalaması, sonra min_seviye'ye kadar ata hücre (ya da altındaki kayıtların ortalaması) kullanılır.
+HUCRE_AYARLARI = {
+    "ndvi": { "seviye": 16, "min_seviye": 13, "min_komsu": 2 },
+    "populerlik": { "seviye": 16 }
+}
+
+# --- 20. YANIT KODLAMA ---
+# JSON yanıtlar min_bayt üstündeyse istemcinin desteğine göre brotli (kuruluysa) ya da gzip ile sıkıştırılır.
+# GET /hesapla yanıtları ETag'le onbellek_sn boyunca tarayıcı / CDN'de tutulur; sonra bayat_sunum_sn boyunca arka
+# planda yeniden doğrulanırken (304) eski kopya sunulabilir.
+YANIT_AYARLARI = { "min_bayt": 1024, "gzip_seviye": 6, "brotli_kalite": 5, "onbellek_sn": 300, "bayat_sunum_sn": 3600 }
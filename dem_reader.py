@@ -0,0 +1,99 @@
+# dem_reader.py
+# (v1.0.0 - Yerel DEM ile Rakım ve Eğim)
+# Yerel bir DEM GeoTIFF'inden (SRTM, Copernicus GLO-30 vb.) blok önbellekli pencere okuma.
+
+import math
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+import projection
+
+METRE_PER_DERECE = 111320
+BLOCK_CACHE_SIZE = 256
+
+_DEM = None
+_LOCK = threading.Lock()
+
+
+class DemReader:
+    def __init__(self, path):
+        import rasterio  # DEM_DOSYASI ayarlı değilse rasterio hiç yüklenmez
+        from rasterio.windows import Window
+        self._window_cls = Window
+        self.ds = rasterio.open(path)
+        self.nodata = self.ds.nodata
+        self.block_h, self.block_w = self.ds.block_shapes[0]
+        self.geographic = self.ds.crs is None or self.ds.crs.is_geographic
+        self.to_dem = None if self.geographic else projection.transformer(projection.WGS84, self.ds.crs.to_string())
+        self._blocks = OrderedDict()
+        self._lock = threading.Lock()  # rasterio veri setleri iş parçacığı güvenli değil
+        print(f"✅ DEM yüklendi: {path} ({self.ds.width}x{self.ds.height}, {self.ds.crs})")
+
+    def _block(self, bi, bj):
+        """(satır, sütun) blok indeksindeki veriyi LRU önbellekten okur."""
+        key = (bi, bj)
+        with self._lock:
+            if key in self._blocks:
+                self._blocks.move_to_end(key)
+                return self._blocks[key]
+            window = self._window_cls(bj * self.block_w, bi * self.block_h, self.block_w, self.block_h)
+            # Tamsayı DEM'ler (int16 SRTM) NaN tutamaz: raster dışı ve nodata hücreleri maskeyle okunup NaN yapılır
+            masked = self.ds.read(1, window=window, boundless=True, masked=True)
+            data = np.ma.filled(masked.astype(np.float32), np.nan)
+            if self.nodata is not None: data[data == self.nodata] = np.nan
+            self._blocks[key] = data
+            while len(self._blocks) > BLOCK_CACHE_SIZE:
+                self._blocks.popitem(last=False)
+            return data
+
+    def _window(self, row0, col0, h, w):
+        """Gerekli blokları birleştirerek (row0, col0) köşeli h x w pencere döndürür."""
+        out = np.full((h, w), np.nan, dtype=np.float32)
+        for bi in range(row0 // self.block_h, (row0 + h - 1) // self.block_h + 1):
+            for bj in range(col0 // self.block_w, (col0 + w - 1) // self.block_w + 1):
+                block = self._block(bi, bj)
+                r0, c0 = bi * self.block_h, bj * self.block_w
+                rs, re = max(row0, r0), min(row0 + h, r0 + self.block_h)
+                cs, ce = max(col0, c0), min(col0 + w, c0 + self.block_w)
+                if rs < re and cs < ce:
+                    out[rs - row0:re - row0, cs - col0:ce - col0] = block[rs - r0:re - r0, cs - c0:ce - c0]
+        return out
+
+    def _pixel_size_m(self, lat):
+        px, py = abs(self.ds.transform.a), abs(self.ds.transform.e)
+        if self.geographic:
+            return px * METRE_PER_DERECE * math.cos(math.radians(lat)), py * METRE_PER_DERECE
+        return px, py
+
+    def slope_at(self, lat, lon, radius_m):
+        """(merkez rakım, eğim %) - eğim, komşuluktaki yüzeye en küçük kareler düzlemi oturtularak bulunur."""
+        x, y = (lon, lat) if self.geographic else self.to_dem.transform(lon, lat)
+        row, col = self.ds.index(x, y)
+        dx, dy = self._pixel_size_m(lat)
+        rx, ry = max(1, int(math.ceil(radius_m / dx))), max(1, int(math.ceil(radius_m / dy)))
+
+        win = self._window(row - ry, col - rx, 2 * ry + 1, 2 * rx + 1)
+        center = win[ry, rx]
+        if np.isnan(center): return None
+
+        yy, xx = np.mgrid[-ry:ry + 1, -rx:rx + 1]
+        xs, ys = xx * dx, -yy * dy
+        inside = (xs ** 2 + ys ** 2 <= radius_m ** 2) & ~np.isnan(win)
+        if inside.sum() < 3: return float(center), 0.0
+
+        A = np.column_stack([xs[inside], ys[inside], np.ones(inside.sum())])
+        (gx, gy, _), *_ = np.linalg.lstsq(A, win[inside].astype(np.float64), rcond=None)
+        return float(center), float(math.hypot(gx, gy) * 100)
+
+
+def get_dem(config):
+    """DEM_DOSYASI ayarlıysa (ilk çağrıda açarak) okuyucuyu döndürür."""
+    global _DEM
+    path = getattr(config, "DEM_DOSYASI", None)
+    if not path: return None
+    with _LOCK:
+        if _DEM is None:
+            _DEM = DemReader(path)
+    return _DEM
@@ -0,0 +1,66 @@
+# geometry_cache.py
+# (v1.0.0 - Sadeleştirilmiş Geometri Önbelleği)
+# Kıyı çizgisi, orman, sanayi alanı, havalimanı gibi binlerce köşeli OSM geometrilerine kesin mesafe
+# her istekte yüzlerce mikrosaniye sürer. Bu geometriler UTM'de toleranslı (Douglas-Peucker) sadeleştirilir,
+# hazırlanır (prepare) ve OSM kimliğiyle süreç içinde saklanır. Sadeleşmiş geometriye mesafe kesin
+# mesafeden en fazla tolerans kadar sapar (Hausdorff sınırı).
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import shapely
+
+import metrics
+
+_cache = OrderedDict()  # (element, osm_id, crs, köşe_sayısı, tolerans) -> sadeleşmiş geometri
+_lock = threading.Lock()
+
+
+def _keys(gdf, positions, counts, tolerance):
+    """OSM (element, id) kimliği olan tablolarda önbellek anahtarları, yoksa None."""
+    if gdf.index.nlevels != 2: return None
+    crs = gdf.crs.srs if gdf.crs is not None else ""
+    # Köşe sayısı anahtara girer: OSM'de değişen geometri yeni kayıt olarak sadeleştirilir
+    return [(element, osm_id, crs, int(n), tolerance)
+            for (element, osm_id), n in zip(gdf.index[positions], counts[positions])]
+
+
+def _store(items, capacity):
+    with _lock:
+        for key, geom in items:
+            _cache[key] = geom
+        while len(_cache) > capacity:
+            _cache.popitem(last=False)
+
+
+def simplified(gdf, geoms, settings):
+    """İndekslenecek geometri dizisi: kose_esigi'ni aşanlar sadeleştirilmiş, diğerleri (ve ayar kapalıysa tümü) aynen."""
+    if not settings or not settings.get("basitlestirme_m") or not len(geoms): return geoms
+    tolerance = float(settings["basitlestirme_m"])
+    counts = shapely.get_num_coordinates(geoms)
+    big = np.flatnonzero(counts > settings["kose_esigi"])
+    if not len(big): return geoms
+
+    out = geoms.copy()
+    keys = _keys(gdf, big, counts, tolerance)
+    missing = big
+    if keys is not None:
+        with _lock:
+            hits = [_cache.get(k) for k in keys]
+            for k, g in zip(keys, hits):
+                if g is not None: _cache.move_to_end(k)
+        found = np.array([g is not None for g in hits])
+        out[big[found]] = [g for g in hits if g is not None]
+        missing = big[~found]
+        metrics.inc("geometri_onbellek_toplam", int(found.sum()), durum="isabet")
+        metrics.inc("geometri_onbellek_toplam", len(missing), durum="iskalama")
+
+    if len(missing):
+        fresh = shapely.simplify(geoms[missing], tolerance, preserve_topology=True)
+        shapely.prepare(fresh)
+        out[missing] = fresh
+        if keys is not None:
+            key_of = dict(zip(big.tolist(), keys))
+            _store([(key_of[i], g) for i, g in zip(missing.tolist(), fresh)], settings["onbellek_adedi"])
+    return out
@@ -0,0 +1,182 @@
+# heatmap.py
+# (v1.0.0 - Şehir Ölçeğinde Skor Isı Haritası)
+# Bir kutuyu UTM pikselleri halinde ızgaralar; her POI kategorisi için mesafe ve yoğunluk alanlarını
+# STRtree üzerinden tüm piksellere vektörel olarak hesaplar ve config ağırlıklarıyla skor gridleri üretir.
+# deniz_kenari, skorlayıcıdaki gibi KIYI_MESAFE_DOSYASI gridi varsa ondan okunur. Fark: NDVI hücresi boşsa komşu
+# ortalaması pikselin kendisine göre değil hücre merkezine göre ağırlıklanır; o piksellerde /hesapla'dan ufak sapabilir.
+
+import math
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import shapely
+
+import cache_manager
+import cell_key
+import coast_grid
+import local_extract
+import noise_engine
+import osm_fetcher
+import projection
+import result_cache
+import spatial_index
+from scorer import normalize_linear_array, normalize_plateau_array
+
+BANDS = ("genel", "yesil_sosyal", "yerlesim", "gurultu")
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _pixel_grid(bbox, crs_utm, resolution):
+    """UTM piksel merkezleri (shapely noktaları) ve raster geotransform'u."""
+    from rasterio.transform import from_origin
+    minx, miny, maxx, maxy = projection.transformer(projection.WGS84, crs_utm).transform_bounds(*bbox)
+    width = max(1, int(math.ceil((maxx - minx) / resolution)))
+    height = max(1, int(math.ceil((maxy - miny) / resolution)))
+    xs = minx + (np.arange(width) + 0.5) * resolution
+    ys = maxy - (np.arange(height) + 0.5) * resolution
+    xx, yy = np.meshgrid(xs, ys)
+    return xx.ravel(), yy.ravel(), (height, width), from_origin(minx, maxy, resolution, resolution)
+
+
+def _ndvi_field(lats, lons, config):
+    """Piksel başına NDVI; hücreler tek toplu sorguyla okunur, eksik hücreler komşu / ata hücreye düşer."""
+    cfg = config.YESIL_SOSYAL_AYARLARI["NDVI"]
+    cells_cfg = config.HUCRE_AYARLARI["ndvi"]
+    keys, inv = np.unique(cell_key.cell_ids(lats, lons, cells_cfg["seviye"]), return_inverse=True)
+    found = cache_manager.get_cell_values([int(c) for c in keys], "ndvi")
+    values = np.empty(len(keys))
+    for i, c in enumerate(keys):
+        v = found.get(int(c))
+        if v is None: v = cache_manager.lookup_cell(*cell_key.center(int(c)), "ndvi", cells_cfg)[0]
+        values[i] = cfg["varsayilan"] if v is None else v
+    ndvi = values[inv.ravel()]
+    return normalize_linear_array(ndvi, cfg["min_esik"], cfg["max_esik"])
+
+
+def _settlement_field(index, points, config):
+    cfg = config.YERLESIM_AYARLARI
+    score = np.zeros(len(points))
+    weight = 0
+    for name, settings in cfg["etiketler"].items():
+        search = osm_fetcher.poi_search_radius(settings["max_limit"])
+        d = index.nearest_distances(points, settings["osm_tags"], search)
+        w = cfg["agirliklar"].get(name, 0)
+        score += normalize_plateau_array(d, settings["ideal_limit"], settings["max_limit"]) * w
+        weight += w
+    return score / weight if weight > 0 else score
+
+
+def _coast_from_grid(d, c, lats, lons, max_r, search, config):
+    """QualityScorer._coast_from_grid kuralları piksel dizilerine: grid içindeki piksellerde mesafe ve sayı gridden,
+    grid dışındakiler (ya da grid üst sınırı arama yarıçapından kısaysa sınırdakiler) geometri sonucunda kalır."""
+    grid = coast_grid.get_grid(config)
+    if grid is None: return d, c
+    g = grid.distances_at(lats, lons)
+    use = ~np.isnan(g)
+    if grid.max_distance < search: use &= g < grid.max_distance
+    empty = (g >= grid.max_distance) | (g > search)
+    d = np.where(use, np.where(empty, np.inf, g), d)
+    c = np.where(use, (~empty & (g <= max_r)).astype(int), c)
+    return d, c
+
+
+def _green_social_field(index, points, lats, lons, s_ndvi, config):
+    cfg = config.YESIL_SOSYAL_AYARLARI["POZITIF_ETKENLER"]
+    w_yakin = cfg.get("yakinlik_agirligi", 0.7)
+    w_yogun = cfg.get("yogunluk_agirligi", 0.3)
+    s_poi = np.zeros(len(points))
+    w_poi = np.zeros(len(points))
+    for name, settings in cfg["etiketler"].items():
+        max_r = settings.get("max_mesafe", 1000)
+        d = index.nearest_distances(points, settings["osm_tags"], osm_fetcher.poi_search_radius(max_r))
+        c = index.counts_within(points, settings["osm_tags"], max_r)
+        if name == "deniz_kenari":
+            d, c = _coast_from_grid(d, c, lats, lons, max_r, osm_fetcher.poi_search_radius(max_r), config)
+        found = np.isfinite(d)
+
+        p_yakin = normalize_linear_array(d, 0, max_r, True)
+        p_yogun = np.minimum(100, c / settings.get("yogunluk_hedefi", 1) * 100)
+        final = np.where(found, p_yakin * w_yakin + p_yogun * w_yogun, 0.0)
+
+        w = settings.get("agirlik", 1)
+        # Skorlayıcıdaki gibi: deniz bulunamayan noktada deniz ağırlığı hesaba katılmaz
+        w_arr = np.where(found, w, 0) if name == "deniz_kenari" else np.full(len(points), w)
+        s_poi += final * w_arr
+        w_poi += w_arr
+
+    final_poi = np.divide(s_poi, w_poi, out=np.zeros(len(points)), where=w_poi > 0)
+    w_ndvi = config.YESIL_SOSYAL_AYARLARI["NDVI"]["agirlik"]
+    return s_ndvi * w_ndvi + final_poi * cfg["agirlik"]
+
+
+def _noise_field(index, features, points, config):
+    cfg = config.GURULTU_AYARLARI
+    max_dist = cfg["max_etki_mesafesi"]
+    if features.empty: return np.full(len(points), 100.0)
+    weights, _, _ = noise_engine.noise_weights(features, cfg)
+    pi, pos, d = index.pairs_within(points, osm_fetcher.noise_tags(cfg), max_dist)
+    total = np.bincount(pi, weights=weights[pos] * (1 - d / max_dist), minlength=len(points))
+    return normalize_linear_array(total, cfg["min_esik"], cfg["max_esik"], ters=True)
+
+
+def score_grids(bbox, config, resolution):
+    """bbox (min_lon, min_lat, max_lon, max_lat) için {bant: (H, W) dizisi}, transform ve CRS."""
+    clat, clon = (bbox[1] + bbox[3]) / 2, (bbox[0] + bbox[2]) / 2
+    crs_utm = projection.utm_crs(clat, clon)
+    xs, ys, shape, transform = _pixel_grid(bbox, crs_utm, resolution)
+    if xs.size > config.ISI_HARITASI_AYARLARI["max_piksel"]:
+        raise ValueError(f"Çok fazla piksel ({xs.size}); kutuyu küçültün veya çözünürlüğü düşürün")
+    print(f"🗺️  Isı haritası: {shape[1]}x{shape[0]} piksel, {resolution}m")
+
+    half_diag = math.hypot((bbox[2] - bbox[0]) * 111320 * math.cos(math.radians(clat)), (bbox[3] - bbox[1]) * 111320) / 2
+    features = osm_fetcher.fetch_features((clat, clon), osm_fetcher.build_union_tags(config),
+                                          osm_fetcher.max_search_radius(config) + half_diag, crs_utm,
+                                          getattr(config, "OSM_KARO_AYARLARI", None), local_extract.get_store(config))
+    index = spatial_index.FeatureIndex(features, getattr(config, "GEOMETRI_AYARLARI", None))
+    points = shapely.points(xs, ys)
+    lons, lats = projection.transformer(crs_utm, projection.WGS84).transform(xs, ys)
+
+    s_ndvi = _ndvi_field(lats, lons, config)
+    s_sosyal = _green_social_field(index, points, lats, lons, s_ndvi, config)
+    s_yerlesim = _settlement_field(index, points, config)
+    s_gurultu = _noise_field(index, features, points, config)
+
+    w = config.FINAL_AGIRLIKLAR
+    genel = s_sosyal * w["yesil_sosyal"] + s_yerlesim * w["yerlesim"] + s_gurultu * w["gurultu"]
+    grids = {"genel": genel, "yesil_sosyal": s_sosyal, "yerlesim": s_yerlesim, "gurultu": s_gurultu}
+    return {k: v.reshape(shape).astype(np.float32) for k, v in grids.items()}, transform, crs_utm
+
+
+def render_geotiff(bbox, config, resolution=None):
+    """Skor gridlerini çok bantlı GeoTIFF baytları olarak döndürür (sonuçlar bellekte önbelleklenir).
+    OSM verisi alınamazsa osm_fetcher.FetchError yükselir; boş veriden üretilmiş grid önbelleğe girmez."""
+    import rasterio
+    from rasterio.io import MemoryFile
+    settings = config.ISI_HARITASI_AYARLARI
+    if resolution is None: resolution = settings["cozunurluk_m"]
+    if resolution < settings["min_cozunurluk_m"]:
+        raise ValueError(f"Çözünürlük en az {settings['min_cozunurluk_m']} m olmalı")
+    key = (tuple(round(v, 6) for v in bbox), resolution, result_cache.config_fingerprint(config))
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+
+    grids, transform, crs_utm = score_grids(bbox, config, resolution)
+    height, width = grids["genel"].shape
+    with MemoryFile() as mem:
+        with mem.open(driver="GTiff", width=width, height=height, count=len(BANDS), dtype="float32",
+                      crs=rasterio.crs.CRS.from_user_input(crs_utm), transform=transform, compress="deflate") as dst:
+            for i, name in enumerate(BANDS, start=1):
+                dst.write(grids[name], i)
+                dst.set_band_description(i, name)
+        data = mem.read()
+
+    with _cache_lock:
+        _cache[key] = data
+        while len(_cache) > settings["onbellek_adedi"]:
+            _cache.popitem(last=False)
+    return data
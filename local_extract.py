@@ -0,0 +1,114 @@
+# local_extract.py
+# (v1.0.0 - Yerel Bölgesel OSM Verisi)
+# Overpass yerine başlangıçta yüklenen bölgesel bir OSM özütünden bellek içi sorgu.
+#
+# Özüt hazırlama (bir kez):
+#   python local_extract.py turkiye-latest.osm.pbf turkiye.parquet
+# Desteklenen girdiler: .parquet/.geoparquet (pyarrow), .gpkg ve diğer OGR formatları,
+# .osm/.xml (osmnx), .osm.pbf (pyrosm).
+
+import json
+import sys
+import threading
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+from shapely import STRtree, box
+
+import osm_fetcher
+import tile_cache
+import upstream
+
+_STORE = None
+_LOCK = threading.Lock()
+
+
+def _read(path, tags):
+    lower = path.lower()
+    if lower.endswith((".parquet", ".geoparquet")):
+        gdf = gpd.read_parquet(path)
+    elif lower.endswith(".pbf"):
+        try:
+            from pyrosm import OSM
+        except ImportError:
+            raise RuntimeError(".osm.pbf okumak için 'pyrosm' kurulmalı (veya önceden GeoParquet'e çevrilmeli).")
+        gdf = OSM(path).get_data_by_custom_criteria(custom_filter=tags, filter_type="keep",
+                                                    keep_nodes=True, keep_ways=True, keep_relations=True)
+        gdf = gdf.rename(columns={"osm_type": "element"})
+    elif lower.endswith((".osm", ".xml")):
+        gdf = upstream.osmnx().features.features_from_xml(path, tags=tags)
+    else:
+        gdf = gpd.read_file(path)
+
+    if "element" in gdf.columns and "id" in gdf.columns:
+        gdf = gdf.set_index(["element", "id"])
+    return gdf.to_crs("EPSG:4326") if gdf.crs else gdf.set_crs("EPSG:4326")
+
+
+class LocalExtract:
+    def __init__(self, gdf, tags):
+        """Sadece ihtiyaç duyulan sütunları (isim/marka + etiketler) kategorik diziler olarak tutar ve STRtree kurar."""
+        gdf = osm_fetcher.clean_osm_data(gdf)
+        gdf = gdf[osm_fetcher.tag_mask(gdf, tags)]
+        keep = [c for c in ["name", "brand", *tags.keys()] if c in gdf.columns]
+        data = {c: gdf[c].astype("category") for c in keep}
+        self.gdf = gpd.GeoDataFrame(data, geometry=gdf.geometry.values, index=gdf.index, crs="EPSG:4326")
+        self.tree = STRtree(np.asarray(self.gdf.geometry.values, dtype=object))
+        self._masks = {}  # etiket filtresi -> tüm özüt üzerinde satır maskesi
+        print(f"✅ Yerel OSM özütü yüklendi: {len(self.gdf)} kayıt")
+
+    def features_around(self, point, tags, dist):
+        """features_from_point eşdeğeri, tamamen bellekten. Sütunlar kategorik kalır (slim ve tag_mask bunları
+        doğrudan işler); tek bir iloc seçimi dışında kopya yapılmaz."""
+        lat, lon = point
+        idx = np.sort(self.tree.query(box(*tile_cache.query_bbox(lat, lon, dist))))
+        idx = idx[self._mask(tags)[idx]]
+        if not len(idx):
+            raise osm_fetcher.NoFeatures("Yerel özütte özellik bulunamadı")
+        return self.gdf.iloc[idx]
+
+    def _mask(self, tags):
+        key = json.dumps(tags, sort_keys=True)
+        mask = self._masks.get(key)
+        if mask is None:
+            mask = self._masks[key] = osm_fetcher.tag_mask(self.gdf, tags).to_numpy()
+        return mask
+
+
+def load(path, tags):
+    global _STORE
+    print(f"📦 Yerel OSM özütü okunuyor: {path}")
+    _STORE = LocalExtract(_read(path, tags), tags)
+    return _STORE
+
+
+def get_store(config):
+    """Yapılandırma yerel kaynak istiyorsa (ilk çağrıda yükleyerek) özütü döndürür."""
+    if getattr(config, "VERI_KAYNAGI", "overpass") != "yerel": return None
+    with _LOCK:
+        if _STORE is None:
+            if not config.YEREL_OSM_DOSYASI:
+                raise RuntimeError("VERI_KAYNAGI='yerel' için YEREL_OSM_DOSYASI ayarlanmalı.")
+            load(config.YEREL_OSM_DOSYASI, osm_fetcher.build_union_tags(config))
+    return _STORE
+
+
+def build_extract(src, dst, config):
+    """Ham bölge dosyasından sadece gerekli etiketleri içeren kompakt bir özüt yazar."""
+    tags = osm_fetcher.build_union_tags(config)
+    gdf = LocalExtract(_read(src, tags), tags).gdf.reset_index()
+    gdf = gdf.astype({c: object for c in gdf.columns if isinstance(gdf[c].dtype, pd.CategoricalDtype)})
+    if dst.lower().endswith((".parquet", ".geoparquet")):
+        gdf.to_parquet(dst)
+    else:
+        gdf.to_file(dst)
+    print(f"✅ Özüt yazıldı: {dst} ({len(gdf)} kayıt)")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Kullanım: python local_extract.py <girdi.osm.pbf|.osm|.gpkg> <cikti.parquet|.gpkg>")
+        sys.exit(1)
+    import config
+    build_extract(sys.argv[1], sys.argv[2], config)
@@ -0,0 +1,196 @@
+# metrics.py
+# (v1.0.0 - Aşama Süreleri ve Prometheus Metrikleri)
+# Süreç içi histogram/sayaç kaydı, /metrics için Prometheus metin çıktısı ve
+# istek başına (contextvar) aşama profili. Harici bağımlılık yok.
+
+import contextvars
+import functools
+import inspect
+import threading
+import time
+from contextlib import contextmanager
+
+import cache_manager
+
+PREFIX = "yasam_skoru_"
+SURE_KOVALARI = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+ADET_KOVALARI = (0, 10, 50, 100, 500, 1000, 5000, 10000, 50000)
+BAYT_KOVALARI = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+TANIMLAR = {
+    "asama_suresi_saniye": ("histogram", "get_final_score aşama süreleri", SURE_KOVALARI),
+    "asama_hata_toplam": ("counter", "Hata ile biten aşamalar", None),
+    "upstream_suresi_saniye": ("histogram", "Upstream çağrı süreleri", SURE_KOVALARI),
+    "upstream_hata_toplam": ("counter", "Upstream hata / zaman aşımı sayıları", None),
+    "upstream_yanit_bayt": ("histogram", "Upstream yanıt boyutları", BAYT_KOVALARI),
+    "ozellik_sayisi": ("histogram", "Çekilen / kategoride bulunan OSM özellik sayısı", ADET_KOVALARI),
+    "osm_karo_toplam": ("counter", "OSM karo önbelleği isabet / ıskalama", None),
+    "istek_suresi_saniye": ("histogram", "HTTP uç noktası toplam süreleri", SURE_KOVALARI),
+    "geometri_onbellek_toplam": ("counter", "Sadeleştirilmiş geometri önbelleği isabet / ıskalama", None),
+    "kismi_asama_toplam": ("counter", "Süre bütçesi aşımı / hata ile bayat özetten dolan ya da eksik kalan aşamalar", None),
+    "onbellek_isitma_toplam": ("counter", "Önbellek ısıtıcısının noktaları (isitildi / guncel / hata)", None),
+    "ai_yorum_toplam": ("counter", "AI yorumu kaynağı (onbellek / ai / sablon / kuyruk_dolu)", None),
+}
+
+_lock = threading.Lock()
+_histograms = {}  # (ad, etiketler) -> [kova sayıları, toplam, adet]
+_counters = {}  # (ad, etiketler) -> değer
+_profile = contextvars.ContextVar("profil", default=None)
+
+ZAMAN_ASIMI_TURLERI = ("Timeout", "TimeoutError", "TimeoutException", "ReadTimeout", "ConnectTimeout")
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def observe(name, value, **labels):
+    buckets = TANIMLAR[name][2]
+    with _lock:
+        h = _histograms.get(_key(name, labels))
+        if h is None:
+            h = _histograms[_key(name, labels)] = [[0] * len(buckets), 0.0, 0]
+        for i, b in enumerate(buckets):
+            if value <= b: h[0][i] += 1
+        h[1] += value
+        h[2] += 1
+
+
+def inc(name, value=1, **labels):
+    with _lock:
+        k = _key(name, labels)
+        _counters[k] = _counters.get(k, 0) + value
+
+
+def error_kind(exc):
+    return "zaman_asimi" if type(exc).__name__ in ZAMAN_ASIMI_TURLERI or isinstance(exc, TimeoutError) else "hata"
+
+
+# --- İstek profili ---
+
+def start_profile():
+    """Geçerli bağlamda (istek) yeni bir profil başlatır ve sözlüğü döndürür."""
+    profile = {}
+    _profile.set(profile)
+    return profile
+
+
+def _record(key, seconds):
+    profile = _profile.get()
+    if profile is not None:
+        profile[key] = round(profile.get(key, 0) + seconds * 1000, 1)
+
+
+def replay(profile):
+    """Başka süreçte (süreç havuzu işçisi) ölçülen aşama sürelerini bu sürecin kayıtlarına ve profiline ekler."""
+    for stage, ms in profile.items():
+        observe("asama_suresi_saniye", ms / 1000, asama=stage)
+        _record(stage, ms / 1000)
+
+
+def bind(fn, *args):
+    """İş parçacığı havuzuna gönderilecek çağrıyı geçerli bağlamla (profil) sarar."""
+    return functools.partial(contextvars.copy_context().run, fn, *args)
+
+
+# --- Zamanlayıcılar ---
+
+@contextmanager
+def stage_timer(stage):
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        inc("asama_hata_toplam", asama=stage)
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        observe("asama_suresi_saniye", elapsed, asama=stage)
+        _record(stage, elapsed)
+
+
+def stage(name):
+    """Metodu aşama süresi ölçümüyle saran dekoratör (sync ve async)."""
+    def wrap(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def run_async(*args, **kwargs):
+                with stage_timer(name):
+                    return await fn(*args, **kwargs)
+            return run_async
+
+        @functools.wraps(fn)
+        def run(*args, **kwargs):
+            with stage_timer(name):
+                return fn(*args, **kwargs)
+        return run
+    return wrap
+
+
+@contextmanager
+def upstream_timer(upstream, **labels):
+    """Upstream çağrısını süre + hata türüyle kaydeder; hatayı yeniden yükseltir."""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        inc("upstream_hata_toplam", upstream=upstream, tur=error_kind(e), **labels)
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        observe("upstream_suresi_saniye", elapsed, upstream=upstream, **labels)
+        _record(f"upstream.{upstream}", elapsed)
+
+
+def record_response(upstream, response):
+    """HTTP yanıtının boyutunu ve 200 dışı durumları kaydeder."""
+    observe("upstream_yanit_bayt", len(response.content), upstream=upstream)
+    if response.status_code != 200:
+        inc("upstream_hata_toplam", upstream=upstream, tur=f"http_{response.status_code}")
+
+
+# --- Prometheus çıktısı ---
+
+def _labels(labels, extra=()):
+    items = list(labels) + list(extra)
+    if not items: return ""
+    return "{" + ",".join(f'{k}="{str(v).replace(chr(34), "")}"' for k, v in items) + "}"
+
+
+def render():
+    """Prometheus metin formatı (0.0.4)."""
+    with _lock:
+        histograms = {k: (list(v[0]), v[1], v[2]) for k, v in _histograms.items()}
+        counters = dict(_counters)
+
+    lines = []
+    for name, (kind, help_text, buckets) in TANIMLAR.items():
+        full = PREFIX + name
+        series = sorted((k[1], v) for k, v in (histograms if kind == "histogram" else counters).items()
+                        if k[0] == name)
+        if not series: continue
+        lines.append(f"# HELP {full} {help_text}")
+        lines.append(f"# TYPE {full} {kind}")
+        for labels, value in series:
+            if kind == "counter":
+                lines.append(f"{full}{_labels(labels)} {value}")
+                continue
+            counts, total, count = value
+            for b, c in zip(buckets, counts):
+                lines.append(f"{full}_bucket{_labels(labels, [('le', b)])} {c}")
+            lines.append(f"{full}_bucket{_labels(labels, [('le', '+Inf')])} {count}")
+            lines.append(f"{full}_sum{_labels(labels)} {round(total, 6)}")
+            lines.append(f"{full}_count{_labels(labels)} {count}")
+
+    cache = cache_manager.stats()
+    if cache:
+        lines.append(f"# HELP {PREFIX}onbellek_toplam Anahtar-değer önbelleği isabet / ıskalama sayıları")
+        lines.append(f"# TYPE {PREFIX}onbellek_toplam counter")
+        for data_type, s in sorted(cache.items()):
+            for field in ("bellek_isabet", "disk_isabet", "iskalama"):
+                lines.append(f'{PREFIX}onbellek_toplam{{veri_tipi="{data_type}",sonuc="{field}"}} {s[field]}')
+        lines.append(f"# HELP {PREFIX}onbellek_isabet_orani Veri tipi başına isabet oranı")
+        lines.append(f"# TYPE {PREFIX}onbellek_isabet_orani gauge")
+        for data_type, s in sorted(cache.items()):
+            lines.append(f'{PREFIX}onbellek_isabet_orani{{veri_tipi="{data_type}"}} {s["isabet_orani"]}')
+    return "\n".join(lines) + "\n"
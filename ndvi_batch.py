@@ -0,0 +1,160 @@
+# ndvi_batch.py
+# (v1.0.0 - Toplu NDVI Hesabı)
+# Kırmızı/NIR bant rasterlarından bir şehir kutusu için NDVI hesaplar, cell_key hücrelerine
+# (HUCRE_AYARLARI["ndvi"] seviyesi) ortalar ve sonucu önbelleğe toplu yükler. İstek anında NDVI tek bir indeksli okumadır.
+#
+# Kullanım:
+#   python ndvi_batch.py --bbox 28.6,40.8,29.4,41.3 --red B04.tif --nir B08.tif
+#   python ndvi_batch.py --bbox 28.6,40.8,29.4,41.3 --sentinel --baslangic 2024-06-01 --bitis 2024-08-31
+
+import argparse
+import math
+import os
+
+import numpy as np
+import rasterio
+from pyproj import Transformer
+from rasterio.windows import from_bounds
+
+import cache_manager
+import cell_key
+
+MIN_VALID_PIXELS = 10
+
+EVALSCRIPT = """
+//VERSION=3
+function setup() {
+  return { input: ["B04", "B08", "dataMask"], output: { bands: 2, sampleType: "FLOAT32" } };
+}
+function evaluatePixel(s) {
+  if (s.dataMask == 0) return [NaN, NaN];
+  return [s.B04, s.B08];
+}
+"""
+
+
+def fetch_sentinel_bands(bbox, config, out_dir, start, end):
+    """Sentinel Hub'dan bulutsuz mozaik B04/B08 bantlarını GeoTIFF olarak indirir."""
+    from sentinelhub import (BBox, CRS, DataCollection, MimeType, MosaickingOrder, SentinelHubRequest,
+                             SHConfig, bbox_to_dimensions)
+
+    sh_config = SHConfig()
+    if config.CLIENT_ID and config.CLIENT_SECRET:
+        sh_config.sh_client_id = config.CLIENT_ID
+        sh_config.sh_client_secret = config.CLIENT_SECRET
+
+    sh_bbox = BBox(bbox=bbox, crs=CRS.WGS84)
+    # Sentinel Hub tek istekte en fazla 2500 piksel; hücreler ~500m olduğu için 10-20m çözünürlük yeterli
+    extent_m = max(bbox[2] - bbox[0], bbox[3] - bbox[1]) * 111320
+    resolution = max(10, math.ceil(extent_m / 2500))
+    size = bbox_to_dimensions(sh_bbox, resolution=resolution)
+
+    request = SentinelHubRequest(
+        evalscript=EVALSCRIPT,
+        input_data=[SentinelHubRequest.input_data(
+            data_collection=DataCollection.SENTINEL2_L2A, time_interval=(start, end),
+            mosaicking_order=MosaickingOrder.LEAST_CC)],
+        responses=[SentinelHubRequest.output_response("default", MimeType.TIFF)],
+        bbox=sh_bbox, size=size, config=sh_config,
+    )
+    data = request.get_data()[0]
+
+    transform = rasterio.transform.from_bounds(*bbox, width=size[0], height=size[1])
+    paths = []
+    for band, name in ((0, "B04.tif"), (1, "B08.tif")):
+        path = os.path.join(out_dir, name)
+        with rasterio.open(path, "w", driver="GTiff", width=size[0], height=size[1], count=1, dtype="float32",
+                           crs="EPSG:4326", transform=transform, nodata=np.nan, tiled=True) as dst:
+            dst.write(data[:, :, band].astype(np.float32), 1)
+        paths.append(path)
+    print(f"✅ Sentinel-2 bantları indirildi ({size[0]}x{size[1]}, {resolution}m)")
+    return paths
+
+
+def _pixel_lonlat(ds, window, to_wgs84):
+    rows, cols = np.mgrid[0:int(window.height), 0:int(window.width)]
+    rows = rows + int(window.row_off) + 0.5
+    cols = cols + int(window.col_off) + 0.5
+    xs, ys = ds.transform * (cols, rows)
+    if to_wgs84 is not None: xs, ys = to_wgs84.transform(xs, ys)
+    return np.asarray(xs), np.asarray(ys)
+
+
+def compute_cell_ndvi(red_path, nir_path, bbox, level):
+    """Kutu içindeki NDVI'yi vektörel hesaplar; {hücre anahtarı: ortalama} döndürür."""
+    sums, counts = {}, {}
+    with rasterio.open(red_path) as red, rasterio.open(nir_path) as nir:
+        if red.shape != nir.shape or red.transform != nir.transform:
+            raise ValueError("Kırmızı ve NIR rasterları aynı grid üzerinde olmalı")
+        geographic = red.crs is None or red.crs.is_geographic
+        to_wgs84 = None if geographic else Transformer.from_crs(red.crs, "EPSG:4326", always_xy=True)
+        bounds = bbox
+        if not geographic:
+            bounds = Transformer.from_crs("EPSG:4326", red.crs, always_xy=True).transform_bounds(*bbox)
+        area = from_bounds(*bounds, transform=red.transform).round_offsets().round_lengths()
+        try:
+            area = area.intersection(rasterio.windows.Window(0, 0, red.width, red.height))
+        except rasterio.errors.WindowError:
+            print("⚠️  Kutu rasterın dışında; NDVI hesaplanacak piksel yok.")
+            return {}
+
+        # Blok blok işleyerek bellek kullanımını sınırla
+        for _, block in red.block_windows(1):
+            try:
+                win = block.intersection(area)
+            except rasterio.errors.WindowError:
+                continue
+            r = red.read(1, window=win).astype(np.float32)
+            n = nir.read(1, window=win).astype(np.float32)
+            if red.nodata is not None: r[r == red.nodata] = np.nan
+            if nir.nodata is not None: n[n == nir.nodata] = np.nan
+            with np.errstate(divide="ignore", invalid="ignore"):
+                ndvi = (n - r) / (n + r)
+            valid = np.isfinite(ndvi)
+            if not valid.any(): continue
+
+            lons, lats = _pixel_lonlat(red, win, to_wgs84)
+            cells = cell_key.cell_ids(lats[valid], lons[valid], level)
+            keys, inv = np.unique(cells, return_inverse=True)
+            block_sums = np.bincount(inv.ravel(), weights=ndvi[valid])
+            block_counts = np.bincount(inv.ravel())
+            for kc, s, c in zip(keys, block_sums, block_counts):
+                k = int(kc)
+                sums[k] = sums.get(k, 0.0) + s
+                counts[k] = counts.get(k, 0) + c
+
+    return {k: sums[k] / counts[k] for k in sums if counts[k] >= MIN_VALID_PIXELS}
+
+
+def load_into_cache(cells):
+    items = [(cell, "ndvi", round(float(v), 4)) for cell, v in cells.items()]
+    cache_manager.set_cells(items)
+    cache_manager.flush()
+    print(f"✅ {len(items)} NDVI hücresi önbelleğe yüklendi.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Şehir kutusu için NDVI hücre gridini hesaplar ve önbelleğe yükler.")
+    parser.add_argument("--bbox", required=True, help="min_lon,min_lat,max_lon,max_lat")
+    parser.add_argument("--red", help="Kırmızı bant (B04) GeoTIFF")
+    parser.add_argument("--nir", help="Yakın kızılötesi bant (B08) GeoTIFF")
+    parser.add_argument("--sentinel", action="store_true", help="Bantları Sentinel Hub'dan indir")
+    parser.add_argument("--baslangic", default="2024-06-01")
+    parser.add_argument("--bitis", default="2024-08-31")
+    parser.add_argument("--klasor", default=".", help="İndirilen bantların yazılacağı klasör")
+    args = parser.parse_args()
+
+    import config
+    bbox = tuple(float(x) for x in args.bbox.split(","))
+    if args.sentinel:
+        red_path, nir_path = fetch_sentinel_bands(bbox, config, args.klasor, args.baslangic, args.bitis)
+    elif args.red and args.nir:
+        red_path, nir_path = args.red, args.nir
+    else:
+        parser.error("--red ve --nir ya da --sentinel verilmeli")
+
+    load_into_cache(compute_cell_ndvi(red_path, nir_path, bbox, config.HUCRE_AYARLARI["ndvi"]["seviye"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+# noise_engine.py
+# (v1.0.0 - Vektörel Gürültü Motoru)
+
+import numpy as np
+import pandas as pd
+
+
+def noise_weights(pois, cfg):
+    """Her kayıt için gürültü ağırlığı ve etiketi (ETKENLER sırasıyla ilk eşleşen anahtar kazanır)."""
+    n = len(pois)
+    weights = np.zeros(n)
+    labels = np.full(n, None, dtype=object)
+    matched = np.zeros(n, dtype=bool)
+
+    for key, table in cfg["ETKENLER"].items():
+        if key not in pois.columns: continue
+        col = pois[key]
+        w = _mapped_weights(col, table)
+        hit = ~matched & ~np.isnan(w)
+        weights[hit] = w[hit]
+        labels[hit] = col.to_numpy(dtype=object)[hit]
+        matched |= hit
+
+    # Park/orman/su gibi sönümleyiciler negatif katkı yapar
+    damped = np.zeros(n, dtype=bool)
+    if cfg.get("sonumleyici_aktif", True):
+        for tag, value in cfg["SONUMLEYICILER"].items():
+            tk, tv = tag.split('=')
+            if tk not in pois.columns: continue
+            hit = ~matched & ~damped & (pois[tk].to_numpy(dtype=object) == tv)
+            weights[hit] = value
+            damped |= hit
+    return weights, labels, matched
+
+
+def _mapped_weights(col, table):
+    """Sütun değerlerinin tablo ağırlıkları (eşleşmeyen NaN). Kategorik sütunda eşleme kategori başına bir kez yapılır."""
+    if isinstance(col.dtype, pd.CategoricalDtype):
+        per_category = np.append(col.cat.categories.map(table).to_numpy(dtype=float, na_value=np.nan), np.nan)
+        return per_category[col.cat.codes.to_numpy()]
+    return col.map(table).to_numpy(dtype=float, na_value=np.nan)
+
+
+def noise_total(weights, dists, max_dist):
+    """Doğrusal mesafe sönümlemesiyle toplam gürültü yükü."""
+    decay = np.where(dists <= max_dist, 1 - dists / max_dist, 0.0)
+    return float(np.dot(weights, decay))
+
+
+def closest_source(labels, matched, dists):
+    """En yakın gürültü kaynağı etiketi, ör. 'primary (45m)'."""
+    if not matched.any(): return None
+    masked = np.where(matched, dists, np.inf)
+    i = int(np.argmin(masked))
+    return f"{labels[i]} ({int(dists[i])}m)"
@@ -0,0 +1,187 @@
+# osm_fetcher.py
+# (v1.0.0 - Tek Sorguda OSM Verisi)
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import metrics
+import tile_cache
+import upstream
+
+
+_shared = {}
+
+# Etiket sütunları dışında okunan tek sütunlar (isim gösterimi); disused/abandoned yalnızca temizlikte kullanılır
+NAME_COLUMNS = ("name", "brand")
+INACTIVE_COLUMNS = ("disused", "abandoned")
+
+
+def _merge_tags(target, tags):
+    for key, values in tags.items():
+        if values is True:
+            target[key] = True
+            continue
+        if target.get(key) is True: continue
+        if isinstance(values, str): values = [values]
+        bucket = target.setdefault(key, [])
+        for v in values:
+            if v not in bucket: bucket.append(v)
+
+
+def noise_tags(cfg):
+    """Gürültü etkenleri ve sönümleyicilerin OSM etiketleri."""
+    return shared("noise_tags", cfg, _build_noise_tags)
+
+
+def _build_noise_tags(cfg):
+    tags = {}
+    for k, v in cfg["ETKENLER"].items(): tags[k] = list(v.keys())
+    for k in cfg["SONUMLEYICILER"]:
+        tk, tv = k.split('=')
+        if tk not in tags: tags[tk] = []
+        if tv not in tags[tk]: tags[tk].append(tv)
+    return tags
+
+
+def shared(name, obj, build):
+    """Ayar nesnesi başına bir kez türetilip tüm isteklerin paylaştığı değer (dönen nesne değiştirilmemeli)."""
+    key = (name, id(obj))
+    hit = _shared.get(key)
+    if hit is None or hit[0] is not obj:
+        hit = _shared[key] = (obj, build(obj))
+    return hit[1]
+
+
+def build_union_tags(config):
+    """Tüm skor ayarlarındaki OSM etiketlerini tek bir filtrede birleştirir."""
+    return shared("union_tags", config, _build_union_tags)
+
+
+def _build_union_tags(config):
+    tags = {}
+    for settings in config.YESIL_SOSYAL_AYARLARI["POZITIF_ETKENLER"]["etiketler"].values():
+        _merge_tags(tags, settings["osm_tags"])
+    for settings in config.YERLESIM_AYARLARI["etiketler"].values():
+        _merge_tags(tags, settings["osm_tags"])
+
+    _merge_tags(tags, noise_tags(config.GURULTU_AYARLARI))
+
+    for data in config.VIBE_AYARLARI["kategoriler"].values():
+        _merge_tags(tags, data["tags"])
+    return tags
+
+
+def poi_search_radius(max_radius_m):
+    """Bir kategori için en yakın mekanın aranacağı yarıçap."""
+    return max(max_radius_m, 1500)
+
+
+def max_search_radius(config):
+    """Skorlayıcıların ihtiyaç duyduğu en büyük yarıçap (metre)."""
+    return shared("max_radius", config, _max_search_radius)
+
+
+def _max_search_radius(config):
+    radii = [poi_search_radius(s["max_limit"]) for s in config.YERLESIM_AYARLARI["etiketler"].values()]
+    radii += [poi_search_radius(s.get("max_mesafe", 1000))
+              for s in config.YESIL_SOSYAL_AYARLARI["POZITIF_ETKENLER"]["etiketler"].values()]
+    radii.append(config.GURULTU_AYARLARI["max_etki_mesafesi"])
+    radii.append(config.VIBE_AYARLARI["yaricap"])
+    return max(radii)
+
+
+def _active_mask(gdf):
+    mask = np.ones(len(gdf), dtype=bool)
+    for col in INACTIVE_COLUMNS:
+        if col in gdf.columns: mask &= (gdf[col] != 'yes').to_numpy()
+    return mask
+
+
+def clean_osm_data(gdf):
+    if gdf.empty: return gdf
+    return gdf[_active_mask(gdf)]
+
+
+def _categorical(col, rows):
+    if isinstance(col.dtype, pd.CategoricalDtype):
+        # Yerel özüt zaten kategorik: yalnızca alt kümede geçen kategoriler taşınır (tüm özütün isim listesi değil)
+        codes = col.array.codes[rows]
+        used = np.unique(codes[codes >= 0])
+        codes = np.where(codes >= 0, np.searchsorted(used, codes), -1).astype(codes.dtype)
+        return pd.Categorical.from_codes(codes, categories=col.array.categories.take(used), validate=False)
+    codes, categories = pd.factorize(col.to_numpy()[rows])
+    return pd.Categorical.from_codes(codes, categories=categories, validate=False)
+
+
+def slim(gdf, tags, crs=None):
+    """Overpass'ın yüzlerce seyrek sütunundan yalnızca okunanları tutar: isim/marka + filtre etiketleri + geometri.
+    Kullanım dışı kayıtlar atılır; sütunlar kategoriye çevrilir (tekrarlanan değerler tek kopya + tamsayı kod).
+    crs verilirse yalnızca geometri dizisi dönüştürülür (tam tablo to_crs'ten ucuz)."""
+    if gdf.empty: return gdf if crs is None else gdf.to_crs(crs)
+    active = _active_mask(gdf)
+    if active.all(): active = slice(None)
+    cols = [c for c in dict.fromkeys((*NAME_COLUMNS, *tags)) if c in gdf.columns]
+    # Sütunlar dizi olarak geçirilir; Series olsaydı her biri (Multi)Index'e yeniden hizalanırdı
+    data = {c: _categorical(gdf[c], active) for c in cols}
+    geometry = gdf.geometry.values[active]
+    if crs is not None: geometry = geometry.to_crs(crs)
+    return gpd.GeoDataFrame(data, geometry=geometry, index=gdf.index[active])
+
+
+def empty_features(crs):
+    return gpd.GeoDataFrame(geometry=[], crs=crs)
+
+
+class FetchError(Exception):
+    """Overpass / karo / yerel özüt okuması başarısız (boş sonuçtan farklı: skorlar boş veriyle hesaplanmamalı)."""
+
+
+class NoFeatures(LookupError):
+    """Sorgu başarılı ama bölgede özellik yok."""
+
+
+def _from_overpass(point, tags, dist):
+    ox = upstream.osmnx()
+    upstream.get_bucket("overpass").acquire()
+    with upstream.thread_limit("overpass"), metrics.upstream_timer("overpass"):
+        try:
+            return ox.features.features_from_point(center_point=point, tags=tags, dist=dist)
+        except ox._errors.InsufficientResponseError:
+            return empty_features("EPSG:4326")
+
+
+def fetch_features(point, tags, dist, crs_utm, tile_settings=None, store=None):
+    """Tek Overpass sorgusu (veya yerel özüt araması) yapar ve veriyi bir kez UTM'e çevirir.
+    Bölgede özellik yoksa boş tablo döner; veri alınamazsa FetchError yükselir."""
+    try:
+        if store is not None:
+            gdf = store.features_around(point, tags, dist)
+        elif tile_settings and tile_settings.get("aktif", True):
+            gdf = tile_cache.features_around(point, tags, dist, tile_settings)
+        else:
+            gdf = _from_overpass(point, tags, dist)
+    except upstream.UpstreamBusy:
+        raise
+    except NoFeatures:
+        return empty_features(crs_utm)
+    except Exception as e:
+        raise FetchError(f"OSM verisi alınamadı: {e}") from e
+    # Sütunlar ayıklanır ve yalnızca geometri UTM'e çevrilir; istek boyunca tutulan tablo yalnızca bunları taşır
+    gdf = slim(gdf, tags, crs_utm)
+    if gdf.empty: return empty_features(crs_utm)
+    return gdf
+
+
+def tag_mask(gdf, osm_tags):
+    """Verilen etiketlerden herhangi birine uyan satırların maskesi."""
+    mask = None
+    for key, values in osm_tags.items():
+        if key not in gdf.columns: continue
+        if values is True:
+            m = gdf[key].notna()
+        else:
+            if isinstance(values, str): values = [values]
+            m = gdf[key].isin(values)
+        mask = m if mask is None else (mask | m)
+    if mask is None: return pd.Series(False, index=gdf.index)
+    return mask
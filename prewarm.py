@@ -0,0 +1,295 @@
+# prewarm.py
+# (v1.0.0 - Popülerliğe Göre Önbellek Isıtma)
+# /hesapla koordinatları cell_key hücrelerinde (HUCRE_AYARLARI["populerlik"]) üstel sönümlü sayaçlarla toplanır; hücre başına
+# en sık istenen birkaç sonuç hücresi (nokta) da tutulur. Arka plan ısıtıcısı en popüler hücrelerin noktalarını,
+# sonuçları TTL'lerinin yenileme_orani kadarını doldurunca yeniden hesaplar: bu hesap cache_manager.refresh_ahead
+# altında çalıştığından eskimeye yakın OSM karoları da yenilenir; rakım / eğim özetle, sonuç sonuç önbelleğiyle
+# yazılır. NDVI'si olmayan popüler hücreler (Sentinel Hub kimlik bilgileri varsa) ndvi_batch ile doldurulur.
+# Canlı trafikle yarışmasın diye sınırlı sayıda işçiyle ve upstream jeton kovalarında yedek kaldıkça çalışır.
+#
+# Kullanım:
+#   python prewarm.py --csv ilanlar.csv              (lat,lon[,agirlik] sütunları; sayaçlara tohum olarak eklenir)
+#   python prewarm.py --csv ilanlar.csv --isit       (ayrıca tohumlanan noktaları hemen ısıtır)
+
+import argparse
+import asyncio
+import csv
+import math
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+import cache_manager
+import cell_key
+import config
+import metrics
+import process_pool
+import result_cache
+import snapshot
+import upstream
+
+DATA_TYPE = "populerlik"
+
+_cells = {}  # hücre -> {"skor", "zaman", "noktalar": {alt_anahtar: [skor, lat, lon]}}
+_dirty = set()
+_lock = threading.Lock()
+_ndvi_tried = set()
+_task = None
+_compute = None
+
+
+def _settings():
+    return getattr(config, "ONBELLEK_ISITMA_AYARLARI", None)
+
+
+def _decay(since, now, half_life_h):
+    return 0.5 ** (max(now - since, 0) / (half_life_h * 3600))
+
+
+def _point_key(lat, lon):
+    """Noktalar sonuç önbelleği hücresine göre gruplanır (ısıtılan sonuç o hücrenin anahtarına yazılır)."""
+    size = config.SONUC_ONBELLEGI_AYARLARI["hucre_boyutu"]
+    return f"{math.floor(lat / size)}_{math.floor(lon / size)}"
+
+
+# --- Popülerlik sayaçları ---
+
+def record(lat, lon, weight=1.0):
+    """İstek koordinatını hücre ve nokta sayaçlarına ekler (sayaçlar yari_omur_saat ile sönümlenir)."""
+    s = _settings()
+    if not s or not s["aktif"]: return
+    now = time.time()
+    cid = cell_key.cell_id(lat, lon, config.HUCRE_AYARLARI[DATA_TYPE]["seviye"])
+    with _lock:
+        cell = _cells.get(cid)
+        if cell is None:
+            cell = _cells[cid] = {"skor": 0.0, "zaman": now, "noktalar": {}}
+        f = _decay(cell["zaman"], now, s["yari_omur_saat"])
+        cell["skor"] = cell["skor"] * f + weight
+        cell["zaman"] = now
+        points = cell["noktalar"]
+        for p in points.values(): p[0] *= f
+        key = _point_key(lat, lon)
+        if key in points:
+            points[key][0] += weight
+        else:
+            points[key] = [weight, lat, lon]
+            if len(points) > s["alt_nokta"]: del points[min(points, key=lambda k: points[k][0])]
+        _dirty.add(cid)
+        if len(_cells) > s["max_hucre"] * 1.1: _prune(s, now)
+
+
+def _prune(s, now):
+    """En soğuk hücreleri max_hucre'ye kadar atar (_lock altında çağrılır)."""
+    order = sorted(_cells, key=lambda g: _cells[g]["skor"] * _decay(_cells[g]["zaman"], now, s["yari_omur_saat"]))
+    for cid in order[:len(_cells) - s["max_hucre"]]:
+        del _cells[cid]
+        _dirty.discard(cid)
+
+
+def hottest(limit):
+    """[(cid, güncel skor, [(nokta skoru, lat, lon)])] - min_skor üstü en popüler hücreler, azalan sırada."""
+    s = _settings()
+    now = time.time()
+    with _lock:
+        ranked = []
+        for cid, cell in _cells.items():
+            f = _decay(cell["zaman"], now, s["yari_omur_saat"])
+            if cell["skor"] * f < s["min_skor"]: continue
+            points = sorted(((p[0] * f, p[1], p[2]) for p in cell["noktalar"].values()), reverse=True)
+            ranked.append((cid, cell["skor"] * f, points))
+    ranked.sort(key=lambda c: c[1], reverse=True)
+    return ranked[:limit]
+
+
+def load():
+    """Kayıtlı sayaçları belleğe alır (açılışta); bellekte daha yeni olan hücre korunur."""
+    cache_manager.flush()
+    rows = cache_manager.scan_cells(DATA_TYPE)
+    with _lock:
+        for cid, cell, _ in rows:
+            current = _cells.get(cid)
+            if current is None or current["zaman"] < cell["zaman"]: _cells[cid] = cell
+    return len(rows)
+
+
+def save():
+    """Değişen hücre sayaçlarını önbelleğe yazar."""
+    with _lock:
+        items = [(g, DATA_TYPE, _cells[g]) for g in _dirty if g in _cells]
+        _dirty.clear()
+    if items: cache_manager.set_cells(items)
+    return len(items)
+
+
+# --- Isıtma ---
+
+def _due(lat, lon, ratio):
+    """Noktanın sonucu yok ya da TTL'inin ratio kadarını doldurduysa True."""
+    if config.SONUC_ONBELLEGI_AYARLARI["aktif"]:
+        age, ttl = result_cache.age(lat, lon, config), config.SONUC_ONBELLEGI_AYARLARI["ttl_saat"] * 3600
+    else:
+        latest = snapshot.latest(lat, lon, config)
+        age, ttl = (None if latest is None else latest[1]), config.OZET_AYARLARI["ttl_saat"] * 3600
+    return age is None or age > ttl * ratio
+
+
+def fill_ndvi(points):
+    """NDVI hücresi kayıtlı olmayan noktaları tek Sentinel Hub isteğiyle doldurur; kimlik bilgisi yoksa hiçbir şey yapmaz."""
+    s = _settings()
+    if not (config.CLIENT_ID and config.CLIENT_SECRET and s["ndvi_gun"]): return 0
+    level = config.HUCRE_AYARLARI["ndvi"]["seviye"]
+    wanted = {cell_key.cell_id(lat, lon, level) for lat, lon in points} - _ndvi_tried
+    missing = wanted - set(cache_manager.get_cell_values(list(wanted), "ndvi"))
+    if not missing: return 0
+    _ndvi_tried.update(missing)  # Bulut / su yüzünden değer çıkmayan hücreler her turda yeniden istenmez
+    import ndvi_batch
+    boxes = [cell_key.bounds(c) for c in missing]
+    bbox = (min(b[0] for b in boxes), min(b[1] for b in boxes), max(b[2] for b in boxes), max(b[3] for b in boxes))
+    end = date.today()
+    with tempfile.TemporaryDirectory() as out_dir:
+        red, nir = ndvi_batch.fetch_sentinel_bands(bbox, config, out_dir, str(end - timedelta(days=s["ndvi_gun"])),
+                                                   str(end))
+        cells = ndvi_batch.compute_cell_ndvi(red, nir, bbox, level)
+    if cells: ndvi_batch.load_into_cache(cells)
+    return len(cells)
+
+
+def _has_headroom(reserve):
+    """Upstream kovalarında canlı trafik için yedek jeton kaldıysa True."""
+    return all(upstream.get_bucket(name).available() >= reserve for name in ("overpass", "open_meteo"))
+
+
+async def _warm_point(compute, lat, lon, s):
+    while not _has_headroom(s["yedek_jeton"]):
+        await asyncio.sleep(1)
+    try:
+        with cache_manager.refresh_ahead(s["yenileme_orani"]):
+            await compute(lat, lon)
+        metrics.inc("onbellek_isitma_toplam", sonuc="isitildi")
+        return True
+    except Exception as e:
+        print(f"⚠️  Isıtma başarısız ({lat}, {lon}): {e}")
+        metrics.inc("onbellek_isitma_toplam", sonuc="hata")
+        return False
+
+
+async def warm_round(compute, limit=None):
+    """Bir ısıtma turu: en popüler hücrelerin süresi dolmaya yakın noktaları en fazla isci eşzamanlı hesaplanır."""
+    s = _settings()
+    cells = hottest(s["hucre_sayisi"] if limit is None else limit)
+    if not cells: return 0
+    points = [(lat, lon) for _, _, pts in cells for _, lat, lon in pts]
+    try:
+        await asyncio.to_thread(fill_ndvi, points)
+    except Exception as e:
+        print(f"⚠️  NDVI ısıtması başarısız: {e}")
+    due = await asyncio.to_thread(lambda: [p for p in points if _due(*p, s["yenileme_orani"])])
+    metrics.inc("onbellek_isitma_toplam", len(points) - len(due), sonuc="guncel")
+    if not due: return 0
+    print(f"🔥 Önbellek ısıtma: {len(due)} nokta ({len(cells)} popüler hücre)")
+    return await _warm_points(compute, due, s)
+
+
+async def _warm_points(compute, points, s):
+    slots = asyncio.Semaphore(s["isci"])
+
+    async def one(lat, lon):
+        async with slots:
+            return await _warm_point(compute, lat, lon, s)
+
+    return sum(await asyncio.gather(*(one(lat, lon) for lat, lon in points)))
+
+
+async def _loop():
+    s = _settings()
+    while True:
+        try:
+            await asyncio.to_thread(save)
+            await warm_round(_compute)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"⚠️  Önbellek ısıtma turu başarısız: {e}")
+        await asyncio.sleep(s["aralik_sn"])
+
+
+def start(compute):
+    """compute: async (lat, lon) -> None; hücreyi hesaplayıp önbelleklere yazar. Sayaçlar yüklenir, ısıtıcı başlar."""
+    global _task, _compute
+    s = _settings()
+    if not s or not s["aktif"]: return
+    _compute = compute
+    print(f"✅ Önbellek ısıtıcı başlatıldı ({load()} kayıtlı hücre)")
+    _task = asyncio.get_running_loop().create_task(_loop())
+
+
+async def stop():
+    global _task
+    if _task is not None:
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+    _task = None
+    await asyncio.to_thread(save)
+
+
+# --- CLI: ilan koordinatlarıyla tohumlama ---
+
+def read_csv(path):
+    """[(lat, lon, ağırlık ya da None)] - başlıkta lat/lon (ya da enlem/boylam), isteğe bağlı agirlik sütunu."""
+    out = []
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        for row in csv.DictReader(f):
+            row = {k.strip().lower(): v for k, v in row.items() if k}
+            lat, lon = row.get("lat", row.get("enlem")), row.get("lon", row.get("boylam"))
+            if not lat or not lon: continue
+            weight = row.get("agirlik")
+            out.append((float(lat), float(lon), float(weight) if weight else None))
+    return out
+
+
+async def _warm_seeds(points):
+    import api  # Sunucuyla aynı hesap ve önbellek yazımı; arka plan ısıtıcısı başlatılmaz
+    try:
+        return await _warm_points(api._isit, points, _settings())
+    finally:
+        process_pool.shutdown()
+        await upstream.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="İlan koordinatlarıyla popülerlik sayaçlarını tohumlar (lansman öncesi).")
+    parser.add_argument("--csv", required=True, help="lat,lon[,agirlik] sütunlu CSV")
+    parser.add_argument("--agirlik", type=float, help="Satırda agirlik yoksa nokta başına ağırlık (varsayılan 2 x min_skor: "
+                             "bir yarı ömür boyunca popüler sayılır)")
+    parser.add_argument("--isit", action="store_true", help="Tohumlanan noktaları sunucuyu beklemeden hemen ısıt")
+    args = parser.parse_args()
+
+    s = _settings()
+    default = args.agirlik if args.agirlik is not None else 2 * s["min_skor"]
+    rows = read_csv(args.csv)
+    load()
+    for lat, lon, weight in rows:
+        record(lat, lon, default if weight is None else weight)
+    cells = save()
+    cache_manager.flush()
+    print(f"✅ {len(rows)} koordinat {cells} hücreye tohumlandı.")
+
+    if args.isit:
+        seen, points = set(), []
+        for lat, lon, _ in rows:
+            key = _point_key(lat, lon)
+            if key in seen: continue
+            seen.add(key)
+            if _due(lat, lon, s["yenileme_orani"]): points.append((lat, lon))
+        print(f"🔥 {len(points)} nokta ısıtılıyor...")
+        print(f"✅ {asyncio.run(_warm_seeds(points))} nokta ısıtıldı.")
+        cache_manager.flush()
+
+
+if __name__ == "__main__":
+    main()
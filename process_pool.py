@@ -0,0 +1,226 @@
+# process_pool.py
+# (v1.0.0 - CPU Aşamaları için Süreç Havuzu)
+# OSM verisi üzerindeki bellek içi aşamalar (gürültü, yerleşim, sosyal tesisler, vibe) GIL'e takılır; tek uvicorn
+# süreci tek çekirdeği doyurur. Bu aşamalar uzun ömürlü, paylaşılan bir süreç havuzunda çalışır. Veri pickle'lanmış
+# GeoDataFrame olarak değil tek bir paylaşılan bellek bloğuyla geçer: geometriler koordinat + ofset dizileri, kategorik
+# sütunlar ve indeks tamsayı kodları olarak; işçiye yalnızca blok adı, dizi yerleşimi ve kategori listeleri gönderilir.
+# İşçi dizileri bloktan kopyalamadan okur ve blok iş bitene kadar açık kalır.
+
+import concurrent.futures
+import gc
+import hashlib
+import multiprocessing
+import pickle
+import threading
+from multiprocessing import shared_memory
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+
+# İşçideki aşamaların okuduğu ayarlar (işçiler config modülünü değil ana süreçteki değerleri kullanır)
+SECTIONS = ("YESIL_SOSYAL_AYARLARI", "YERLESIM_AYARLARI", "GURULTU_AYARLARI", "VIBE_AYARLARI",
+            "GEOMETRI_AYARLARI", "KIYI_MESAFE_DOSYASI")
+ALIGN = 8
+
+_pool = None
+_pool_lock = threading.Lock()
+_payloads = {}  # ana süreçte: id(config) -> (config, anahtar, pickle)
+_configs = {}  # işçide: anahtar -> ayar nesnesi (osm_fetcher.shared önbelleği nesne kimliğine bağlı, sabit kalmalı)
+
+
+def enabled(config):
+    settings = getattr(config, "ISLEM_HAVUZU_AYARLARI", None)
+    return bool(settings) and settings["isci"] > 0
+
+
+def get_pool(config):
+    """Paylaşılan süreç havuzu; ISLEM_HAVUZU_AYARLARI["isci"] 0 ise None."""
+    global _pool
+    if not enabled(config): return None
+    with _pool_lock:
+        if _pool is None:
+            # fork, ana süreçteki iş parçacıklarını (SQLite yazıcısı, olay döngüsü) kilitli halde kopyalayabilir
+            methods = multiprocessing.get_all_start_methods()
+            ctx = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+            workers = config.ISLEM_HAVUZU_AYARLARI["isci"]
+            _pool = concurrent.futures.ProcessPoolExecutor(workers, mp_context=ctx, initializer=_warm)
+            print(f"✅ Süreç havuzu başlatıldı: {workers} işçi")
+    return _pool
+
+
+def warm(config):
+    """İşçileri açılışta başlatır; ağır içe aktarmalar (geopandas, shapely) ilk isteğe kalmaz."""
+    pool = get_pool(config)
+    if pool is None: return
+    for f in [pool.submit(_noop) for _ in range(config.ISLEM_HAVUZU_AYARLARI["isci"])]:
+        f.result()
+
+
+def shutdown():
+    global _pool
+    with _pool_lock:
+        if _pool is not None: _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def eligible(config, features):
+    """Küçük veriler paketleme maliyetine değmez; iş parçacığında kalır."""
+    return enabled(config) and len(features) >= config.ISLEM_HAVUZU_AYARLARI["min_ozellik"]
+
+
+# --- Paketleme (ana süreç) ---
+
+def _config_payload(config):
+    hit = _payloads.get(id(config))
+    if hit is None or hit[0] is not config:
+        data = {name: getattr(config, name, None) for name in SECTIONS}
+        blob = pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+        hit = _payloads[id(config)] = (config, hashlib.sha1(blob).hexdigest()[:16], blob)
+    return hit[1], hit[2]
+
+
+def _codes(values):
+    """(tamsayı kodlar, kategori listesi) - slim sonrası sütunlar zaten kategorik."""
+    if isinstance(values, pd.Categorical): return values.codes, values.categories.tolist()
+    codes, categories = pd.factorize(np.asarray(values, dtype=object), use_na_sentinel=True)
+    return codes, categories.tolist()
+
+
+def _geometry_arrays(geoms):
+    """Geometriler tür (ve z) gruplarına ayrılıp koordinat + ofset dizileri olarak: işçi bunları bloktan kopyalamadan
+    okur. Boş geometriler ve GeometryCollection (ragged dizi karşılığı yok) WKB olarak geçer."""
+    arrays, groups = {}, []
+    type_ids = shapely.get_type_id(geoms)
+    kinds = type_ids * 2 + shapely.has_z(geoms)
+    ragged = ~shapely.is_empty(geoms) & (type_ids != shapely.GeometryType.GEOMETRYCOLLECTION)
+    for kind in np.unique(kinds[ragged]):
+        positions = np.flatnonzero(ragged & (kinds == kind))
+        geom_type, coords, offsets = shapely.to_ragged_array(geoms[positions])
+        name = f"geom:{kind}"
+        arrays[f"{name}:konum"], arrays[f"{name}:koord"] = positions, coords
+        for i, o in enumerate(offsets): arrays[f"{name}:ofset:{i}"] = o
+        groups.append((name, int(geom_type), len(offsets)))
+    rest = np.flatnonzero(~ragged)
+    if len(rest):
+        wkb = shapely.to_wkb(geoms[rest])
+        arrays["wkb:konum"] = rest
+        arrays["wkb"] = np.frombuffer(b"".join(wkb), dtype=np.uint8)
+        arrays["wkb_bitis"] = np.cumsum(np.fromiter(map(len, wkb), dtype=np.int64, count=len(wkb)))
+    return arrays, groups
+
+
+def _pack(features):
+    """(paylaşılan bellek bloğu, yerleşim): işçinin tabloyu yeniden kurması için gereken her şey."""
+    arrays, groups = _geometry_arrays(np.asarray(features.geometry.values, dtype=object))
+    columns = {}
+    for c in features.columns:
+        if c == features.geometry.name: continue
+        arrays[f"sutun:{c}"], columns[c] = _codes(features[c].array)
+    index = features.index
+    levels = []
+    for i in range(index.nlevels):
+        codes, values = (index.codes[i], index.levels[i]) if index.nlevels > 1 else pd.factorize(index)
+        arrays[f"indeks:{i}"] = np.asarray(codes)
+        values = np.asarray(values)
+        if values.dtype.kind in "iuf":
+            arrays[f"seviye:{i}"] = values
+            levels.append(None)
+        else:
+            levels.append(values.tolist())
+
+    layout, offset = {}, 0
+    for name, a in arrays.items():
+        layout[name] = (a.dtype.str, a.shape, offset)
+        offset += -(-a.nbytes // ALIGN) * ALIGN
+    shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+    for name, a in arrays.items():
+        dtype, shape, start = layout[name]
+        np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=start)[:] = a
+    meta = {"ad": shm.name, "diziler": layout, "geometriler": groups, "adet": len(features), "sutunlar": columns,
+            "seviyeler": levels, "indeks_adlari": list(index.names), "crs": features.crs.to_string() if features.crs else None}
+    return shm, meta
+
+
+def _release(shm):
+    shm.close()
+    shm.unlink()
+
+
+def submit(features, lat, lon, config):
+    """OSM'e bağlı aşamaları havuza gönderir; Future -> ({aşama: sonuç}, profil). Blok iş bitince silinir."""
+    pool = get_pool(config)
+    shm, meta = _pack(features)
+    key, blob = _config_payload(config)
+    try:
+        future = pool.submit(_run, meta, lat, lon, key, blob)
+    except BaseException:
+        _release(shm)
+        raise
+    future.add_done_callback(lambda _: _release(shm))
+    return future
+
+
+# --- İşçi ---
+
+def _warm():
+    import batch_scorer  # noqa: F401  (scorer, geopandas, shapely)
+
+
+def _noop():
+    return None
+
+
+def _unpack(buf, meta):
+    """Blok içeriğinden GeoDataFrame. Diziler bloğun üzerindeki görünümlerdir (kopya yok): kodlar ve indeks
+    seviyeleri bloğu göstermeye devam eder, bu yüzden blok iş bitene kadar açık kalmalıdır (bkz. _run)."""
+    def array(name):
+        dtype, shape, start = meta["diziler"][name]
+        return np.ndarray(shape, dtype=dtype, buffer=buf, offset=start)
+
+    geoms = np.empty(meta["adet"], dtype=object)
+    for name, geom_type, n_offsets in meta["geometriler"]:
+        offsets = tuple(array(f"{name}:ofset:{i}") for i in range(n_offsets))
+        geoms[array(f"{name}:konum")] = shapely.from_ragged_array(geom_type, array(f"{name}:koord"), offsets or None)
+    if "wkb" in meta["diziler"]:
+        raw, ends = array("wkb"), array("wkb_bitis")
+        starts = np.concatenate(([0], ends[:-1]))
+        geoms[array("wkb:konum")] = shapely.from_wkb(np.array([raw[s:e].tobytes() for s, e in zip(starts, ends)], dtype=object))
+
+    data = {c: pd.Categorical.from_codes(array(f"sutun:{c}"), categories=cats, validate=False)
+            for c, cats in meta["sutunlar"].items()}
+    levels = [array(f"seviye:{i}") if values is None else values for i, values in enumerate(meta["seviyeler"])]
+    codes = [array(f"indeks:{i}") for i in range(len(levels))]
+    if len(levels) > 1:
+        index = pd.MultiIndex(levels=levels, codes=codes, names=meta["indeks_adlari"], verify_integrity=False)
+    else:
+        index = pd.Index(np.asarray(levels[0])[codes[0]], name=meta["indeks_adlari"][0])
+    return gpd.GeoDataFrame(data, geometry=gpd.array.from_shapely(geoms, crs=meta["crs"]), index=index, copy=False)
+
+
+def _score(buf, meta, lat, lon, config):
+    import batch_scorer
+    import scorer
+
+    features = _unpack(buf, meta)
+    shared = batch_scorer.SharedFeatures(meta["crs"], features, getattr(config, "GEOMETRI_AYARLARI", None))
+    return scorer.run_osm_stages(lat, lon, config, shared)
+
+
+def _run(meta, lat, lon, config_key, config_blob):
+    import types
+
+    config = _configs.get(config_key)
+    if config is None:
+        config = _configs[config_key] = types.SimpleNamespace(**pickle.loads(config_blob))
+    # Blok iş boyunca açık kalır; tablo _score dönünce serbest kalır, kapanış ondan sonra
+    shm = shared_memory.SharedMemory(name=meta["ad"])
+    try:
+        return _score(shm.buf, meta, lat, lon, config)
+    finally:
+        try:
+            shm.close()
+        except BufferError:
+            gc.collect()  # Döngüsel referanslarda kalan görünümler toplanınca kapatılabilir
+            shm.close()
@@ -0,0 +1,39 @@
+# projection.py
+# (v1.0.0 - Aritmetik UTM Dilimi ve Önbellekli Dönüştürücüler)
+# estimate_utm_crs() her çağrıda bir GeoDataFrame ve pyproj veritabanı sorgusu demektir;
+# UTM dilimi boylamdan doğrudan hesaplanır, dönüştürücüler dilim başına bir kez kurulur.
+
+from functools import lru_cache
+
+from pyproj import Transformer
+from shapely.geometry import Point
+
+WGS84 = "EPSG:4326"
+
+
+def utm_zone(lat, lon):
+    """Standart 6 derecelik UTM dilimi (Norveç ve Svalbard istisnaları dahil)."""
+    zone = int((lon + 180) // 6) % 60 + 1
+    if 56 <= lat < 64 and 3 <= lon < 12: zone = 32
+    if 72 <= lat < 84 and 0 <= lon < 42:
+        if lon < 9: zone = 31
+        elif lon < 21: zone = 33
+        elif lon < 33: zone = 35
+        else: zone = 37
+    return zone
+
+
+def utm_crs(lat, lon):
+    """Noktanın UTM CRS'i ("EPSG:326xx" kuzey / "EPSG:327xx" güney)."""
+    return f"EPSG:{(32600 if lat >= 0 else 32700) + utm_zone(lat, lon)}"
+
+
+@lru_cache(maxsize=128)
+def transformer(src, dst):
+    """(kaynak, hedef) CRS çifti başına tek, paylaşılan dönüştürücü."""
+    return Transformer.from_crs(src, dst, always_xy=True)
+
+
+def project_point(lat, lon, crs):
+    x, y = transformer(WGS84, crs).transform(lon, lat)
+    return Point(x, y)
@@ -0,0 +1,41 @@
+# response_builder.py
+# (v1.0.0 - Yanıt Şekillendirme)
+
+
+def _round(value):
+    """Eksik (None) skorlar yanıtta null kalır."""
+    return None if value is None else round(float(value), 1)
+
+
+def build_score_response(sonuc):
+    """Motor çıktısını API yanıt gövdesine çevirir (AI yorumu hariç)."""
+    analiz_egim = sonuc['ekstra_analiz'].get('egim', {})
+    analiz_vibe = sonuc['ekstra_analiz'].get('vibe', {})
+    detaylar = sonuc.get("detaylar", {})
+
+    return {
+        "ozellikler": {
+            "cografya": {
+                "rakim": f"{analiz_egim.get('rakim', '0')}m",
+                "yurunebilirlik": analiz_egim.get('durum', '-'),
+                "egim_orani": f"%{analiz_egim.get('egim_yuzde', 0)}"
+            },
+            "mahalle_karakteri": {
+                "etiket": analiz_vibe.get('etiket', '-'),
+                "aciklama": analiz_vibe.get('aciklama', '-')
+            }
+        },
+        "skor_ozeti": {
+            "genel_skor": _round(sonuc["genel_skor"]),
+            "detaylar": {
+                "yesil_sosyal": _round(sonuc["alt_skorlar"]["yesil_sosyal"]),
+                "yerlesim": _round(sonuc["alt_skorlar"]["yerlesim"]),
+                "gurultu": _round(sonuc["alt_skorlar"]["gurultu"])
+            }
+        },
+        "detayli_analiz": detaylar
+    }
+
+
+def sorted_places(sonuc):
+    return sorted(sonuc.get("mekanlar", []), key=lambda x: x["mesafe"])
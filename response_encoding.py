@@ -0,0 +1,122 @@
+# response_encoding.py
+# (v1.0.0 - Hızlı JSON, Sıkıştırma ve Koşullu GET)
+# Skor yanıtları FastAPI'nin jsonable_encoder + json yolundan (~1ms) geçmeden doğrudan orjson ile (~10µs)
+# baytlara çevrilir; orjson yoksa standart json'a düşülür. Tek parça JSON yanıtlar istemcinin Accept-Encoding'ine
+# göre brotli (kuruluysa) ya da gzip ile sıkıştırılır; akış yanıtları (NDJSON, SSE) dokunulmadan geçer.
+# ETag yardımcıları GET /hesapla'nın 304 Not Modified dönmesi için kullanılır.
+
+import gzip
+import hashlib
+import json
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import Response
+
+try:
+    import orjson
+except ImportError:  # orjson kurulu değilse standart json kullanılır
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # brotli kurulu değilse yalnız gzip sunulur
+    brotli = None
+
+SIKISTIRILABILIR = ("application/json", "text/", "application/javascript", "image/svg+xml")
+
+
+def _default(value):
+    """numpy skalerleri / dizileri (json yedeği için; orjson bunları OPT_SERIALIZE_NUMPY ile kendisi çevirir)."""
+    if hasattr(value, "tolist"): return value.tolist()
+    raise TypeError(f"JSON'a çevrilemeyen tür: {type(value).__name__}")
+
+
+def dumps(value):
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content):
+        return dumps(content)
+
+
+# --- ETag / koşullu GET ---
+
+def etag(*parts):
+    """Parçalardan türetilen zayıf ETag (gövdedeki süre gibi meta alanları değişse de anlam aynıdır)."""
+    digest = hashlib.sha1("|".join(str(p) for p in parts).encode("utf-8")).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+
+def etag_matches(if_none_match, tag):
+    """If-None-Match başlığı tag'i (zayıf karşılaştırma) ya da * içeriyorsa True."""
+    if not if_none_match or tag is None: return False
+    candidates = [c.strip() for c in if_none_match.split(",")]
+    return "*" in candidates or tag.removeprefix("W/") in (c.removeprefix("W/") for c in candidates)
+
+
+# --- Sıkıştırma ---
+
+def negotiate(accept_encoding):
+    """İstemcinin kabul ettiği en iyi kodlama: "br", "gzip" ya da None (q=0 olanlar atlanır)."""
+    accepted = {}
+    for item in (accept_encoding or "").lower().split(","):
+        name, _, params = item.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        if name: accepted[name] = q
+    for name in (("br", "gzip") if brotli is not None else ("gzip",)):
+        if accepted.get(name, accepted.get("*", 0)) > 0: return name
+    return None
+
+
+def compress(body, encoding, settings):
+    if encoding == "br": return brotli.compress(body, quality=settings["brotli_kalite"])
+    return gzip.compress(body, compresslevel=settings["gzip_seviye"], mtime=0)
+
+
+class CompressionMiddleware:
+    """Tek parça (more_body olmayan) ve sıkıştırılabilir türdeki yanıtları min_bayt üstündeyse sıkıştırır."""
+
+    def __init__(self, app, settings):
+        self.app = app
+        self.settings = settings
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding"))
+        start = None
+
+        async def wrapped(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message  # Gövdenin tek parça olup olmadığı ilk gövde mesajında belli olur
+                return
+            if message["type"] != "http.response.body" or start is None:
+                await send(message)
+                return
+            headers = MutableHeaders(raw=start["headers"])
+            body = message.get("body", b"")
+            content_type = headers.get("content-type", "")
+            if not message.get("more_body", False) and content_type.startswith(SIKISTIRILABILIR):
+                if "accept-encoding" not in headers.get("vary", "").lower(): headers.add_vary_header("Accept-Encoding")
+                if encoding and len(body) >= self.settings["min_bayt"] and "content-encoding" not in headers:
+                    body = compress(body, encoding, self.settings)
+                    headers["Content-Encoding"] = encoding
+                    headers["Content-Length"] = str(len(body))
+                    message = {**message, "body": body}
+            await send(start)
+            start = None
+            await send(message)
+
+        await self.app(scope, receive, wrapped)
@@ -0,0 +1,62 @@
+# result_cache.py
+# (v1.2.0 - Sonuç Önbelleği)
+# /hesapla yanıt gövdesini (skorlar + mekanlar + özet kimliği) mekansal hücre + config parmak izi ile saklar.
+# Bellek LRU + SQLite katmanları cache_manager'dan gelir.
+
+import hashlib
+import json
+import math
+import time
+
+import cache_manager
+
+SCORING_SECTIONS = ("YESIL_SOSYAL_AYARLARI", "YERLESIM_AYARLARI", "GURULTU_AYARLARI",
+                    "EGIM_AYARLARI", "VIBE_AYARLARI", "FINAL_AGIRLIKLAR")
+DATA_TYPE = "sonuc"
+
+_fingerprints = {}
+
+
+def config_fingerprint(config):
+    """Skorlama ayarlarının özeti; ağırlık değişince eski kayıtlar kendiliğinden geçersiz olur."""
+    # Nesne de saklanır: serbest kalan bir ayar nesnesinin id'si yenisine verilirse eski özet dönmesin
+    hit = _fingerprints.get(id(config))
+    if hit is None or hit[0] is not config:
+        data = {name: getattr(config, name, None) for name in SCORING_SECTIONS}
+        raw = json.dumps(data, sort_keys=True, ensure_ascii=False)
+        hit = _fingerprints[id(config)] = (config, hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16])
+    return hit[1]
+
+
+def cache_key(lat, lon, config):
+    size = config.SONUC_ONBELLEGI_AYARLARI["hucre_boyutu"]
+    return f"{math.floor(lat / size)}_{math.floor(lon / size)}:{config_fingerprint(config)}"
+
+
+def lookup(lat, lon, config):
+    """(yanıt, kayıt_zamanı_epoch) ya da None; kayıt zamanı GET /hesapla ETag'ine girer."""
+    settings = config.SONUC_ONBELLEGI_AYARLARI
+    if not settings["aktif"]: return None
+    entry = cache_manager.get_entry(cache_key(lat, lon, config), DATA_TYPE)
+    if entry is None: return None
+    if cache_manager.expired(time.time() - entry[1], settings["ttl_saat"] * 3600): return None
+    return entry
+
+
+def get(lat, lon, config):
+    """(yanıt, yaş_sn) ya da None."""
+    entry = lookup(lat, lon, config)
+    return None if entry is None else (entry[0], time.time() - entry[1])
+
+
+def age(lat, lon, config):
+    """Hücrenin kayıtlı sonucunun yaşı (sn), TTL'e bakılmaz; kayıt yoksa None."""
+    entry = cache_manager.get_entry(cache_key(lat, lon, config), DATA_TYPE)
+    return None if entry is None else time.time() - entry[1]
+
+
+def put(lat, lon, config, payload):
+    if not config.SONUC_ONBELLEGI_AYARLARI["aktif"]: return
+    key = cache_key(lat, lon, config)
+    cache_manager.set_value(key, DATA_TYPE, payload)
+    print(f"  [CACHE] Sonuç kaydedildi. Anahtar: {key}")
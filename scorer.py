@@ -1,17 +1,81 @@
 # scorer.py (v4.2.0 - HIZLI VERSİYON)
 import warnings
-import geopandas as gpd
+import numpy as np
 import pandas as pd
-import osmnx as ox
 from shapely.geometry import Point
-from sentinelhub import CRS, BBox, SHConfig
 import cache_manager
-import requests
+import coast_grid
+import dem_reader
+import local_extract
+import metrics
+import noise_engine
+import osm_fetcher
+import projection
+import spatial_index
+import upstream
+import asyncio
+import threading
 import concurrent.futures
+import time
+from concurrent.futures.process import BrokenProcessPool
+import process_pool
 
-ox.settings.log_console = False
 warnings.filterwarnings('ignore')
 
+_stage_pool = None
+_empty = {}
+
+# Özet (snapshot) biçimi değişirse artırılır; eski kayıtlar snapshot.get'te yok sayılır
+SNAPSHOT_VERSION = 1
+EMPTY_POI = { "min_dist": None, "count": 0, "names": [], "places": [] }
+# Aşama -> özetteki alanları. Tamlık bayrakları: "tam", "hata" (aşama None döndü), "sure_asimi" (bütçeye
+# yetişmedi), "onbellek" (hata / süre aşımında hücrenin son tam özetinden bayat veriyle dolduruldu)
+STAGE_FIELDS = { "gurultu": ("gurultu",), "yerlesim": ("yerlesim",), "yesil_sosyal": ("ndvi", "yesil_sosyal"),
+                 "egim": ("egim",), "vibe": ("vibe",) }
+OSM_STAGES = ("gurultu", "yerlesim", "yesil_sosyal", "vibe")  # OSM verisi gelmeden çalışamayanlar
+
+def _empty_features(crs_utm):
+    """UTM dilimi başına paylaşılan boş veri + indeks (veri çekilmeden önceki başlangıç değeri)."""
+    if crs_utm not in _empty:
+        features = osm_fetcher.empty_features(crs_utm)
+        _empty[crs_utm] = (features, spatial_index.FeatureIndex(features))
+    return _empty[crs_utm]
+
+def stage_pool(config):
+    """Tüm isteklerin paylaştığı aşama havuzu (istek başına yeni havuz açılmaz)."""
+    global _stage_pool
+    if _stage_pool is None:
+        _stage_pool = concurrent.futures.ThreadPoolExecutor(max_workers=getattr(config, "ASAMA_IS_PARCACIGI", 8),
+                                                            thread_name_prefix="skor-asama")
+    return _stage_pool
+
+def _consume(future):
+    """Beklenmeyen (arka planda süren) işin hatası 'never retrieved' uyarısı üretmesin."""
+    if not future.cancelled(): future.exception()
+
+async def _until(futures, deadline):
+    """deadline'a (time.monotonic, None = sınırsız) kadar bekler ve bitenleri döndürür; bitmeyenler arka planda sürer."""
+    timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+    done, pending = await asyncio.wait(futures, timeout=timeout)
+    for f in pending: f.add_done_callback(_consume)
+    return done
+
+MISSING_FLAGS = ("hata", "sure_asimi")
+
+def stage_flags(snapshot):
+    """Aşama başına "tam" ya da "hata" (alanı None olan aşama)."""
+    return {name: "tam" if all(snapshot[f] is not None for f in fields) else "hata"
+            for name, fields in STAGE_FIELDS.items()}
+
+def is_partial(snapshot):
+    return any(flag != "tam" for flag in snapshot.get("tamlik", {}).values())
+
+def is_storable(snapshot):
+    """Süre bütçesiyle kesilmiş, OSM verisi alınamamış ya da bayat veriyle doldurulmuş özet (ve sonucu) önbelleğe yazılmaz."""
+    tamlik = snapshot.get("tamlik", {})
+    if tamlik.get("osm_veri") == "hata": return False
+    return not any(flag in ("sure_asimi", "onbellek") for flag in tamlik.values())
+
 def normalize_linear(deger, min_esik, max_esik, ters=False):
     deger = max(min_esik, min(deger, max_esik))
     if (max_esik - min_esik) == 0: return 100.0 if not ters else 0.0
@@ -24,28 +88,75 @@ def normalize_plateau(deger, ideal_limit, max_limit):
     if deger > ideal_limit: return normalize_linear(deger, min_esik=ideal_limit, max_esik=max_limit, ters=True)
     return 0.0
 
+def normalize_linear_array(deger, min_esik, max_esik, ters=False):
+    """normalize_linear'ın NumPy dizileri için sürümü."""
+    if (max_esik - min_esik) == 0: return np.full(np.shape(deger), 100.0 if not ters else 0.0)
+    normalized = (np.clip(deger, min_esik, max_esik) - min_esik) / (max_esik - min_esik)
+    if ters: normalized = 1 - normalized
+    return normalized * 100
+
+def normalize_plateau_array(deger, ideal_limit, max_limit):
+    """normalize_plateau'nun NumPy dizileri için sürümü."""
+    return np.where(deger <= ideal_limit, 100.0, normalize_linear_array(deger, ideal_limit, max_limit, ters=True))
+
+def slope_points(lat, lon, delta=0.0015):
+    """Eğim için merkez + 4 komşu nokta."""
+    return [
+        {"latitude": lat, "longitude": lon},
+        {"latitude": lat+delta, "longitude": lon},
+        {"latitude": lat-delta, "longitude": lon},
+        {"latitude": lat, "longitude": lon+delta},
+        {"latitude": lat, "longitude": lon-delta}
+    ]
+
+def _elevation_url(locations):
+    lats = ",".join([str(loc["latitude"]) for loc in locations])
+    lons = ",".join([str(loc["longitude"]) for loc in locations])
+    return f"{upstream.url('open_meteo')}?latitude={lats}&longitude={lons}"
+
+def get_elevations_batch(locations):
+    upstream.get_bucket("open_meteo").acquire()
+    try:
+        with metrics.upstream_timer("open_meteo"):
+            resp = upstream.get_session().get(_elevation_url(locations), timeout=5)  # 3'ten 5'e çıkardık
+        metrics.record_response("open_meteo", resp)
+        if resp.status_code == 200:
+            return resp.json()['elevation']
+    except Exception:
+        return None
+
+async def get_elevations_batch_async(locations):
+    await upstream.get_bucket("open_meteo").acquire_async()
+    try:
+        async with upstream.get_limit("open_meteo"):
+            with metrics.upstream_timer("open_meteo"):
+                resp = await upstream.get_async_client().get(_elevation_url(locations), timeout=5)
+        metrics.record_response("open_meteo", resp)
+        if resp.status_code == 200:
+            return resp.json()['elevation']
+    except Exception:
+        return None
+
 class QualityScorer:
-    def __init__(self, lat, lon, config):
+    def __init__(self, lat, lon, config, shared=None):
+        """shared: toplu skorlamada bir küme için önceden çekilmiş veri (crs_utm, features, index)."""
         self.lat = lat
         self.lon = lon
         self.config = config
         self.point = (lat, lon)
         self.point_geom = Point(lon, lat)
-        self.bbox = BBox(bbox=(lon-0.005, lat-0.005, lon+0.005, lat+0.005), crs=CRS.WGS84)
-        self.detected_places = []
         self.distance_to_sea = float('inf')
-        self.score_details = {}  # YENI: Detayları sakla
+        self.shared = shared
+        self.elevations = None  # Toplu modda önceden çekilen rakımlar
         
-        try:
-            temp_gdf = gpd.GeoDataFrame(geometry=[self.point_geom], crs="EPSG:4326")
-            self.crs_utm = temp_gdf.estimate_utm_crs()
-        except Exception:
-            self.crs_utm = "EPSG:32636"
-
-        self.sh_config = SHConfig()
-        if hasattr(config, 'CLIENT_ID') and config.CLIENT_ID and config.CLIENT_SECRET:
-            self.sh_config.sh_client_id = config.CLIENT_ID
-            self.sh_config.sh_client_secret = config.CLIENT_SECRET
+        # UTM dilimi aritmetik; nokta istek başına bir kez, önbellekli dönüştürücüyle projekte edilir
+        self.crs_utm = shared.crs_utm if shared is not None else projection.utm_crs(lat, lon)
+        self.point_utm = projection.project_point(lat, lon, self.crs_utm)
+        if shared is not None:
+            self.features, self._index = shared.features, shared.index
+        else:
+            self.features, self._index = _empty_features(self.crs_utm)
+        self._index_lock = threading.Lock()
         
         print(f"✅ Motor başlatıldı: {self.point}")
 
@@ -54,256 +165,480 @@ class QualityScorer:
         if 'brand' in row and pd.notna(row['brand']): return row['brand']
         return "İsimsiz"
 
-    def _clean_osm_data(self, gdf):
-        if gdf.empty: return gdf
-        for col in ['disused', 'abandoned']:
-            if col in gdf.columns: gdf = gdf[gdf[col] != 'yes']
-        return gdf
+    @metrics.stage("osm_veri")
+    def _fetch_features(self):
+        """Tüm skorlayıcılar için tek bir birleşik OSM sorgusu."""
+        store = local_extract.get_store(self.config)
+        print("  📡 OSM verisi " + ("yerel özütten okunuyor..." if store else "çekiliyor (tek sorgu)..."))
+        tags = osm_fetcher.build_union_tags(self.config)
+        dist = osm_fetcher.max_search_radius(self.config)
+        self.features = osm_fetcher.fetch_features(self.point, tags, dist, self.crs_utm,
+                                                   getattr(self.config, "OSM_KARO_AYARLARI", None), store)
+        self._index = None  # Aşamalar süreç havuzuna giderse işçi kendi indeksini kurar; burada kurulmaz
+        metrics.observe("ozellik_sayisi", len(self.features), kategori="toplam")
+
+    @property
+    def index(self):
+        return self._ensure_index()
+
+    def _ensure_index(self):
+        """Uzamsal indeks (geometri sadeleştirme + prepare) yalnızca aşamalar bu süreçte çalışacaksa, ilk gerekişte kurulur."""
+        if self._index is None:
+            with self._index_lock:
+                if self._index is None: self._index = self._build_index()
+        return self._index
+
+    @metrics.stage("indeks")
+    def _build_index(self):
+        return spatial_index.FeatureIndex(self.features, getattr(self.config, "GEOMETRI_AYARLARI", None))
+
+    def _try_fetch_features(self):
+        """OSM verisi alındıysa True. Alınamadıysa False: aşamalar boş veriyle (gürültüsüz, tesissiz) skor üretmez."""
+        try:
+            self._fetch_features()
+            return True
+        except osm_fetcher.FetchError as e:
+            print(f"⚠️  {e}")
+            return False
 
     def _analyze_poi_details(self, category_name, osm_tags, max_radius_m):
+        """Kategori özeti: en yakın mesafe (yoksa None), max_radius_m içindeki adet, ilk 3 isim, kaydedilecek mekanlar."""
         try:
-            search_dist = max(max_radius_m, 1500)  # 3000'den 1500'e düşürdük
-            gdf = ox.features.features_from_point(center_point=self.point, tags=osm_tags, dist=search_dist)
-            gdf = self._clean_osm_data(gdf)
-            if gdf.empty: return { "min_dist": float('inf'), "count": 0, "names": [] }
-            
-            gdf_utm = gdf.to_crs(self.crs_utm)
-            point_utm = gpd.GeoSeries([self.point_geom], crs="EPSG:4326").to_crs(self.crs_utm).iloc[0]
-            gdf_utm['distance'] = gdf_utm.distance(point_utm)
-            gdf_sorted = gdf_utm.sort_values('distance')
+            search_dist = osm_fetcher.poi_search_radius(max_radius_m)
+            positions, dists = self.index.within(self.point_utm, osm_tags, search_dist)
+            metrics.observe("ozellik_sayisi", len(positions), kategori=category_name)
+            if not len(positions): return EMPTY_POI
             
-            min_dist = gdf_sorted.iloc[0]['distance']
-            relevant_pois = gdf_sorted[gdf_sorted['distance'] <= max_radius_m]
-            count = len(relevant_pois)
+            count = int((dists <= max_radius_m).sum())
             
             # En yakın 3'ün ismini al
-            top_names = [self._get_poi_name(row) for _, row in gdf_sorted.head(3).iterrows()]
+            top_names = [self._get_poi_name(row) for _, row in self.features.iloc[positions[:3]].iterrows()]
             
-            # Detaylı listeye ekle
-            pois_to_save = relevant_pois.head(5) if not relevant_pois.empty else gdf_sorted.head(1)
-            for _, row in pois_to_save.iterrows():
-                if row['distance'] > 5000: continue
-                self.detected_places.append({
+            # Detaylı listeye eklenecekler
+            n_save = min(count, 5) if count else 1
+            rows = self.features.iloc[positions[:n_save]]
+            places = []
+            for (_, row), dist in zip(rows.iterrows(), dists[:n_save]):
+                if dist > 5000: continue
+                places.append({
                     "kategori": category_name,
                     "isim": self._get_poi_name(row),
-                    "mesafe": int(row['distance']),
+                    "mesafe": int(dist),
                     "tur": list(osm_tags.keys())[0]
                 })
             
-            return { "min_dist": min_dist, "count": count, "names": top_names }
+            return { "min_dist": float(dists[0]), "count": count, "names": top_names, "places": places }
         except Exception:
-            return { "min_dist": float('inf'), "count": 0, "names": [] }
+            return EMPTY_POI
 
-    def _calculate_noise_score(self):
+    def _coast_from_grid(self, osm_tags, max_radius_m):
+        """deniz_kenari özeti kıyı mesafesi gridinden; grid yoksa ya da nokta grid dışındaysa None (geometriye düşülür)."""
+        grid = coast_grid.get_grid(self.config)
+        d = grid.distance_at(self.lat, self.lon) if grid else None
+        if d is None: return None
+        search_dist = osm_fetcher.poi_search_radius(max_radius_m)
+        # Grid üst sınırı "en az bu kadar" demektir; arama yarıçapından kısaysa kesin sonuç için geometriye bakılır
+        if d >= grid.max_distance: return EMPTY_POI if grid.max_distance >= search_dist else None
+        if d > search_dist: return EMPTY_POI
+        name = "Deniz kıyısı"
+        places = [{"kategori": "deniz_kenari", "isim": name, "mesafe": int(d), "tur": list(osm_tags.keys())[0]}] if d <= 5000 else []
+        return {"min_dist": d, "count": int(d <= max_radius_m), "names": [name], "places": places}
+
+    @metrics.stage("gurultu")
+    def _extract_noise(self):
+        """Gürültü kaynaklarının mesafe ağırlıklı toplamı (kaynak yoksa toplam None, hata olursa None)."""
         print("  🔊 Gürültü analizi...")
         cfg = self.config.GURULTU_AYARLARI
         max_dist = cfg["max_etki_mesafesi"]
-        tags = {}
-        for k, v in cfg["ETKENLER"].items(): tags[k] = list(v.keys())
-        for k, v in cfg["SONUMLEYICILER"].items():
-            tk, tv = k.split('=')
-            if tk not in tags: tags[tk] = []
-            if tv not in tags[tk]: tags[tk].append(tv)
+        tags = osm_fetcher.noise_tags(cfg)
             
         try:
-            pois = ox.features.features_from_point(center_point=self.point, tags=tags, dist=max_dist)
-            pois = self._clean_osm_data(pois)
-            if pois.empty:
-                self.score_details['gurultu'] = {"reason": "Gürültü kaynağı bulunamadı", "closest": None}
-                return 100.0
-            pois_utm = pois.to_crs(self.crs_utm)
-            point_utm = gpd.GeoSeries([self.point_geom], crs="EPSG:4326").to_crs(self.crs_utm).iloc[0]
+            positions, dists = self.index.within(self.point_utm, tags, max_dist)
+            if not len(positions): return {"total": None, "closest": None}
+            weights, labels, matched = noise_engine.noise_weights(self.features.iloc[positions], cfg)
         except Exception:
-            return 100.0
-        
-        total = 0
-        closest_noise = None
-        min_noise_dist = float('inf')
-        
-        for _, poi in pois_utm.iterrows():
-            dist = point_utm.distance(poi.geometry)
-            if dist > max_dist: continue
-            decay = 1 - (dist / max_dist)
-            score = 0
-            for k, v in cfg["ETKENLER"].items():
-                if k in poi and pd.notna(poi[k]) and poi[k] in v: 
-                    score = v[poi[k]]
-                    if dist < min_noise_dist:
-                        min_noise_dist = dist
-                        closest_noise = f"{poi[k]} ({int(dist)}m)"
-                    break
-            total += score * decay
+            return None
         
-        self.score_details['gurultu'] = {
-            "reason": "Sessiz bölge" if total < 500 else "Orta gürültü" if total < 2000 else "Yüksek gürültü",
-            "closest": closest_noise
-        }
-        return normalize_linear(total, cfg["min_esik"], cfg["max_esik"], ters=True)
+        return {"total": float(noise_engine.noise_total(weights, dists, max_dist)),
+                "closest": noise_engine.closest_source(labels, matched, dists)}
 
-    def _calculate_settlement_score(self):
+    @metrics.stage("yerlesim")
+    def _extract_settlement(self):
         print("  🏘️  Yerleşim analizi...")
-        cfg = self.config.YERLESIM_AYARLARI
-        score = 0
-        weight = 0
-        details = {}
-        
-        for name, settings in cfg["etiketler"].items():
-            data = self._analyze_poi_details(name, settings["osm_tags"], settings["max_limit"])
-            p = normalize_plateau(data["min_dist"], settings["ideal_limit"], settings["max_limit"])
-            w = cfg["agirliklar"].get(name, 0)
-            score += p * w
-            weight += w
-            
-            # Detay kaydet
-            if data["min_dist"] != float('inf'):
-                details[name] = {
-                    "distance": int(data["min_dist"]),
-                    "count": data["count"],
-                    "score": round(p, 1),
-                    "closest": data["names"][0] if data["names"] else "Bilinmiyor"
-                }
-        
-        self.score_details['yerlesim'] = details
-        return score / weight if weight > 0 else 0
+        return {name: self._analyze_poi_details(name, settings["osm_tags"], settings["max_limit"])
+                for name, settings in self.config.YERLESIM_AYARLARI["etiketler"].items()}
 
-    def _calculate_ndvi_score(self):
+    @metrics.stage("ndvi")
+    def _extract_ndvi(self):
         print("  🌳 Yeşil alan analizi...")
-        val = cache_manager.get_cached_data(self.lat, self.lon, "ndvi")
-        if val is None:
-            val = 0.3491  # Fallback
-            cache_manager.save_data_to_cache(self.lat, self.lon, "ndvi", val)
-        
-        cfg = self.config.YESIL_SOSYAL_AYARLARI["NDVI"]
-        score = normalize_linear(val, cfg["min_esik"], cfg["max_esik"])
-        
-        self.score_details['ndvi'] = {
-            "value": round(val, 2),
-            "level": "Yüksek" if val > 0.4 else "Orta" if val > 0.25 else "Düşük"
-        }
-        return score
+        # NDVI gridi ndvi_batch.py ile önceden yüklenir; eksik hücrede komşu / ata hücreye düşülür, o da yoksa varsayılan
+        val, kaynak = cache_manager.lookup_cell(self.lat, self.lon, "ndvi", self.config.HUCRE_AYARLARI["ndvi"])
+        if val is None: return {"value": self.config.YESIL_SOSYAL_AYARLARI["NDVI"]["varsayilan"], "source": "varsayilan"}
+        return {"value": val, "source": "uydu" if kaynak == "hucre" else f"uydu_{kaynak}"}
 
-    def _calculate_green_social_score(self):
-        print("  🎯 Sosyal tesis analizi...")
-        cfg = self.config.YESIL_SOSYAL_AYARLARI["POZITIF_ETKENLER"]
-        s_ndvi = self._calculate_ndvi_score()
-        s_poi = 0
-        w_poi = 0
-        details = {}
-        
-        for name, settings in cfg["etiketler"].items():
+    def _social_pois(self):
+        pois = {}
+        for name, settings in self.config.YESIL_SOSYAL_AYARLARI["POZITIF_ETKENLER"]["etiketler"].items():
             max_r = settings.get("max_mesafe", 1000)
-            data = self._analyze_poi_details(name, settings["osm_tags"], max_r)
-            
-            if name == "deniz_kenari":
-                self.distance_to_sea = data["min_dist"]
-                if self.distance_to_sea == float('inf'): continue
-            
-            p_yakin = normalize_linear(data["min_dist"], 0, max_r, True)
-            p_yogun = min(100, (data["count"]/settings.get("yogunluk_hedefi",1))*100)
-            
-            w_yakin = cfg.get("yakinlik_agirligi", 0.7)
-            w_yogun = cfg.get("yogunluk_agirligi", 0.3)
-            final = 0.0
-            if data["min_dist"] != float('inf'):
-                final = (p_yakin * w_yakin) + (p_yogun * w_yogun)
-            
-            w = settings.get("agirlik", 1)
-            s_poi += final * w
-            w_poi += w
-            
-            # Detay kaydet
-            if data["min_dist"] != float('inf'):
-                details[name] = {
-                    "distance": int(data["min_dist"]),
-                    "count": data["count"],
-                    "closest": data["names"][0] if data["names"] else "Bilinmiyor"
-                }
-            
-        final_poi = s_poi / w_poi if w_poi > 0 else 0
-        w_ndvi = self.config.YESIL_SOSYAL_AYARLARI["NDVI"]["agirlik"]
-        w_all = cfg["agirlik"]
-        
-        self.score_details['sosyal'] = details
-        return (s_ndvi * w_ndvi) + (final_poi * w_all)
+            summary = self._coast_from_grid(settings["osm_tags"], max_r) if name == "deniz_kenari" else None
+            pois[name] = summary if summary is not None else self._analyze_poi_details(name, settings["osm_tags"], max_r)
+        return pois
+
+    @metrics.stage("yesil_sosyal")
+    def _extract_green_social(self):
+        print("  🎯 Sosyal tesis analizi...")
+        ndvi = self._extract_ndvi()
+        pois = self._social_pois()
+        self.distance_to_sea = pois.get("deniz_kenari", EMPTY_POI)["min_dist"]
+        return ndvi, pois
 
     def _get_elevations_batch(self, locations):
+        return get_elevations_batch(locations)
+
+    def _slope_from_dem(self):
+        """Yerel DEM varsa (rakım, eğim %) - ağ çağrısı yok."""
+        dem = dem_reader.get_dem(self.config)
+        if dem is None: return None
         try:
-            lats = ",".join([str(loc["latitude"]) for loc in locations])
-            lons = ",".join([str(loc["longitude"]) for loc in locations])
-            url = f"https://api.open-meteo.com/v1/elevation?latitude={lats}&longitude={lons}"
-            resp = requests.get(url, timeout=5)  # 3'ten 5'e çıkardık
-            if resp.status_code == 200:
-                return resp.json()['elevation']
+            return dem.slope_at(self.lat, self.lon, self.config.EGIM_AYARLARI["dem_yaricap"])
         except Exception:
             return None
 
-    def _calculate_slope_analysis(self):
-        print("  ⛰️  Eğim analizi...")
-        delta = 0.0015
-        points = [
-            {"latitude": self.lat, "longitude": self.lon},
-            {"latitude": self.lat+delta, "longitude": self.lon},
-            {"latitude": self.lat-delta, "longitude": self.lon},
-            {"latitude": self.lat, "longitude": self.lon+delta},
-            {"latitude": self.lat, "longitude": self.lon-delta}
-        ]
-        elevs = self._get_elevations_batch(points)
-        if not elevs: return {"rakim": "Bilinmiyor", "egim_yuzde": 0, "durum": "Analiz Edilemedi"}
-        
+    def _slope_from_elevations(self, elevs):
+        if not elevs: return None
         center = elevs[0]
         max_diff = max(abs(h - center) for h in elevs[1:])
-        egim = (max_diff / 150) * 100
-        
-        cfg = self.config.EGIM_AYARLARI["kategoriler"]
-        durum = "Bilinmiyor"
-        if egim <= cfg["duz"]["max_egim"]: durum = cfg["duz"]["etiket"]
-        elif egim <= cfg["hafif"]["max_egim"]: durum = cfg["hafif"]["etiket"]
-        elif egim <= cfg["orta"]["max_egim"]: durum = cfg["orta"]["etiket"]
-        else: durum = cfg["dik"]["etiket"]
-        return { "rakim": center, "egim_yuzde": round(egim, 1), "durum": durum }
-
-    def _calculate_neighborhood_vibe(self):
+        return center, (max_diff / 150) * 100
+
+    @metrics.stage("egim")
+    def _extract_slope(self):
+        print("  ⛰️  Eğim analizi...")
+        sonuc = self._slope_from_dem()
+        if sonuc is None:
+            sonuc = self._slope_from_elevations(self.elevations or self._get_elevations_batch(slope_points(self.lat, self.lon)))
+        return _slope_snapshot(sonuc)
+
+    @metrics.stage("egim")
+    async def _extract_slope_async(self):
+        print("  ⛰️  Eğim analizi (async)...")
+        sonuc = self._slope_from_dem()
+        if sonuc is None:
+            sonuc = self._slope_from_elevations(self.elevations or await get_elevations_batch_async(slope_points(self.lat, self.lon)))
+        return _slope_snapshot(sonuc)
+
+    @metrics.stage("vibe")
+    def _extract_vibe(self):
         print("  🏘️  Mahalle karakteri...")
         cfg = self.config.VIBE_AYARLARI
-        scores = {"aile": 0, "sosyal": 0, "ticari": 0}
+        counts = {"aile": 0, "sosyal": 0, "ticari": 0}
         for name, data in cfg["kategoriler"].items():
             try:
-                gdf = ox.features.features_from_point(self.point, data["tags"], dist=cfg["yaricap"])
-                gdf = self._clean_osm_data(gdf)
-                scores[name] = len(gdf)
+                counts[name] = int(self.index.count_within(self.point_utm, data["tags"], cfg["yaricap"]))
             except Exception:
-                scores[name] = 0
-        sorted_s = sorted(scores.items(), key=lambda x: x[1], reverse=True)
-        if sorted_s[0][1] < 3: return {"etiket": "🍃 Sakin / Gelişmekte Olan", "aciklama": "Sessiz bir bölge."}
-        if sorted_s[1][1] > (sorted_s[0][1] * 0.7): return {"etiket": "🔄 Karma Yaşam (Canlı)", "aciklama": "Çok yönlü bir mahalle."}
-        return {"etiket": cfg["kategoriler"][sorted_s[0][0]]["etiket"], "aciklama": cfg["kategoriler"][sorted_s[0][0]]["aciklama"]}
+                counts[name] = 0
+        return counts
+
+    def _snapshot(self, gurultu, yerlesim, yesil_sosyal, egim, vibe):
+        ndvi, pois = yesil_sosyal
+        snapshot = {"surum": SNAPSHOT_VERSION, "lat": self.lat, "lon": self.lon, "gurultu": gurultu,
+                    "yerlesim": yerlesim, "ndvi": ndvi, "yesil_sosyal": pois, "egim": egim, "vibe": vibe}
+        snapshot["tamlik"] = {"osm_veri": "tam", **stage_flags(snapshot)}
+        return snapshot
+
+    async def _fill_stale(self, snapshot, fallback):
+        """Eksik aşamaları fallback()'in döndürdüğü son tam özetten (bayat) doldurur ve bayrakları günceller."""
+        tamlik = snapshot["tamlik"]
+        missing = [name for name, flag in tamlik.items() if flag in MISSING_FLAGS and name in STAGE_FIELDS]
+        stale = await asyncio.to_thread(fallback) if missing and fallback else None
+        if stale is not None:
+            eski, yas = stale
+            for name in missing:
+                if any(eski.get(f) is None for f in STAGE_FIELDS[name]): continue
+                for f in STAGE_FIELDS[name]: snapshot[f] = eski[f]
+                tamlik[name] = "onbellek"
+            if tamlik["osm_veri"] != "tam" and any(tamlik[n] == "onbellek" for n in OSM_STAGES):
+                tamlik["osm_veri"] = "onbellek"
+            snapshot["bayat_yas_sn"] = int(yas)
+            print(f"  [CACHE] Eksik aşamalar bayat özetten dolduruldu ({int(yas)}s önce): {', '.join(missing)}")
+        for name, flag in tamlik.items():
+            if flag != "tam": metrics.inc("kismi_asama_toplam", asama=name, kaynak=flag)
+        return snapshot
+
+    def _osm_stage_fns(self):
+        return {"gurultu": self._extract_noise, "yerlesim": self._extract_settlement,
+                "yesil_sosyal": self._extract_green_social, "vibe": self._extract_vibe}
+
+    def _submit_remote(self):
+        """Süreç havuzu açık ve veri yeterince büyükse OSM'e bağlı aşamaları havuza gönderir (Future), değilse None.
+        Toplu modda küme verisi noktalar arasında paylaşıldığı için aşamalar iş parçacığında kalır."""
+        if self.shared is not None or not process_pool.eligible(self.config, self.features): return None
+        try:
+            return process_pool.submit(self.features, self.lat, self.lon, self.config)
+        except BrokenProcessPool:
+            process_pool.shutdown()
+            return None
+
+    def _from_remote(self, result):
+        """İşçi çıktısı -> {aşama: sonuç}; işçideki aşama süreleri bu sürecin metriklerine aktarılır."""
+        stages, profile = result
+        metrics.replay(profile)
+        stages["yesil_sosyal"] = (self._extract_ndvi(), stages["yesil_sosyal"])
+        self.distance_to_sea = stages["yesil_sosyal"][1].get("deniz_kenari", EMPTY_POI)["min_dist"]
+        return stages
+
+    async def _await_remote(self, future):
+        try:
+            result = await asyncio.wrap_future(future)
+        except BrokenProcessPool:
+            # Çöken işçi havuzu bozar: havuz sıfırlanır, bu istek iş parçacıklarında tamamlanır
+            print("⚠️  Süreç havuzu çöktü, aşamalar iş parçacıklarında çalışıyor")
+            process_pool.shutdown()
+            fns = self._osm_stage_fns()
+            values = await asyncio.gather(*(asyncio.to_thread(fns[name]) for name in OSM_STAGES))
+            return dict(zip(OSM_STAGES, values))
+        return await asyncio.to_thread(self._from_remote, result)
+
+    def extract(self):
+        """Veri toplama aşaması: skorlamaya yetecek, JSON'a yazılabilir özet (bkz. score_snapshot)."""
+        executor = stage_pool(self.config)
+        # Rakım çağrısı OSM sorgusuyla eşzamanlı başlar (bind: istek profili havuz iş parçacığına taşınır)
+        f_egim = executor.submit(metrics.bind(self._extract_slope))
+        if self.shared is None and not self._try_fetch_features():
+            snapshot = self._snapshot(None, None, (None, None), f_egim.result(), None)
+            snapshot["tamlik"]["osm_veri"] = "hata"
+            return snapshot
+        
+        remote = self._submit_remote()
+        if remote is not None:
+            try:
+                s = self._from_remote(remote.result())
+                return self._snapshot(s["gurultu"], s["yerlesim"], s["yesil_sosyal"], f_egim.result(), s["vibe"])
+            except BrokenProcessPool:
+                print("⚠️  Süreç havuzu çöktü, aşamalar iş parçacıklarında çalışıyor")
+                process_pool.shutdown()
+        
+        # Paralel hesaplama (veri bellekte, ağ çağrısı yok); indeks aşamalardan önce bir kez kurulur
+        self._ensure_index()
+        f1 = executor.submit(metrics.bind(self._extract_noise))
+        f2 = executor.submit(metrics.bind(self._extract_settlement))
+        f3 = executor.submit(metrics.bind(self._extract_green_social))
+        f_vibe = executor.submit(metrics.bind(self._extract_vibe))
+        
+        return self._snapshot(f1.result(), f2.result(), f3.result(), f_egim.result(), f_vibe.result())
+
+    async def extract_async(self, deadline=None, fallback=None):
+        """Async yol: OSM ve rakım upstream sınırları altında eşzamanlı, CPU aşamaları iş parçacıklarında.
+
+        deadline (time.monotonic) verilirse ona yetişmeyen aşamalar beklenmez. Yetişmeyen ya da hata veren
+        aşamalar fallback() -> (son tam özet, yaş_sn) | None ile doldurulur, o da yoksa "eksik" işaretlenir.
+        OSM verisi alınamazsa OSM'e bağlı aşamalar çalışmaz ve "hata" işaretlenir.
+        """
+        egim_task = asyncio.create_task(self._extract_slope_async())
+        osm = "tam"
+        if self.shared is None:
+            # Eşzamanlılık sınırı yalnızca gerçek Overpass çağrısını sarar (bkz. upstream.thread_limit)
+            fetch = asyncio.ensure_future(asyncio.to_thread(self._try_fetch_features))
+            # Bellek içi aşamalara pay bırakılır; süre dolarsa indirme arka planda sürer ve karo önbelleğini ısıtır
+            reserve = self.config.SURE_BUTCESI_AYARLARI["hesaplama_payi_ms"] / 1000
+            if not await _until([fetch], None if deadline is None else deadline - reserve): osm = "sure_asimi"
+            elif not fetch.result(): osm = "hata"
+        
+        stages, remote = {}, None
+        if osm == "tam":
+            # Paketleme (WKB, kod dizileri, paylaşılan bellek kopyası) olay döngüsünü diğer isteklere kapatmasın
+            future = await asyncio.to_thread(self._submit_remote)
+            if future is not None:
+                # Süreç havuzunda dört aşama tek iş: ya hepsi yetişir ya hiçbiri
+                remote = asyncio.ensure_future(self._await_remote(future))
+            else:
+                await asyncio.to_thread(self._ensure_index)
+                fns = self._osm_stage_fns()
+                stages = {name: asyncio.ensure_future(asyncio.to_thread(fns[name])) for name in OSM_STAGES}
+        stages["egim"] = egim_task
+        done = await _until([*stages.values(), *([remote] if remote else [])], deadline)
+        if egim_task not in done: egim_task.cancel()
+        sonuc = {name: task.result() for name, task in stages.items() if task in done}
+        if remote in done: sonuc.update(remote.result())
+        
+        snapshot = self._snapshot(sonuc.get("gurultu"), sonuc.get("yerlesim"), sonuc.get("yesil_sosyal", (None, None)),
+                                  sonuc.get("egim"), sonuc.get("vibe"))
+        tamlik = snapshot["tamlik"]
+        tamlik["osm_veri"] = osm
+        for name in STAGE_FIELDS:
+            if name in sonuc or (osm == "hata" and name in OSM_STAGES): continue
+            tamlik[name] = "sure_asimi"
+        return await self._fill_stale(snapshot, fallback)
 
     def get_final_score(self):
         print("\n🚀 MOTOR BAŞLATILDI (v4.2.0 - Hızlı)")
-        self.detected_places = []
+        sonuc = score_snapshot(self.extract(), self.config)
+        print("✅ MOTOR TAMAMLANDI")
+        return sonuc
+
+    async def get_final_score_async(self):
+        print("\n🚀 MOTOR BAŞLATILDI (v4.2.0 - Async)")
+        sonuc = score_snapshot(await self.extract_async(), self.config)
+        print("✅ MOTOR TAMAMLANDI")
+        return sonuc
+
+
+def run_osm_stages(lat, lon, config, shared):
+    """Süreç havuzu işçisinde: paylaşılan veri üzerinde OSM'e bağlı aşamalar -> ({aşama: sonuç}, profil).
+    NDVI (yerel önbellek okuması) ana süreçte kalır; yesil_sosyal yalnızca tesis özetlerini döndürür."""
+    motor = QualityScorer(lat, lon, config, shared)
+    profile = metrics.start_profile()
+    with metrics.stage_timer("yesil_sosyal"):
+        pois = motor._social_pois()
+    stages = {"gurultu": motor._extract_noise(), "yerlesim": motor._extract_settlement(),
+              "yesil_sosyal": pois, "vibe": motor._extract_vibe()}
+    return stages, profile
+
+
+# --- Saf skorlama (özet + ayarlar -> skor; ağ / disk erişimi yok) ---
+
+def _slope_snapshot(sonuc):
+    if sonuc is None: return None
+    center, egim = sonuc
+    return {"rakim": float(center), "egim": float(egim)}
+
+def _noise_score(data, cfg, details):
+    if data is None: return 100.0
+    if data["total"] is None:
+        details['gurultu'] = {"reason": "Gürültü kaynağı bulunamadı", "closest": None}
+        return 100.0
+    total = data["total"]
+    details['gurultu'] = {
+        "reason": "Sessiz bölge" if total < 500 else "Orta gürültü" if total < 2000 else "Yüksek gürültü",
+        "closest": data["closest"]
+    }
+    return normalize_linear(total, cfg["min_esik"], cfg["max_esik"], ters=True)
+
+def _settlement_score(pois, cfg, details):
+    score = 0
+    weight = 0
+    out = {}
+    
+    for name, settings in cfg["etiketler"].items():
+        data = pois.get(name, EMPTY_POI)
+        min_dist = _dist(data)
+        p = normalize_plateau(min_dist, settings["ideal_limit"], settings["max_limit"])
+        w = cfg["agirliklar"].get(name, 0)
+        score += p * w
+        weight += w
         
-        # Paralel hesaplama
-        with concurrent.futures.ThreadPoolExecutor(max_workers=3) as executor:
-            f1 = executor.submit(self._calculate_noise_score)
-            f2 = executor.submit(self._calculate_settlement_score)
-            f3 = executor.submit(self._calculate_green_social_score)
-            
-            s_gurultu = f1.result()
-            s_yerlesim = f2.result()
-            s_sosyal = f3.result()
+        # Detay kaydet
+        if data["min_dist"] is not None:
+            out[name] = {
+                "distance": int(min_dist),
+                "count": data["count"],
+                "score": round(p, 1),
+                "closest": data["names"][0] if data["names"] else "Bilinmiyor"
+            }
+    
+    details['yerlesim'] = out
+    return score / weight if weight > 0 else 0
+
+def _ndvi_score(data, cfg, details):
+    val = data["value"]
+    details['ndvi'] = {
+        "value": round(val, 2),
+        "level": "Yüksek" if val > 0.4 else "Orta" if val > 0.25 else "Düşük",
+        "source": data["source"]
+    }
+    return normalize_linear(val, cfg["min_esik"], cfg["max_esik"])
+
+def _green_social_score(snapshot, cfg_all, details):
+    cfg = cfg_all["POZITIF_ETKENLER"]
+    s_ndvi = _ndvi_score(snapshot["ndvi"], cfg_all["NDVI"], details)
+    s_poi = 0
+    w_poi = 0
+    out = {}
+    
+    for name, settings in cfg["etiketler"].items():
+        max_r = settings.get("max_mesafe", 1000)
+        data = snapshot["yesil_sosyal"].get(name, EMPTY_POI)
+        found = data["min_dist"] is not None
+        if name == "deniz_kenari" and not found: continue
+        min_dist = _dist(data)
+        
+        p_yakin = normalize_linear(min_dist, 0, max_r, True)
+        p_yogun = min(100, (data["count"]/settings.get("yogunluk_hedefi",1))*100)
+        
+        w_yakin = cfg.get("yakinlik_agirligi", 0.7)
+        w_yogun = cfg.get("yogunluk_agirligi", 0.3)
+        final = 0.0
+        if found:
+            final = (p_yakin * w_yakin) + (p_yogun * w_yogun)
+        
+        w = settings.get("agirlik", 1)
+        s_poi += final * w
+        w_poi += w
+        
+        # Detay kaydet
+        if found:
+            out[name] = {
+                "distance": int(min_dist),
+                "count": data["count"],
+                "closest": data["names"][0] if data["names"] else "Bilinmiyor"
+            }
         
-        # Sıralı hesaplama (daha hızlı)
-        a_egim = self._calculate_slope_analysis()
-        a_vibe = self._calculate_neighborhood_vibe()
+    final_poi = s_poi / w_poi if w_poi > 0 else 0
+    
+    details['sosyal'] = out
+    return (s_ndvi * cfg_all["NDVI"]["agirlik"]) + (final_poi * cfg["agirlik"])
 
-        cfg = self.config.FINAL_AGIRLIKLAR
+def _classify_slope(data, config):
+    if data is None: return {"rakim": "Bilinmiyor", "egim_yuzde": 0, "durum": "Analiz Edilemedi"}
+    center, egim = data["rakim"], data["egim"]
+    
+    cfg = config.EGIM_AYARLARI["kategoriler"]
+    durum = "Bilinmiyor"
+    if egim <= cfg["duz"]["max_egim"]: durum = cfg["duz"]["etiket"]
+    elif egim <= cfg["hafif"]["max_egim"]: durum = cfg["hafif"]["etiket"]
+    elif egim <= cfg["orta"]["max_egim"]: durum = cfg["orta"]["etiket"]
+    else: durum = cfg["dik"]["etiket"]
+    return { "rakim": round(center, 1), "egim_yuzde": round(egim, 1), "durum": durum }
+
+def _neighborhood_vibe(counts, cfg):
+    if counts is None: return {"etiket": "❔ Bilinmiyor", "aciklama": "Mahalle verisi alınamadı."}
+    scores = {"aile": 0, "sosyal": 0, "ticari": 0}
+    scores.update(counts)
+    sorted_s = sorted(scores.items(), key=lambda x: x[1], reverse=True)
+    if sorted_s[0][1] < 3: return {"etiket": "🍃 Sakin / Gelişmekte Olan", "aciklama": "Sessiz bir bölge."}
+    if sorted_s[1][1] > (sorted_s[0][1] * 0.7): return {"etiket": "🔄 Karma Yaşam (Canlı)", "aciklama": "Çok yönlü bir mahalle."}
+    return {"etiket": cfg["kategoriler"][sorted_s[0][0]]["etiket"], "aciklama": cfg["kategoriler"][sorted_s[0][0]]["aciklama"]}
+
+def _dist(data):
+    return float('inf') if data["min_dist"] is None else data["min_dist"]
+
+def _partial_total(alt, weights):
+    """Eksik alt skorlar (None) ağırlıklı ortalamaya girmez; hiçbiri yoksa None."""
+    present = {k: v for k, v in alt.items() if v is not None}
+    total_w = sum(weights[k] for k in present)
+    return sum(v * weights[k] for k, v in present.items()) / total_w if total_w > 0 else None
+
+def score_snapshot(snapshot, config):
+    """Özeti verilen ayarlarla skorlar; get_final_score ile aynı çıktı şeklini döndürür.
+    
+    Eksik aşamaların alt skoru None olur ve genel skor kalan alt skorların ağırlıklı ortalamasıdır.
+    """
+    details = {}
+    eksik = {name for name, flag in snapshot.get("tamlik", {}).items() if flag in MISSING_FLAGS}
+    s_gurultu = None if "gurultu" in eksik else _noise_score(snapshot["gurultu"], config.GURULTU_AYARLARI, details)
+    s_yerlesim = None if "yerlesim" in eksik else _settlement_score(snapshot["yerlesim"], config.YERLESIM_AYARLARI, details)
+    s_sosyal = None if "yesil_sosyal" in eksik else _green_social_score(snapshot, config.YESIL_SOSYAL_AYARLARI, details)
+    
+    cfg = config.FINAL_AGIRLIKLAR
+    if eksik & {"gurultu", "yerlesim", "yesil_sosyal"}:
+        genel = _partial_total({"yesil_sosyal": s_sosyal, "yerlesim": s_yerlesim, "gurultu": s_gurultu}, cfg)
+    else:
         genel = (s_sosyal * cfg["yesil_sosyal"] + s_yerlesim * cfg["yerlesim"] + s_gurultu * cfg["gurultu"])
-        
-        print("✅ MOTOR TAMAMLANDI")
-        return {
-            "genel_skor": genel,
-            "alt_skorlar": { "yesil_sosyal": s_sosyal, "yerlesim": s_yerlesim, "gurultu": s_gurultu },
-            "ekstra_analiz": { "egim": a_egim, "vibe": a_vibe },
-            "mekanlar": self.detected_places,
-            "detaylar": self.score_details  # YENI!
-        }
+    
+    mekanlar = [p for group in ("yerlesim", "yesil_sosyal") for data in (snapshot[group] or {}).values() for p in data["places"]]
+    return {
+        "genel_skor": genel,
+        "alt_skorlar": { "yesil_sosyal": s_sosyal, "yerlesim": s_yerlesim, "gurultu": s_gurultu },
+        "ekstra_analiz": { "egim": _classify_slope(snapshot["egim"], config), "vibe": _neighborhood_vibe(snapshot["vibe"], config.VIBE_AYARLARI) },
+        "mekanlar": mekanlar,
+        "detaylar": details  # YENI!
+    }
@@ -0,0 +1,24 @@
+# singleflight.py
+# (v1.0.0 - Eşzamanlı İstek Birleştirme)
+
+import asyncio
+
+
+class SingleFlight:
+    def __init__(self):
+        """Aynı anahtar için aynı anda gelen çağrılar tek bir hesaplamayı paylaşır."""
+        self._inflight = {}
+
+    async def do(self, key, coro_fn):
+        """(sonuç, paylaşıldı_mı) döndürür. coro_fn sadece anahtar için uçuşta iş yoksa çağrılır."""
+        task = self._inflight.get(key)
+        shared = task is not None
+        if task is None:
+            task = asyncio.ensure_future(coro_fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Bekleyenlerden biri iptal edilirse ortak hesaplama iptal olmasın
+        return await asyncio.shield(task), shared
+
+    def __len__(self):
+        return len(self._inflight)
@@ -0,0 +1,127 @@
+# snapshot.py
+# (v1.0.0 - Özellik Özeti Deposu ve Özel Ağırlıklar)
+# QualityScorer.extract() çıktısını (kategori mesafeleri, adetler, gürültü toplamı, rakım, vibe sayıları)
+# mekansal hücre + veri toplama ayarlarının parmak izi ile saklar. /yeniden-skorla bu özeti
+# kullanıcının ağırlıklarıyla scorer.score_snapshot'tan geçirir; ağ / OSM erişimi olmaz.
+
+import copy
+import hashlib
+import json
+import math
+import time
+import types
+
+import cache_manager
+from scorer import SNAPSHOT_VERSION, is_storable
+
+DATA_TYPE = "ozet"
+
+# Skorlamayı etkileyen bölümler; ağırlık anahtarları parmak izine girmez (ağırlık değişince özet geçerli kalır)
+SECTIONS = ("YESIL_SOSYAL_AYARLARI", "YERLESIM_AYARLARI", "GURULTU_AYARLARI",
+            "EGIM_AYARLARI", "VIBE_AYARLARI", "FINAL_AGIRLIKLAR")
+WEIGHT_KEYS = {"agirlik", "agirliklar", "yakinlik_agirligi", "yogunluk_agirligi", "FINAL_AGIRLIKLAR"}
+
+_fingerprints = {}
+
+
+def _strip_weights(value):
+    if isinstance(value, dict):
+        return {k: _strip_weights(v) for k, v in value.items() if k not in WEIGHT_KEYS}
+    return value
+
+
+def extraction_fingerprint(config):
+    """Veri toplamayı etkileyen ayarların (etiketler, yarıçaplar, eşikler) özeti."""
+    # Nesne de saklanır: serbest kalan bir ayar nesnesinin id'si yenisine verilirse eski özet dönmesin
+    hit = _fingerprints.get(id(config))
+    if hit is None or hit[0] is not config:
+        data = _strip_weights({name: getattr(config, name, None) for name in SECTIONS})
+        raw = json.dumps(data, sort_keys=True, ensure_ascii=False)
+        hit = _fingerprints[id(config)] = (config, hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16])
+    return hit[1]
+
+
+def snapshot_id(lat, lon, config):
+    size = config.OZET_AYARLARI["hucre_boyutu"]
+    return f"{math.floor(lat / size)}_{math.floor(lon / size)}:{extraction_fingerprint(config)}"
+
+
+def put(snapshot, config):
+    """Özeti saklar ve kimliğini döndürür (kayıt kapalıysa da kimlik döner).
+    Süre aşımlı / bayat veriyle doldurulmuş özet saklanmaz, None döner."""
+    if not is_storable(snapshot): return None
+    key = snapshot_id(snapshot["lat"], snapshot["lon"], config)
+    if config.OZET_AYARLARI["aktif"]:
+        cache_manager.set_value(key, DATA_TYPE, snapshot)
+    return key
+
+
+def get(key, config):
+    """Özet ya da None (yok, süresi dolmuş, eski biçim veya başka ayarlarla toplanmış)."""
+    if not key.endswith(":" + extraction_fingerprint(config)): return None
+    snapshot = cache_manager.get_value(key, DATA_TYPE, config.OZET_AYARLARI["ttl_saat"] * 3600)
+    if snapshot is None or snapshot.get("surum") != SNAPSHOT_VERSION: return None
+    return snapshot
+
+
+def latest(lat, lon, config):
+    """Hücrenin son kayıtlı özeti ve yaşı (sn), TTL'e bakılmaz: süre aşımı / hata veren aşamalar için bayat yedek."""
+    if not config.OZET_AYARLARI["aktif"]: return None
+    entry = cache_manager.get_entry(snapshot_id(lat, lon, config), DATA_TYPE)
+    if entry is None or entry[0].get("surum") != SNAPSHOT_VERSION: return None
+    return entry[0], time.time() - entry[1]
+
+
+# --- Özel ağırlıklar ---
+
+def _number(value, name):
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value) or value < 0:
+        raise ValueError(f"{name} negatif olmayan bir sayı olmalı")
+    return float(value)
+
+
+def _weights(given, allowed, name):
+    if not isinstance(given, dict): raise ValueError(f"{name} bir sözlük olmalı")
+    unknown = set(given) - set(allowed)
+    if unknown: raise ValueError(f"{name} içinde bilinmeyen anahtar: {', '.join(sorted(unknown))} "
+                                 f"(geçerli: {', '.join(allowed)})")
+    return {k: _number(v, f"{name}.{k}") for k, v in given.items()}
+
+
+def _normalized(weights, name):
+    total = sum(weights.values())
+    if total <= 0: raise ValueError(f"{name} ağırlıklarının toplamı sıfırdan büyük olmalı")
+    return {k: v / total for k, v in weights.items()}
+
+
+def with_weights(config, agirliklar):
+    """Ayarların ağırlıkları değiştirilmiş kopyası (config modülü değişmez). Geçersiz girdide ValueError.
+
+    agirliklar anahtarları:
+      genel: {"yesil_sosyal", "yerlesim", "gurultu"} - göreli öncelik, toplamı 1'e ölçeklenir
+      yerlesim: {"okul", "saglik", ...} - kategori ağırlıkları
+      yesil_sosyal: {"deniz_kenari", "market", ...} - kategori ağırlıkları
+      ndvi / tesisler: yeşil-sosyal içinde uydu yeşilliği ile tesislerin payı (birlikte 1'e ölçeklenir)
+    """
+    if not isinstance(agirliklar, dict): raise ValueError("agirliklar bir sözlük olmalı")
+    unknown = set(agirliklar) - {"genel", "yerlesim", "yesil_sosyal", "ndvi", "tesisler"}
+    if unknown: raise ValueError(f"Bilinmeyen ağırlık grubu: {', '.join(sorted(unknown))}")
+
+    out = types.SimpleNamespace(**{name: copy.deepcopy(getattr(config, name)) for name in SECTIONS})
+    if "genel" in agirliklar:
+        given = _weights(agirliklar["genel"], list(out.FINAL_AGIRLIKLAR), "genel")
+        out.FINAL_AGIRLIKLAR = _normalized({**out.FINAL_AGIRLIKLAR, **given}, "genel")
+    if "yerlesim" in agirliklar:
+        cfg = out.YERLESIM_AYARLARI
+        cfg["agirliklar"].update(_weights(agirliklar["yerlesim"], list(cfg["etiketler"]), "yerlesim"))
+    if "yesil_sosyal" in agirliklar:
+        etiketler = out.YESIL_SOSYAL_AYARLARI["POZITIF_ETKENLER"]["etiketler"]
+        for name, w in _weights(agirliklar["yesil_sosyal"], list(etiketler), "yesil_sosyal").items():
+            etiketler[name]["agirlik"] = w
+    if "ndvi" in agirliklar or "tesisler" in agirliklar:
+        cfg = out.YESIL_SOSYAL_AYARLARI
+        pay = {"ndvi": cfg["NDVI"]["agirlik"], "tesisler": cfg["POZITIF_ETKENLER"]["agirlik"]}
+        pay.update({k: _number(agirliklar[k], k) for k in ("ndvi", "tesisler") if k in agirliklar})
+        pay = _normalized(pay, "ndvi/tesisler")
+        cfg["NDVI"]["agirlik"], cfg["POZITIF_ETKENLER"]["agirlik"] = pay["ndvi"], pay["tesisler"]
+    return out
@@ -0,0 +1,93 @@
+# spatial_index.py
+# (v1.0.0 - STRtree Mekansal İndeks)
+# Çekilen OSM verisi üzerinde kategori bazlı "en yakın k", "r içinde kaç tane" ve "r içindekiler" sorguları.
+# Mesafeler, GEOMETRI_AYARLARI verildiyse çok köşeli geometrilerde basitlestirme_m toleransıyla ölçülür.
+
+import json
+
+import numpy as np
+import shapely
+from shapely import STRtree
+
+import geometry_cache
+import osm_fetcher
+
+_EMPTY = (np.empty(0, dtype=np.intp), np.empty(0, dtype=float))
+
+
+class FeatureIndex:
+    def __init__(self, gdf, geometry_settings=None):
+        """gdf: UTM'e çevrilmiş birleşik OSM verisi (sorgu noktaları da aynı CRS'te olmalı).
+        geometry_settings (GEOMETRI_AYARLARI): çok köşeli geometriler sadeleştirilmiş halleriyle indekslenir."""
+        self.gdf = gdf
+        self.geoms = geometry_cache.simplified(gdf, np.asarray(gdf.geometry.values, dtype=object), geometry_settings)
+        shapely.prepare(self.geoms)
+        self._trees = {}
+
+    def _category(self, osm_tags):
+        """Kategori (etiket filtresi) başına tembel kurulan STRtree ve satır pozisyonları."""
+        key = json.dumps(osm_tags, sort_keys=True)
+        if key not in self._trees:
+            if self.gdf.empty:
+                positions = _EMPTY[0]
+            else:
+                positions = np.flatnonzero(osm_fetcher.tag_mask(self.gdf, osm_tags).to_numpy())
+            self._trees[key] = (STRtree(self.geoms[positions]), positions)
+        return self._trees[key]
+
+    def within(self, point, osm_tags, radius):
+        """r içindeki tüm kayıtlar: (gdf pozisyonları, mesafeler), mesafeye göre sıralı."""
+        tree, positions = self._category(osm_tags)
+        if not len(positions): return _EMPTY
+        idx = tree.query(point, predicate="dwithin", distance=radius)
+        if not len(idx): return _EMPTY
+        dists = shapely.distance(point, tree.geometries[idx])
+        order = np.argsort(dists, kind="stable")
+        return positions[idx[order]], dists[order]
+
+    def count_within(self, point, osm_tags, radius):
+        tree, positions = self._category(osm_tags)
+        if not len(positions): return 0
+        return len(tree.query(point, predicate="dwithin", distance=radius))
+
+    def nearest(self, point, osm_tags, k=1):
+        """En yakın k kayıt: (gdf pozisyonları, mesafeler), mesafeye göre sıralı."""
+        tree, positions = self._category(osm_tags)
+        if not len(positions): return _EMPTY
+        idx, d = tree.query_nearest(point, return_distance=True, all_matches=False)
+        if k == 1: return positions[idx], d  # Tek nokta sorgusunda idx ağaç indekslerinin 1-B dizisidir
+
+        # Yarıçapı en az k kayıt kapsayana kadar büyüt
+        radius = max(float(d[0]) * 2, 50.0)
+        while True:
+            hit = tree.query(point, predicate="dwithin", distance=radius)
+            if len(hit) >= k or len(hit) == len(positions): break
+            radius *= 2
+        dists = shapely.distance(point, tree.geometries[hit])
+        order = np.argsort(dists, kind="stable")[:k]
+        return positions[hit[order]], dists[order]
+
+    # --- Çok noktalı (grid) sorgular ---
+
+    def nearest_distances(self, points, osm_tags, max_distance=None):
+        """Her nokta için kategorideki en yakın kayda mesafe; max_distance içinde yoksa inf."""
+        tree, positions = self._category(osm_tags)
+        out = np.full(len(points), np.inf)
+        if not len(positions): return out
+        (pi, _), d = tree.query_nearest(points, max_distance=max_distance, return_distance=True, all_matches=False)
+        out[pi] = d
+        return out
+
+    def counts_within(self, points, osm_tags, radius):
+        """Her nokta için r içindeki kayıt sayısı."""
+        tree, positions = self._category(osm_tags)
+        if not len(positions): return np.zeros(len(points), dtype=np.int64)
+        pi, _ = tree.query(points, predicate="dwithin", distance=radius)
+        return np.bincount(pi, minlength=len(points))
+
+    def pairs_within(self, points, osm_tags, radius):
+        """r içindeki tüm (nokta indeksi, gdf pozisyonu, mesafe) çiftleri."""
+        tree, positions = self._category(osm_tags)
+        if not len(positions): return _EMPTY[0], _EMPTY[0], _EMPTY[1]
+        pi, ti = tree.query(points, predicate="dwithin", distance=radius)
+        return pi, positions[ti], shapely.distance(points[pi], tree.geometries[ti])
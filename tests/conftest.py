@@ -0,0 +1,8 @@
+# Testler depo kökündeki düz modülleri içe aktarır. cache_manager / tile_cache içe aktarılırken çalışma
+# dizininde SQLite dosyası açtığından oturum geçici bir dizinde çalışır.
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(tempfile.mkdtemp(prefix="yasam_skoru_test_"))
@@ -0,0 +1,114 @@
+import asyncio
+import json
+
+import pytest
+
+import api
+import batch_scorer
+
+
+@pytest.fixture(autouse=True)
+def fake_scoring(monkeypatch):
+    def score_cluster(members, config, comment_fn=None):
+        return [{"sira": i, "durum": "basarili", "koordinat": {"lat": lat, "lon": lon}} for i, lat, lon in members]
+    monkeypatch.setattr(batch_scorer, "score_cluster", score_cluster)
+
+
+def _scope():
+    return {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST", "scheme": "http",
+            "path": "/hesapla/toplu", "raw_path": b"/hesapla/toplu", "query_string": b"", "root_path": "",
+            "headers": [(b"content-type", b"application/x-ndjson")], "client": ("test", 1), "server": ("test", 80)}
+
+
+async def _call(chunks, wait_for_first_row=False):
+    """chunks'ı gövde parçaları olarak gönderir; wait_for_first_row ise son parçayı ilk sonuç satırı gelince yollar."""
+    incoming, sent, first_row = asyncio.Queue(), [], asyncio.Event()
+    for chunk in chunks[:-1]: incoming.put_nowait({"type": "http.request", "body": chunk, "more_body": True})
+
+    async def receive():
+        return await incoming.get()
+
+    async def send(message):
+        sent.append(message)
+        if message.get("body"): first_row.set()
+
+    app = asyncio.ensure_future(api.app(_scope(), receive, send))
+    if wait_for_first_row: await asyncio.wait_for(first_row.wait(), 5)
+    incoming.put_nowait({"type": "http.request", "body": chunks[-1], "more_body": False})
+    await asyncio.wait_for(app, 5)
+    status = next(m["status"] for m in sent if m["type"] == "http.response.start")
+    body = b"".join(m.get("body", b"") for m in sent if m["type"] == "http.response.body")
+    return status, [json.loads(line) for line in body.decode().splitlines()]
+
+
+def _ndjson(points):
+    return "".join(json.dumps({"lat": lat, "lon": lon}) + "\n" for lat, lon in points).encode()
+
+
+def test_results_stream_before_upload_finishes():
+    status, rows = asyncio.run(_call([_ndjson([(41.0, 29.0), (41.5, 29.5)]), _ndjson([(40.0, 28.0)])],
+                                     wait_for_first_row=True))
+    assert status == 200
+    assert sorted(r["sira"] for r in rows) == [0, 1, 2]
+    assert next(r for r in rows if r["sira"] == 2)["koordinat"] == {"lat": 40.0, "lon": 28.0}
+
+
+def test_lines_split_across_chunks_and_utf8_boundaries():
+    body = "lat,lon,ad\n41.0,29.0,Çarşı\n40.5,28.5,Şişli\n".encode()
+    cut = body.index("Ç".encode()) + 1  # Çok baytlı karakterin ortası
+    status, rows = asyncio.run(_call([body[:cut], body[cut:]]))
+    assert status == 200 and sorted(r["sira"] for r in rows) == [0, 1]
+
+
+def test_json_document_is_read_whole():
+    body = json.dumps({"koordinatlar": [[41.0, 29.0], [40.0, 28.0]]}, indent=2).encode()
+    status, rows = asyncio.run(_call([body[:10], body[10:]]))
+    assert status == 200 and len(rows) == 2
+
+
+def test_invalid_first_line_is_400():
+    status, _ = asyncio.run(_call([b'{"lat": 41.0}\n', b""]))
+    assert status == 400
+
+
+def test_too_many_points_in_first_chunk_is_413(monkeypatch):
+    monkeypatch.setitem(api.cfg.TOPLU_AYARLARI, "max_nokta", 1)
+    status, _ = asyncio.run(_call([_ndjson([(41.0, 29.0), (40.0, 28.0)]), b""]))
+    assert status == 413
+
+
+def test_errors_after_streaming_started_end_with_error_row(monkeypatch):
+    monkeypatch.setitem(api.cfg.TOPLU_AYARLARI, "max_nokta", 2)
+    status, rows = asyncio.run(_call([_ndjson([(41.0, 29.0)]), b'{"lat": "x", "lon": 1}\n'], wait_for_first_row=True))
+    assert status == 200 and rows[0]["sira"] == 0 and rows[-1]["durum"] == "hata"
+    status, rows = asyncio.run(_call([_ndjson([(41.0, 29.0)]), _ndjson([(40.0, 28.0), (39.0, 27.0)])],
+                                     wait_for_first_row=True))
+    assert [r.get("sira") for r in rows] == [0, None] and "En fazla 2" in rows[-1]["hata"]
+
+
+def test_disconnect_after_upload_stops_streaming(monkeypatch):
+    release = __import__("threading").Event()
+
+    def slow_cluster(members, config, comment_fn=None):
+        release.wait(5)
+        return [{"sira": i, "durum": "basarili"} for i, _, _ in members]
+
+    monkeypatch.setattr(batch_scorer, "score_cluster", slow_cluster)
+
+    async def run():
+        messages = [{"type": "http.request", "body": _ndjson([(41.0, 29.0)]), "more_body": False},
+                    {"type": "http.disconnect"}]
+
+        async def receive():
+            return messages.pop(0) if messages else await asyncio.Event().wait()
+
+        sent = []
+        async def send(message): sent.append(message)
+        await asyncio.wait_for(api.app(_scope(), receive, send), 2)
+        return sent
+
+    try:
+        sent = asyncio.run(run())
+    finally:
+        release.set()
+    assert not any(m.get("body") for m in sent)
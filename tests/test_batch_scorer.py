@@ -0,0 +1,48 @@
+import pytest
+
+from batch_scorer import cluster_points, parse_points
+
+EXPECTED = [(41.0, 29.0), (40.99, 28.98)]
+
+
+@pytest.mark.parametrize("text", [
+    '[{"lat": 41.0, "lon": 29.0}, {"lat": 40.99, "lon": 28.98}]',
+    '[[41.0, 29.0], [40.99, 28.98]]',
+    '{"koordinatlar": [{"lat": 41.0, "lon": 29.0}, {"lat": 40.99, "lon": 28.98}]}',
+    '{"lat": 41.0, "lon": 29.0}\n{"lat": 40.99, "lon": 28.98}\n',
+    'lat,lon\n41.0,29.0\n40.99,28.98\n',
+    '  \n[{"lat": "41.0", "lon": "29.0"}, [40.99, 28.98]]  ',
+])
+def test_parse_points_formats(text):
+    assert parse_points(text) == EXPECTED
+
+
+def test_single_line_ndjson_is_one_point():
+    assert parse_points('{"lat":41.0,"lon":29.0}') == [(41.0, 29.0)]
+    assert parse_points('{"lat":41.0,"lon":29.0}\n') == [(41.0, 29.0)]
+
+
+@pytest.mark.parametrize("text", ["", "   \n", "[]", '{"koordinatlar": []}'])
+def test_empty_inputs(text):
+    assert parse_points(text) == []
+
+
+@pytest.mark.parametrize("text, error", [
+    ('{"enlem": 41.0, "boylam": 29.0}', ValueError),
+    ('{"lat": 41.0}', ValueError),
+    ('[{"lat": 41.0}]', KeyError),
+    ('[[41.0]]', IndexError),
+    ('{"lat": 41.0, "lon": 29.0}\n{bozuk', ValueError),
+    ('lat,lon\nabc,29\n', ValueError),
+])
+def test_invalid_inputs_raise(text, error):
+    with pytest.raises(error):
+        parse_points(text)
+
+
+def test_cluster_points_groups_by_cell_and_splits_large_cells():
+    points = [(41.0001, 29.0001), (41.0002, 29.0002), (41.0003, 29.0003), (42.5, 30.5)]
+    clusters = cluster_points(points, cell_deg=0.01, max_points=2)
+    assert sorted(len(c) for c in clusters) == [1, 1, 2]
+    assert sorted(i for c in clusters for i, _, _ in c) == [0, 1, 2, 3]
+    assert all(len({(int(lat / 0.01), int(lon / 0.01)) for _, lat, lon in c}) == 1 for c in clusters)
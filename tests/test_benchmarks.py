@@ -0,0 +1,84 @@
+import copy
+import json
+import os
+import sys
+
+import pytest
+
+BENCH_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks")
+sys.path.insert(0, BENCH_DIR)
+
+import fixtures  # noqa: E402
+import replay_server  # noqa: E402
+import run  # noqa: E402
+from scenarios import KAPSAMA_DERECE, SENARYOLAR  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def baseline():
+    with open(os.path.join(BENCH_DIR, "baseline.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+
+@pytest.fixture(scope="module")
+def store():
+    return replay_server.FixtureStore()
+
+
+def test_committed_fixtures_match_synthetic_generator():
+    """Etiketler (config) değişirse fikstürler ve baseline yeniden üretilmeli."""
+    import config
+    assert fixtures.load("manifest.json")["kaynak"] == "sentetik"
+    assert fixtures.load("overpass.json.gz") == json.loads(json.dumps(fixtures.build_synthetic(config), sort_keys=True))
+
+
+def test_baseline_measured_on_committed_fixtures(baseline):
+    assert baseline["fikstur"] == fixtures.fixture_hash()
+    assert set(baseline["tek_nokta"]) == {s["ad"] for s in SENARYOLAR}
+    assert baseline["hesapla"]["durumlar"] == {"200": baseline["hesapla"]["istek"]}
+
+
+def test_compare_identical_run_passes(baseline, capsys):
+    assert run.compare(baseline, copy.deepcopy(baseline), 15.0)
+
+
+def test_compare_flags_latency_regression(baseline, capsys):
+    current = copy.deepcopy(baseline)
+    current["hesapla"]["gecikme_ms"]["p50"] *= 1.5
+    assert not run.compare(baseline, current, 15.0)
+    assert "❌" in capsys.readouterr().out
+
+
+def test_compare_ignores_small_absolute_changes(baseline, capsys):
+    current = copy.deepcopy(baseline)
+    stages = current["tek_nokta"]["kirsal"]["asamalar_ms"]
+    stage = min(stages, key=stages.get)
+    stages[stage] += run.MIN_FARK_MS / 2
+    assert run.compare(baseline, current, 15.0)
+
+
+def test_compare_flags_score_change(baseline, capsys):
+    current = copy.deepcopy(baseline)
+    current["tek_nokta"]["sahil"]["skor"] += 1
+    assert not run.compare(baseline, current, 15.0)
+    assert "Skor değişti" in capsys.readouterr().out
+
+
+def test_replay_overpass_applies_bbox_and_tags(store):
+    s = SENARYOLAR[0]
+    south, west = s["lat"] - 0.02, s["lon"] - 0.02
+    north, east = s["lat"] + 0.02, s["lon"] + 0.02
+    key, value = next(iter(store.tagged_nodes[0]["tags"].items()))
+    poly = f"{south} {west} {south} {east} {north} {east} {north} {west}"
+    query = f"[out:json];(node['{key}'='{value}'](poly:'{poly}');way['{key}'='{value}'](poly:'{poly}'););out;"
+    tagged = [el for el in store.overpass(query)["elements"] if el.get("tags")]
+    expected = [el for el in store.tagged_nodes if el["tags"].get(key) == value
+                and south <= el["lat"] <= north and west <= el["lon"] <= east]
+    assert expected and all(el["tags"].get(key) == value for el in tagged)
+    assert {el["id"] for el in expected} == {el["id"] for el in tagged if el["type"] == "node"}
+
+
+def test_replay_elevation_is_synthetic_surface(store):
+    s = SENARYOLAR[0]
+    lats, lons = [s["lat"], s["lat"] + KAPSAMA_DERECE / 2], [s["lon"], s["lon"]]
+    assert store.elevations(lats, lons) == [fixtures.synthetic_elevation(a, o) for a, o in zip(lats, lons)]
@@ -0,0 +1,106 @@
+import random
+
+import numpy as np
+import pytest
+
+import cell_key
+
+POINTS = [(41.0369, 28.985), (-33.86, 151.2), (0.0, 0.0), (89.9999, 179.9999), (-90.0, -180.0), (40.964, -73.95)]
+
+
+@pytest.mark.parametrize("lat, lon", POINTS)
+@pytest.mark.parametrize("level", [0, 1, 13, 16, 30])
+def test_cell_contains_point_and_round_trips(lat, lon, level):
+    cell = cell_key.cell_id(lat, lon, level)
+    assert cell_key.level(cell) == level
+    min_lon, min_lat, max_lon, max_lat = cell_key.bounds(cell)
+    assert min_lat <= lat <= max_lat and min_lon <= lon <= max_lon
+    z, x, y = cell_key.decode(cell)
+    assert (z, x, y) == (level, *cell_key._indices(lat, lon, level))
+    assert 0 < cell < 2 ** 62
+
+
+def test_numpy_ids_match_scalar():
+    rng = random.Random(1)
+    pts = [(rng.uniform(-90, 90), rng.uniform(-180, 180)) for _ in range(500)] + POINTS
+    lats, lons = zip(*pts)
+    for level in (5, 16, 30):
+        ids = cell_key.cell_ids(lats, lons, level)
+        assert ids.dtype == np.int64
+        assert ids.tolist() == [cell_key.cell_id(a, o, level) for a, o in pts]
+
+
+def test_parent_children_and_ranges():
+    cell = cell_key.cell_id(41.0369, 28.985, 16)
+    kids = cell_key.children(cell)
+    assert len(kids) == 4 and len(set(kids)) == 4
+    for kid in kids:
+        assert cell_key.level(kid) == 17
+        assert cell_key.parent(kid) == cell
+        assert cell_key.contains(cell, kid)
+        assert cell_key.range_min(cell) <= cell_key.range_min(kid) <= cell_key.range_max(kid) <= cell_key.range_max(cell)
+    assert cell_key.parent(cell, 3) == cell_key.cell_id(41.0369, 28.985, 3)
+    assert cell_key.parent(cell, 16) == cell
+    with pytest.raises(ValueError):
+        cell_key.parent(cell, 17)
+
+
+def test_descendants_of_point_fall_in_ancestor_range():
+    lat, lon = 40.9640, 29.0630
+    cells = [cell_key.cell_id(lat, lon, z) for z in range(31)]
+    for z, ancestor in enumerate(cells):
+        for deeper in cells[z:]:
+            assert cell_key.contains(ancestor, deeper)
+    other = cell_key.cell_id(lat + 0.01, lon, 16)
+    assert not cell_key.contains(cells[16], other)
+
+
+def test_finest_level_has_no_children_and_invalid_level_rejected():
+    with pytest.raises(ValueError):
+        cell_key.children(cell_key.cell_id(1.0, 1.0, cell_key.MAX_LEVEL))
+    with pytest.raises(ValueError):
+        cell_key.cell_id(1.0, 1.0, cell_key.MAX_LEVEL + 1)
+
+
+def test_neighbors_are_adjacent_and_wrap_longitude():
+    cell = cell_key.cell_id(41.0, 29.0, 12)
+    z, x, y = cell_key.decode(cell)
+    found = {cell_key.decode(c)[1:] for c in cell_key.neighbors(cell)}
+    assert found == {(x + dx, y + dy) for dx, dy in cell_key.YONLER}
+
+    east_edge = cell_key.cell_id(10.0, 179.99, 8)
+    west_edge = cell_key.cell_id(10.0, -179.99, 8)
+    assert west_edge in cell_key.neighbors(east_edge)
+
+    pole = cell_key.neighbors(cell_key.cell_id(89.99, 0.0, 8))
+    assert len(pole) == 5  # Kuzey kutbunda üst sıra kesilir
+
+
+def test_center_is_inside_cell():
+    cell = cell_key.cell_id(-12.5, 130.25, 16)
+    assert cell_key.cell_id(*cell_key.center(cell), 16) == cell
+
+
+# --- cache_manager.lookup_cell: hücre -> komşu -> ata ---
+
+SETTINGS = {"seviye": 16, "min_seviye": 13, "min_komsu": 2}
+
+
+def test_lookup_cell_exact_neighbor_and_parent():
+    import cache_manager
+    lat, lon = 41.0369, 28.985
+    cell = cell_key.cell_id(lat, lon, 16)
+    n1, n2 = cell_key.neighbors(cell)[:2]
+
+    cache_manager.set_cells([(n1, "test_komsu", 0.2)])
+    assert cache_manager.lookup_cell(lat, lon, "test_komsu", SETTINGS) == (None, None)  # Tek komşu yetmez
+    cache_manager.set_cells([(n2, "test_komsu", 0.4)])
+    value, source = cache_manager.lookup_cell(lat, lon, "test_komsu", SETTINGS)
+    assert source == "komsu" and 0.2 < value < 0.4
+    cache_manager.set_cells([(cell, "test_komsu", 0.9)])
+    assert cache_manager.lookup_cell(lat, lon, "test_komsu", SETTINGS) == (0.9, "hucre")
+
+    cache_manager.set_cells([(cell_key.parent(cell, 14), "test_ata", 0.5)])
+    cache_manager.flush()
+    assert cache_manager.lookup_cell(lat, lon, "test_ata", SETTINGS) == (0.5, "ust")
+    assert cache_manager.lookup_cell(lat, lon, "test_ata", {**SETTINGS, "min_seviye": 15}) == (None, None)
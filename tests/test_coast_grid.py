@@ -0,0 +1,22 @@
+import numpy as np
+from rasterio.transform import from_origin
+
+import coast_grid
+import projection
+
+
+def test_array_read_matches_point_read(tmp_path):
+    crs = projection.utm_crs(41.0, 29.0)
+    x0, y0 = projection.transformer(projection.WGS84, crs).transform(28.99, 41.01)
+    rng = np.random.default_rng(1)
+    data = (rng.random((20, 30)) * 3000).astype(np.float32)
+    data[3, 4] = np.nan
+    coast_grid.write(tmp_path / "kiyi.tif", data, from_origin(x0, y0, 25, 25), crs, 3000)
+    grid = coast_grid.CoastGrid(tmp_path / "kiyi.tif")
+
+    lats, lons = 41.01 - rng.random(2000) * 0.006, 28.99 + rng.random(2000) * 0.012
+    values = grid.distances_at(lats, lons)
+    assert np.isnan(values).any() and (~np.isnan(values)).any()
+    for value, lat, lon in zip(values, lats, lons):
+        single = grid.distance_at(lat, lon)
+        assert (single is None and np.isnan(value)) or single == value
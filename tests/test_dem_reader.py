@@ -0,0 +1,49 @@
+import math
+
+import numpy as np
+import pytest
+import rasterio
+from rasterio.transform import from_origin
+from rasterio.warp import transform
+
+import dem_reader
+
+PIXEL_M = 30.0
+
+
+def _write_dem(path, data, nodata=None):
+    with rasterio.open(path, "w", driver="GTiff", width=data.shape[1], height=data.shape[0], count=1,
+                       dtype=data.dtype, crs="EPSG:32635", transform=from_origin(500000, 4540000, PIXEL_M, PIXEL_M),
+                       nodata=nodata, tiled=True, blockxsize=16, blockysize=16) as dst:
+        dst.write(data, 1)
+    return dem_reader.DemReader(str(path))
+
+
+def _plane(shape, gx, gy, base):
+    rows, cols = np.mgrid[0:shape[0], 0:shape[1]]
+    return base + gx * cols * PIXEL_M - gy * rows * PIXEL_M
+
+
+def _latlon(reader, row, col):
+    x, y = reader.ds.xy(row, col)
+    lon, lat = transform(reader.ds.crs, "EPSG:4326", [x], [y])
+    return lat[0], lon[0]
+
+
+@pytest.mark.parametrize("dtype, nodata", [(np.int16, None), (np.int16, -32768), (np.float32, None)])
+def test_slope_near_edge_ignores_cells_outside_raster(tmp_path, dtype, nodata):
+    gx, gy = 0.2, 0.1  # %22.36 eğimli düzlem
+    reader = _write_dem(tmp_path / "dem.tif", np.round(_plane((64, 64), gx, gy, 1000)).astype(dtype), nodata)
+    lat, lon = _latlon(reader, 1, 1)  # Pencere raster dışına taşar
+    center, slope = reader.slope_at(lat, lon, 150)
+    assert slope == pytest.approx(math.hypot(gx, gy) * 100, rel=0.02)
+    assert center == pytest.approx(reader.ds.read(1)[1, 1])
+
+
+def test_nodata_cells_are_skipped(tmp_path):
+    data = np.round(_plane((64, 64), 0.1, 0.0, 500)).astype(np.int16)
+    data[30:34, 20:40] = -32768
+    reader = _write_dem(tmp_path / "dem.tif", data, -32768)
+    center, slope = reader.slope_at(*_latlon(reader, 28, 30), 150)
+    assert slope == pytest.approx(10.0, rel=0.02)
+    assert reader.slope_at(*_latlon(reader, 31, 30), 150) is None
@@ -0,0 +1,35 @@
+import copy
+import types
+
+import pytest
+
+import config
+import result_cache
+import snapshot
+
+
+def _config(**changes):
+    names = set(result_cache.SCORING_SECTIONS) | set(snapshot.SECTIONS)
+    cfg = types.SimpleNamespace(**{n: copy.deepcopy(getattr(config, n, None)) for n in names})
+    for name, value in changes.items(): setattr(cfg, name, value)
+    return cfg
+
+
+@pytest.mark.parametrize("module, fingerprint", [(result_cache, result_cache.config_fingerprint),
+                                                 (snapshot, snapshot.extraction_fingerprint)])
+def test_reused_id_does_not_return_stale_fingerprint(module, fingerprint):
+    old, new = _config(), _config()
+    for name in module.SCORING_SECTIONS if module is result_cache else module.SECTIONS:
+        setattr(new, name, {"farkli": True})
+    expected = fingerprint(new)
+    module._fingerprints.clear()
+    # Serbest kalan eski nesnenin id'si yeni nesneye verilmiş gibi: aynı anahtarda başka bir nesnenin özeti var
+    module._fingerprints[id(new)] = (old, fingerprint(old))
+    assert fingerprint(new) == expected != fingerprint(old)
+
+
+def test_fingerprint_is_memoized_per_object():
+    cfg = _config()
+    first = result_cache.config_fingerprint(cfg)
+    assert result_cache._fingerprints[id(cfg)] == (cfg, first)
+    assert result_cache.config_fingerprint(cfg) is first
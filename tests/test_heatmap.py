@@ -0,0 +1,44 @@
+import types
+
+import numpy as np
+import pytest
+
+import config
+import heatmap
+
+
+class FakeGrid:
+    def __init__(self, values, max_distance):
+        self.values, self.max_distance = np.asarray(values, dtype=float), max_distance
+
+    def distances_at(self, lats, lons):
+        return self.values
+
+
+@pytest.mark.parametrize("resolution", [0, -50, 5])
+def test_resolution_below_floor_is_rejected(resolution):
+    with pytest.raises(ValueError):
+        heatmap.render_geotiff((28.99, 40.99, 29.01, 41.01), config, resolution)
+
+
+def test_coast_grid_overrides_geometry_like_scorer(monkeypatch):
+    # Sırasıyla: grid dışı, max_r içinde, max_r ile arama yarıçapı arası, arama yarıçapı ötesi, grid üst sınırı
+    geom_d, geom_c = np.array([120.0, 50.0, 50.0, 50.0, 50.0]), np.array([2, 3, 3, 3, 3])
+    grid = FakeGrid([np.nan, 300, 1500, 2500, 4000], 4000)
+    monkeypatch.setattr(heatmap.coast_grid, "get_grid", lambda cfg: grid)
+    d, c = heatmap._coast_from_grid(geom_d, geom_c, None, None, 1000, 2000, config)
+    assert d.tolist() == [120.0, 300.0, 1500.0, np.inf, np.inf]
+    assert c.tolist() == [2, 1, 0, 0, 0]
+
+
+def test_short_coast_grid_falls_back_to_geometry_at_its_limit(monkeypatch):
+    grid = FakeGrid([300, 800], 800)
+    monkeypatch.setattr(heatmap.coast_grid, "get_grid", lambda cfg: grid)
+    d, c = heatmap._coast_from_grid(np.array([900.0, 900.0]), np.array([1, 1]), None, None, 1000, 2000, config)
+    assert d.tolist() == [300.0, 900.0] and c.tolist() == [1, 1]
+
+
+def test_without_coast_grid_geometry_is_kept(monkeypatch):
+    monkeypatch.setattr(heatmap.coast_grid, "get_grid", lambda cfg: None)
+    d, c = np.array([10.0]), np.array([1])
+    assert heatmap._coast_from_grid(d, c, None, None, 1000, 2000, types.SimpleNamespace()) == (d, c)
@@ -0,0 +1,41 @@
+import geopandas as gpd
+import pandas as pd
+import pytest
+from shapely.geometry import Point
+
+import local_extract
+import osm_fetcher
+import projection
+
+TAGS = {"amenity": ["school", "cafe"], "leisure": True}
+
+
+@pytest.fixture
+def store():
+    rows = [("school", None, "Okul A", 29.000), ("cafe", None, "Kahve", 29.001), ("bar", None, "Bar", 29.002),
+            (None, "park", "Park", 29.003), ("school", None, "Uzak Okul", 29.5)]
+    rows += [("cafe", None, f"Kafe {i}", 29.6 + i * 0.001) for i in range(50)]
+    gdf = gpd.GeoDataFrame({"amenity": [r[0] for r in rows], "leisure": [r[1] for r in rows], "name": [r[2] for r in rows]},
+                           geometry=[Point(r[3], 41.0) for r in rows], crs="EPSG:4326",
+                           index=pd.MultiIndex.from_tuples([("node", i) for i in range(len(rows))], names=["element", "id"]))
+    return local_extract.LocalExtract(gdf, {"amenity": True, "leisure": True})
+
+
+def test_features_around_keeps_categorical_columns(store):
+    sub = store.features_around((41.0, 29.0), TAGS, 1000)
+    assert sorted(sub["name"].astype(object)) == ["Kahve", "Okul A", "Park"]
+    for col in ("amenity", "leisure", "name"):
+        assert isinstance(sub[col].dtype, pd.CategoricalDtype)
+
+
+def test_slim_carries_only_categories_used_by_the_subset(store):
+    sub = store.features_around((41.0, 29.0), TAGS, 1000)
+    slim = osm_fetcher.slim(sub, TAGS, projection.utm_crs(41.0, 29.0))
+    assert sorted(slim["name"].cat.categories) == ["Kahve", "Okul A", "Park"]
+    assert slim["name"].astype(object).tolist() == sub["name"].astype(object).tolist()
+    assert slim["leisure"].isna().tolist() == [True, True, False]
+
+
+def test_no_matching_features_raises(store):
+    with pytest.raises(osm_fetcher.NoFeatures):
+        store.features_around((41.0, 29.0), {"shop": True}, 1000)
@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+import rasterio
+from rasterio.transform import from_origin
+
+import cell_key
+import ndvi_batch
+
+
+@pytest.fixture
+def bands(tmp_path):
+    """29.00-29.02 boylam, 41.00-41.02 enlem; kırmızı 0.1, NIR 0.5 (NDVI 0.667)."""
+    paths = []
+    for name, value in (("red", 0.1), ("nir", 0.5)):
+        path = tmp_path / f"{name}.tif"
+        with rasterio.open(path, "w", driver="GTiff", width=40, height=40, count=1, dtype="float32",
+                           crs="EPSG:4326", transform=from_origin(29.0, 41.02, 0.0005, 0.0005)) as dst:
+            dst.write(np.full((40, 40), value, dtype=np.float32), 1)
+        paths.append(path)
+    return paths
+
+
+def test_cells_inside_raster_get_ndvi(bands):
+    cells = ndvi_batch.compute_cell_ndvi(*bands, (29.005, 41.005, 29.015, 41.015), 14)
+    assert cells and all(v == pytest.approx(0.4 / 0.6) for v in cells.values())
+    assert cell_key.cell_id(41.01, 29.01, 14) in cells
+
+
+def test_bbox_outside_raster_is_no_coverage(bands):
+    assert ndvi_batch.compute_cell_ndvi(*bands, (30.0, 42.0, 30.1, 42.1), 14) == {}
@@ -0,0 +1,96 @@
+import copy
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import pytest
+from shapely.geometry import Point
+
+import config
+import noise_engine
+import osm_fetcher
+
+MAX_DIST = config.GURULTU_AYARLARI["max_etki_mesafesi"]
+CENTER = Point(0, 0)
+
+
+def _settings(damped):
+    cfg = copy.deepcopy(config.GURULTU_AYARLARI)
+    cfg["sonumleyici_aktif"] = damped
+    return cfg
+
+
+@pytest.fixture
+def pois():
+    rng = np.random.default_rng(3)
+    n = 400
+    pick = lambda values: rng.choice(np.array(values + [None] * len(values), dtype=object), n)  # noqa: E731
+    data = {
+        "highway": pick(["primary", "residential", "motorway", "tertiary"]),
+        "amenity": pick(["bar", "school", "bench", "nightclub"]),
+        "leisure": pick(["park", "stadium", "garden"]),
+        "natural": pick(["wood", "water", "tree"]),
+    }
+    r, a = rng.uniform(0, MAX_DIST * 1.2, n), rng.uniform(0, 2 * np.pi, n)
+    return gpd.GeoDataFrame(data, geometry=[Point(x, y) for x, y in zip(r * np.cos(a), r * np.sin(a))])
+
+
+def _baseline_total(pois, cfg):
+    """v4.2.0'daki satır satır döngü (sönümleyicisiz): ilk eşleşen ETKENLER anahtarı ağırlığı belirler."""
+    total, closest, min_dist = 0, None, float("inf")
+    for _, poi in pois.iterrows():
+        dist = CENTER.distance(poi.geometry)
+        if dist > MAX_DIST: continue
+        decay = 1 - dist / MAX_DIST
+        score = 0
+        for k, v in cfg["ETKENLER"].items():
+            if k in poi and pd.notna(poi[k]) and poi[k] in v:
+                score = v[poi[k]]
+                if dist < min_dist: min_dist, closest = dist, f"{poi[k]} ({int(dist)}m)"
+                break
+        total += score * decay
+    return total, closest
+
+
+def _engine_total(pois, cfg):
+    dists = pois.distance(CENTER).to_numpy()
+    weights, labels, matched = noise_engine.noise_weights(pois, cfg)
+    return noise_engine.noise_total(weights, dists, MAX_DIST), noise_engine.closest_source(labels, matched, dists)
+
+
+@pytest.mark.parametrize("categorical", [False, True])
+def test_dampeners_off_reproduces_baseline(pois, categorical):
+    cfg = _settings(False)
+    frame = osm_fetcher.slim(pois, osm_fetcher.noise_tags(cfg)) if categorical else pois
+    total, closest = _engine_total(frame, cfg)
+    expected_total, expected_closest = _baseline_total(pois, cfg)
+    assert total == pytest.approx(expected_total)
+    assert closest == expected_closest
+
+
+def test_dampeners_subtract_unmatched_green_and_water(pois):
+    on, off = _settings(True), _settings(False)
+    dists = pois.distance(CENTER).to_numpy()
+    _, _, matched = noise_engine.noise_weights(pois, off)
+    decay = np.where(dists <= MAX_DIST, 1 - dists / MAX_DIST, 0.0)
+
+    expected = 0.0
+    for i, (_, poi) in enumerate(pois.iterrows()):
+        if matched[i]: continue  # Gürültü kaynağı olarak eşleşen kayıt sönümleyici sayılmaz
+        for tag, value in on["SONUMLEYICILER"].items():  # İlk eşleşen sönümleyici uygulanır
+            key, wanted = tag.split("=")
+            if poi[key] == wanted:
+                expected += value * decay[i]
+                break
+    assert expected < 0
+    assert _engine_total(pois, on)[0] - _engine_total(pois, off)[0] == pytest.approx(expected)
+
+
+def test_single_park_value():
+    park = gpd.GeoDataFrame({"leisure": ["park"]}, geometry=[Point(100, 0)])
+    cfg = _settings(True)
+    weights, labels, matched = noise_engine.noise_weights(park, cfg)
+    assert weights.tolist() == [cfg["SONUMLEYICILER"]["leisure=park"]] and not matched.any()
+    total = noise_engine.noise_total(weights, np.array([100.0]), MAX_DIST)
+    assert total == pytest.approx(-50 * (1 - 100 / MAX_DIST))
+    assert noise_engine.noise_weights(park, _settings(False))[0].tolist() == [0.0]
@@ -0,0 +1,64 @@
+import io
+from contextlib import redirect_stdout
+from multiprocessing import shared_memory
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import pytest
+from shapely import wkt
+
+import config
+import process_pool
+import projection
+
+GEOMETRIES = ["POINT (500 500)", "POINT Z (510 500 3)", "LINESTRING (0 0, 100 100, 200 50)", "LINESTRING EMPTY",
+              "POLYGON ((0 0, 300 0, 300 300, 0 0), (10 5, 20 5, 20 8, 10 5))", "MULTIPOLYGON (((0 0, 1 0, 1 1, 0 0)), ((5 5, 6 5, 6 6, 5 5)))",
+              "MULTILINESTRING ((0 0, 1 1), (2 2, 3 3))", "MULTIPOINT ((0 0), (1 1))",
+              "GEOMETRYCOLLECTION (POINT (1 1), LINESTRING (0 0, 1 1))", "POINT (450 520)"]
+
+
+@pytest.fixture
+def features():
+    crs = projection.utm_crs(41.0, 29.0)
+    origin = np.array(projection.project_point(41.0, 29.0, crs).coords[0])
+    geoms = [wkt.loads(g) for g in GEOMETRIES]
+    index = pd.MultiIndex.from_tuples([("node" if g.geom_type == "Point" else "way", 100 + i) for i, g in enumerate(geoms)],
+                                      names=["element", "id"])
+    from shapely import affinity
+    geoms = [affinity.translate(g, *origin) for g in geoms]
+    amenity = ["school", "bar", None, None, None, None, None, None, None, "cafe"]
+    return gpd.GeoDataFrame({"amenity": pd.Categorical(amenity), "name": pd.Categorical(["Okul"] + [None] * 9)},
+                            geometry=geoms, index=index, crs=crs)
+
+
+def test_unpack_round_trips_every_geometry_kind(features):
+    shm, meta = process_pool._pack(features)
+    view = shared_memory.SharedMemory(name=meta["ad"])
+    try:
+        back = process_pool._unpack(view.buf, meta)
+        assert back.index.equals(features.index) and back.crs == features.crs
+        for a, b in zip(back.geometry, features.geometry):
+            assert (a.is_empty and b.is_empty) or a.equals_exact(b, 0)
+        for col in ("amenity", "name"):
+            assert back[col].astype(object).equals(features[col].astype(object))
+        # Kodlar bloğun üzerindeki görünümdür, kopyalanmaz
+        dtype, shape, start = meta["diziler"]["sutun:amenity"]
+        block = np.ndarray(shape, dtype=dtype, buffer=view.buf, offset=start)
+        assert np.shares_memory(back["amenity"].array.codes, block)
+        del back, block
+    finally:
+        view.close()
+        process_pool._release(shm)
+
+
+def test_run_scores_from_block_and_closes_it(features):
+    shm, meta = process_pool._pack(features)
+    key, blob = process_pool._config_payload(config)
+    try:
+        with redirect_stdout(io.StringIO()):
+            stages, profile = process_pool._run(meta, 41.0, 29.0, key, blob)
+        assert set(stages) == {"gurultu", "yerlesim", "yesil_sosyal", "vibe"}
+        assert stages["yerlesim"]["okul"]["min_dist"] is not None
+    finally:
+        process_pool._release(shm)
@@ -0,0 +1,118 @@
+import gzip
+
+import numpy as np
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+import response_encoding
+from response_encoding import FastJSONResponse
+
+SETTINGS = {"min_bayt": 100, "gzip_seviye": 6, "brotli_kalite": 4}
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("gzip", "gzip"),
+    ("gzip, deflate", "gzip"),
+    ("GZIP;q=0.5", "gzip"),
+    ("gzip;q=0", None),
+    ("deflate", None),
+    ("", None),
+    (None, None),
+    ("*", "gzip"),
+    ("*;q=0", None),
+    ("*, gzip;q=0", None),
+    ("gzip;q=abc", None),
+])
+def test_negotiate_gzip(monkeypatch, header, expected):
+    monkeypatch.setattr(response_encoding, "brotli", None)
+    assert response_encoding.negotiate(header) == expected
+
+
+def test_negotiate_prefers_brotli_when_installed(monkeypatch):
+    monkeypatch.setattr(response_encoding, "brotli", object())
+    assert response_encoding.negotiate("gzip, br") == "br"
+    assert response_encoding.negotiate("gzip, br;q=0") == "gzip"
+    monkeypatch.setattr(response_encoding, "brotli", None)
+    assert response_encoding.negotiate("br") is None
+
+
+def test_etag_is_weak_and_stable():
+    tag = response_encoding.etag("hucre", 1234.5)
+    assert tag.startswith('W/"') and tag.endswith('"')
+    assert tag == response_encoding.etag("hucre", 1234.5)
+    assert tag != response_encoding.etag("hucre", 1234.6)
+
+
+@pytest.mark.parametrize("header, expected", [
+    ('W/"abc"', True),
+    ('"abc"', True),  # Zayıf karşılaştırma
+    ('"x", W/"abc"', True),
+    ('"x","y"', False),
+    ("*", True),
+    ("", False),
+    (None, False),
+])
+def test_etag_matches(header, expected):
+    assert response_encoding.etag_matches(header, 'W/"abc"') is expected
+
+
+def test_etag_matches_without_tag():
+    assert response_encoding.etag_matches("*", None) is False
+
+
+def test_dumps_handles_numpy_and_non_str_keys():
+    value = {"a": np.float64(1.5), "b": np.arange(3), 1: "bir"}
+    assert response_encoding.dumps(value) == b'{"a":1.5,"b":[0,1,2],"1":"bir"}'
+
+
+def test_dumps_json_fallback(monkeypatch):
+    monkeypatch.setattr(response_encoding, "orjson", None)
+    assert response_encoding.dumps({"ş": np.int64(2), "l": np.array([1.0])}) == '{"ş":2,"l":[1.0]}'.encode()
+
+
+# --- CompressionMiddleware ---
+
+BIG = {"veri": ["yasam skoru"] * 100}
+
+
+def _client():
+    async def json_view(request):
+        return FastJSONResponse(BIG)
+
+    async def small_view(request):
+        return FastJSONResponse({"a": 1})
+
+    async def stream_view(request):
+        return StreamingResponse(iter([b'{"a":1}\n'] * 200), media_type="application/x-ndjson")
+
+    async def binary_view(request):
+        return PlainTextResponse("x" * 500, media_type="image/tiff")
+
+    app = Starlette(routes=[Route("/j", json_view), Route("/k", small_view), Route("/s", stream_view),
+                            Route("/b", binary_view)])
+    app.add_middleware(response_encoding.CompressionMiddleware, settings=SETTINGS)
+    return TestClient(app)
+
+
+def test_compresses_large_json_with_gzip():
+    r = _client().get("/j", headers={"Accept-Encoding": "gzip"})
+    assert r.headers["content-encoding"] == "gzip"
+    assert r.headers["vary"] == "Accept-Encoding"
+    assert r.json() == BIG  # İstemci açar
+    assert int(r.headers["content-length"]) < len(response_encoding.dumps(BIG))
+
+
+def test_raw_gzip_body_is_valid():
+    with _client() as client:
+        with client.stream("GET", "/j", headers={"Accept-Encoding": "gzip"}) as r:
+            raw = b"".join(r.iter_raw())
+    assert gzip.decompress(raw) == response_encoding.dumps(BIG)
+
+
+@pytest.mark.parametrize("path, encoding", [("/k", "gzip"), ("/j", "identity"), ("/s", "gzip"), ("/b", "gzip")])
+def test_leaves_small_unaccepted_streaming_and_binary_responses(path, encoding):
+    r = _client().get(path, headers={"Accept-Encoding": encoding})
+    assert "content-encoding" not in r.headers
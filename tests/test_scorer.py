@@ -0,0 +1,52 @@
+import asyncio
+import concurrent.futures
+
+import geopandas as gpd
+import pandas as pd
+import pytest
+from shapely.geometry import Point
+
+import config
+import projection
+import scorer
+
+LAT, LON = 41.0, 29.0
+
+
+@pytest.fixture
+def motor(monkeypatch):
+    motor = scorer.QualityScorer(LAT, LON, config)
+    x, y = projection.project_point(LAT, LON, motor.crs_utm).coords[0]
+    index = pd.MultiIndex.from_tuples([("node", 1), ("node", 2)], names=["element", "id"])
+    features = gpd.GeoDataFrame({"amenity": pd.Categorical(["school", "bar"]), "name": ["Okul", None]},
+                                geometry=[Point(x + 100, y), Point(x, y + 300)], index=index, crs=motor.crs_utm)
+
+    def fetch():
+        motor.features, motor._index = features, None
+
+    async def slope():
+        return None
+
+    builds = []
+    build = motor._build_index
+    monkeypatch.setattr(motor, "_fetch_features", fetch)
+    monkeypatch.setattr(motor, "_extract_slope_async", slope)
+    monkeypatch.setattr(motor, "_build_index", lambda: builds.append(1) or build())
+    motor.builds = builds
+    return motor
+
+
+def test_index_is_not_built_when_stages_run_in_process_pool(motor, monkeypatch):
+    future = concurrent.futures.Future()
+    future.set_result(({"gurultu": {"total": None, "closest": None}, "yerlesim": {}, "yesil_sosyal": {}, "vibe": {}}, {}))
+    monkeypatch.setattr(motor, "_submit_remote", lambda: future)
+    snapshot = asyncio.run(motor.extract_async())
+    assert snapshot["tamlik"]["gurultu"] == "tam"
+    assert motor.builds == []
+
+
+def test_index_is_built_once_for_thread_stages(motor, monkeypatch):
+    monkeypatch.setattr(motor, "_submit_remote", lambda: None)
+    snapshot = asyncio.run(motor.extract_async())
+    assert motor.builds == [1]
+    assert snapshot["yerlesim"] is not None
@@ -0,0 +1,56 @@
+import geopandas as gpd
+import numpy as np
+import pytest
+from shapely.geometry import LineString, Point
+
+import spatial_index
+
+CRS = "EPSG:32635"
+TAGS = {"amenity": ["school"]}
+
+
+@pytest.fixture
+def features():
+    rng = np.random.default_rng(7)
+    xs, ys = rng.uniform(0, 5000, 60), rng.uniform(0, 5000, 60)
+    geoms = [Point(x, y) for x, y in zip(xs, ys)]
+    geoms += [LineString([(x, y), (x + 300, y + 120)]) for x, y in zip(xs[:10], ys[:10] + 7)]
+    amenity = (["school", "hospital"] * 35)[:len(geoms)]
+    return gpd.GeoDataFrame({"amenity": amenity}, geometry=geoms, crs=CRS)
+
+
+def _brute_force(gdf, point, k):
+    d = gdf[gdf["amenity"] == "school"].distance(point).nsmallest(k)
+    return gdf.index.get_indexer(d.index), d.to_numpy()
+
+
+@pytest.mark.parametrize("k", [1, 2, 5, 17])
+def test_nearest_matches_brute_force(features, k):
+    index = spatial_index.FeatureIndex(features)
+    for point in (Point(2500, 2500), Point(10, 4990), Point(-800, 6000)):
+        positions, dists = index.nearest(point, TAGS, k)
+        expected_pos, expected_d = _brute_force(features, point, k)
+        np.testing.assert_allclose(dists, expected_d)
+        np.testing.assert_array_equal(positions, expected_pos)
+
+
+def test_nearest_k_larger_than_category(features):
+    index = spatial_index.FeatureIndex(features)
+    positions, dists = index.nearest(Point(0, 0), TAGS, 1000)
+    assert len(positions) == (features["amenity"] == "school").sum()
+    assert np.all(np.diff(dists) >= 0)
+
+
+def test_nearest_empty_category(features):
+    positions, dists = spatial_index.FeatureIndex(features).nearest(Point(0, 0), {"shop": True})
+    assert len(positions) == 0 and len(dists) == 0
+
+
+def test_within_sorted_and_bounded(features):
+    index = spatial_index.FeatureIndex(features)
+    point = Point(2500, 2500)
+    positions, dists = index.within(point, TAGS, 1200)
+    expected = features[features["amenity"] == "school"].distance(point)
+    assert set(positions) == set(features.index.get_indexer(expected[expected <= 1200].index))
+    assert np.all(np.diff(dists) >= 0)
+    assert index.count_within(point, TAGS, 1200) == len(positions)
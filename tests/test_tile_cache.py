@@ -0,0 +1,76 @@
+import time
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import pytest
+from shapely.geometry import LineString, Point, Polygon
+
+import cache_manager
+import osm_fetcher
+import tile_cache
+
+
+@pytest.fixture
+def tile():
+    index = pd.MultiIndex.from_tuples([("node", 1), ("node", 2), ("way", 10), ("way", 11)], names=["element", "id"])
+    raw = gpd.GeoDataFrame({"name": ["A", None, "Ç", "A"], "amenity": ["school", "bar", None, "school"],
+                            "leisure": [None, None, "park", None]},
+                           geometry=[Point(29, 41), Point(29.001, 41), Polygon([(29, 41), (29.01, 41), (29, 41.01)]),
+                                     LineString([(29, 41), (29.02, 41.02)])], index=index, crs="EPSG:4326")
+    return osm_fetcher.slim(raw, {"amenity": True, "leisure": True})
+
+
+def _rows():
+    cache_manager.flush()
+    return dict(cache_manager.get_connection().execute("SELECT tile_key, size_bytes FROM osm_tiles").fetchall())
+
+
+def test_round_trip_keeps_index_categoricals_and_geometry(tile):
+    payload = tile_cache._serialize(tile)
+    assert payload.startswith(tile_cache.MAGIC)
+    back = tile_cache._deserialize(payload)
+    assert back.index.equals(tile.index) and back.index.names == ["element", "id"]
+    assert back.crs == "EPSG:4326"
+    for col in ("name", "amenity", "leisure"):
+        assert isinstance(back[col].dtype, pd.CategoricalDtype)
+        assert back[col].astype(object).equals(tile[col].astype(object))
+    assert back.geometry.geom_equals_exact(tile.geometry, 0).all()
+
+
+def test_plain_object_columns_are_stored_as_categories():
+    gdf = gpd.GeoDataFrame({"shop": ["bakery", np.nan]}, geometry=[Point(0, 0), Point(1, 1)], crs="EPSG:4326")
+    back = tile_cache._deserialize(tile_cache._serialize(gdf))
+    assert back["shop"].tolist()[0] == "bakery" and pd.isna(back["shop"].tolist()[1])
+
+
+def test_empty_tile_deserializes_to_none():
+    assert tile_cache._deserialize(tile_cache._serialize(osm_fetcher.empty_features("EPSG:4326"))) is None
+
+
+def test_saves_go_through_writer_and_evict_least_recently_used(tile):
+    payload = tile_cache._serialize(tile)
+    tile_cache._save_tiles([("test:a", payload)], 10 ** 9)
+    time.sleep(0.01)
+    tile_cache._save_tiles([("test:b", payload)], 10 ** 9)
+    assert {"test:a", "test:b"} <= set(_rows())
+
+    time.sleep(0.01)
+    tile_cache._load_tiles(["test:a"])  # a en son kullanılan olur
+    cache_manager.flush()
+    budget = sum(_rows().values()) - 1  # Tam bir karo fazlası: en eski erişilen gider
+    tile_cache._save_tiles([], budget)
+    rows = _rows()
+    assert "test:a" in rows and "test:b" not in rows
+    assert sum(rows.values()) <= budget
+
+
+def test_legacy_payloads_are_dropped_on_init(tile):
+    conn = cache_manager.get_connection()
+    conn.execute("INSERT OR REPLACE INTO osm_tiles VALUES ('eski', ?, 3, 0, 0)", (b"\x80\x05.",))
+    conn.commit()
+    tile_cache._save_tiles([("yeni", tile_cache._serialize(tile))], 10 ** 9)
+    cache_manager.flush()
+    tile_cache.init_db()
+    rows = _rows()
+    assert "eski" not in rows and "yeni" in rows
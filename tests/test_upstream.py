@@ -0,0 +1,178 @@
+import asyncio
+import threading
+import time
+import types
+
+import pytest
+
+import config
+import local_extract
+import osm_fetcher
+import scorer
+import upstream
+from singleflight import SingleFlight
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(upstream.time, "monotonic", fake)
+    return fake
+
+
+# --- TokenBucket ---
+
+def test_burst_is_free_then_calls_are_spaced_by_rate(clock):
+    bucket = upstream.TokenBucket("t", rate=2.0, burst=3, max_queue=10)
+    assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert [bucket.reserve() for _ in range(3)] == pytest.approx([0.5, 1.0, 1.5])
+
+
+def test_refill_is_capped_at_burst(clock):
+    bucket = upstream.TokenBucket("t", rate=1.0, burst=2, max_queue=5)
+    bucket.reserve(), bucket.reserve()
+    clock.now += 1.5
+    assert bucket.available() == pytest.approx(1.5)
+    clock.now += 100
+    assert bucket.available() == pytest.approx(2.0)
+    assert bucket.available() == pytest.approx(2.0)  # available() jeton harcamaz
+
+
+def test_full_queue_raises_busy_with_retry_after(clock):
+    bucket = upstream.TokenBucket("overpass", rate=0.5, burst=1, max_queue=2)
+    waits = [bucket.reserve() for _ in range(3)]  # 1 hemen + 2 kuyrukta
+    assert waits == pytest.approx([0.0, 2.0, 4.0])
+    with pytest.raises(upstream.UpstreamBusy) as exc:
+        bucket.reserve()
+    assert exc.value.name == "overpass"
+    assert exc.value.retry_after == pytest.approx(2.0)
+    assert upstream.retry_after_header(exc.value) == {"Retry-After": "2"}
+    clock.now += 2.0  # Kuyrukta yer açıldı
+    assert bucket.reserve() == pytest.approx(4.0)
+
+
+def test_retry_after_header_rounds_up_to_at_least_one():
+    assert upstream.retry_after_header(upstream.UpstreamBusy("x", 0.2)) == {"Retry-After": "1"}
+    assert upstream.retry_after_header(upstream.UpstreamBusy("x", 2.01)) == {"Retry-After": "3"}
+
+
+# --- SingleFlight ---
+
+def test_concurrent_calls_share_one_computation():
+    calls = []
+
+    async def compute(key):
+        calls.append(key)
+        await asyncio.sleep(0.01)
+        return f"sonuc-{key}"
+
+    async def main():
+        flight = SingleFlight()
+        results = await asyncio.gather(flight.do("a", lambda: compute("a")), flight.do("a", lambda: compute("a")),
+                                       flight.do("b", lambda: compute("b")))
+        return results, len(flight)
+
+    results, remaining = asyncio.run(main())
+    assert calls == ["a", "b"]
+    assert results == [("sonuc-a", False), ("sonuc-a", True), ("sonuc-b", False)]
+    assert remaining == 0
+
+
+def test_finished_key_is_recomputed():
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        return len(calls)
+
+    async def main():
+        flight = SingleFlight()
+        return await flight.do("k", compute), await flight.do("k", compute)
+
+    assert asyncio.run(main()) == ((1, False), (2, False))
+
+
+def test_error_reaches_every_waiter_and_clears_key():
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("hata")
+
+    async def main():
+        flight = SingleFlight()
+        results = await asyncio.gather(flight.do("k", fail), flight.do("k", fail), return_exceptions=True)
+        return results, len(flight)
+
+    results, remaining = asyncio.run(main())
+    assert all(isinstance(r, ValueError) for r in results)
+    assert remaining == 0
+
+
+def test_cancelled_waiter_does_not_cancel_shared_task():
+    async def slow():
+        await asyncio.sleep(0.05)
+        return "tamam"
+
+    async def main():
+        flight = SingleFlight()
+        first = asyncio.ensure_future(flight.do("k", slow))
+        await asyncio.sleep(0)
+        second = asyncio.ensure_future(flight.do("k", slow))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(main()) == ("tamam", True)
+
+
+@pytest.fixture
+def overpass_limit(monkeypatch):
+    monkeypatch.setitem(config.UPSTREAM_LIMITLERI, "overpass", 2)
+    monkeypatch.setattr(upstream, "_thread_limits", {})
+    monkeypatch.setattr(upstream, "get_bucket", lambda name: types.SimpleNamespace(acquire=lambda: None))
+    return upstream.thread_limit("overpass")
+
+
+def test_overpass_calls_are_capped_by_thread_limit(overpass_limit, monkeypatch):
+    active, peak, lock = [0], [0], threading.Lock()
+
+    def features_from_point(center_point, tags, dist):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.05)
+        with lock: active[0] -= 1
+        return osm_fetcher.empty_features("EPSG:4326")
+
+    fake = types.SimpleNamespace(features=types.SimpleNamespace(features_from_point=features_from_point))
+    monkeypatch.setattr(upstream, "osmnx", lambda: fake)
+    threads = [threading.Thread(target=osm_fetcher._from_overpass, args=((41.0, 29.0), {}, 100)) for _ in range(6)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    assert peak[0] == 2
+
+
+def test_local_extract_requests_do_not_wait_for_overpass_slots(overpass_limit, monkeypatch):
+    class Store:
+        def features_around(self, point, tags, dist):
+            raise osm_fetcher.NoFeatures
+
+    async def slope():
+        return None
+
+    monkeypatch.setattr(local_extract, "get_store", lambda cfg: Store())
+    held = [overpass_limit.acquire(blocking=False) for _ in range(2)]
+    try:
+        motor = scorer.QualityScorer(41.0, 29.0, config)
+        monkeypatch.setattr(motor, "_extract_slope_async", slope)
+        snapshot = asyncio.run(asyncio.wait_for(motor.extract_async(), 5))
+        assert all(held) and snapshot["tamlik"]["osm_veri"] == "tam"
+    finally:
+        for _ in held: overpass_limit.release()
@@ -0,0 +1,212 @@
+# tile_cache.py
+# (v1.0.0 - OSM Karo Önbelleği)
+# Ham OSM verisini sabit boyutlu enlem/boylam karolarına bölüp SQLite'ta (WKB) saklar.
+
+import hashlib
+import json
+import math
+import struct
+import time
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+import cache_manager
+import metrics
+import osm_fetcher
+import upstream
+
+METRE_PER_DERECE = 111320
+MAGIC = b"YSK1"
+
+SAVE_SQL = ("INSERT OR REPLACE INTO osm_tiles (tile_key, payload, size_bytes, fetched_at, last_access) "
+            "VALUES (?, ?, ?, ?, ?)")
+TOUCH_SQL = "UPDATE osm_tiles SET last_access = ? WHERE tile_key = ?"
+# En yeni kullanılan karolardan başlayarak birikimli boyutu max_bayt'ı aşanlar silinir (LRU)
+EVICT_SQL = '''
+    DELETE FROM osm_tiles WHERE tile_key IN (
+        SELECT tile_key FROM (
+            SELECT tile_key, SUM(size_bytes) OVER (ORDER BY last_access DESC, tile_key) AS birikimli FROM osm_tiles
+        ) WHERE birikimli > ?
+    )
+'''
+
+
+def init_db():
+    conn = cache_manager.get_connection()
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS osm_tiles (
+            tile_key TEXT PRIMARY KEY,
+            payload BLOB,
+            size_bytes INTEGER,
+            fetched_at REAL,
+            last_access REAL
+        )
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_osm_tiles_access ON osm_tiles (last_access)")
+    # Eski sürümün pickle karoları okunmaz; silinir ve ilk istekte yeniden çekilir
+    removed = conn.execute("DELETE FROM osm_tiles WHERE substr(payload, 1, ?) != ?", (len(MAGIC), MAGIC)).rowcount
+    if removed > 0: print(f"  [CACHE] {removed} eski biçimli OSM karosu silindi.")
+    conn.commit()
+
+
+def tags_hash(tags):
+    """Etiket filtresi değişince eski karolar kendiliğinden geçersiz olur."""
+    raw = json.dumps(tags, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:12]
+
+
+def tile_of(lat, lon, size):
+    return math.floor(lat / size), math.floor(lon / size)
+
+
+def tile_bbox(tile, size):
+    """(left, bottom, right, top) - osmnx bbox sırası."""
+    i, j = tile
+    return (j * size, i * size, (j + 1) * size, (i + 1) * size)
+
+
+def query_bbox(lat, lon, dist):
+    dlat = dist / METRE_PER_DERECE
+    dlon = dist / (METRE_PER_DERECE * max(math.cos(math.radians(lat)), 0.01))
+    return (lon - dlon, lat - dlat, lon + dlon, lat + dlat)
+
+
+def covering_tiles(lat, lon, dist, size):
+    """Sorgu diskini kapsayan tüm karolar."""
+    left, bottom, right, top = query_bbox(lat, lon, dist)
+    i0, j0 = tile_of(bottom, left, size)
+    i1, j1 = tile_of(top, right, size)
+    return [(i, j) for i in range(i0, i1 + 1) for j in range(j0, j1 + 1)]
+
+
+def _tile_key(tile, thash, size):
+    return f"{thash}:{size}:{tile[0]}:{tile[1]}"
+
+
+# --- Karo biçimi: MAGIC + 4 bayt başlık uzunluğu + JSON başlık + art arda WKB geometriler ---
+# Başlıkta indeks (osmnx (tür, id) çiftleri), sütun başına kategori listesi + tamsayı kodları ve WKB uzunlukları
+# tutulur. pickle kullanılmaz: kayıt pandas / geopandas sürümüne bağlı değildir ve okurken kod çalıştırılmaz.
+
+def _serialize(gdf):
+    header = {"index_names": list(gdf.index.names), "index": gdf.index.tolist(), "columns": {}}
+    for col in gdf.columns:
+        if col == gdf.geometry.name: continue
+        values = gdf[col]
+        cat = values.array if isinstance(values.dtype, pd.CategoricalDtype) else pd.Categorical(values)
+        header["columns"][col] = {"categories": cat.categories.tolist(), "codes": cat.codes.tolist()}
+    wkb = shapely.to_wkb(np.asarray(gdf.geometry.values, dtype=object))
+    header["wkb"] = [len(b) for b in wkb]
+    raw = json.dumps(header, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return MAGIC + struct.pack("<I", len(raw)) + raw + b"".join(wkb)
+
+
+def _deserialize(payload):
+    """Karo tablosu; boş karoda None."""
+    size = struct.unpack_from("<I", payload, len(MAGIC))[0]
+    start = len(MAGIC) + 4
+    header = json.loads(payload[start:start + size])
+    if not header["wkb"]: return None
+    offsets = np.concatenate([[start + size], start + size + np.cumsum(header["wkb"])])
+    geoms = shapely.from_wkb([payload[a:b] for a, b in zip(offsets[:-1], offsets[1:])])
+    names = header["index_names"]
+    index = (pd.MultiIndex.from_tuples([tuple(i) for i in header["index"]], names=names) if len(names) > 1
+             else pd.Index(header["index"], name=names[0]))
+    data = {col: pd.Categorical.from_codes(c["codes"], categories=c["categories"], validate=False)
+            for col, c in header["columns"].items()}
+    return gpd.GeoDataFrame(data, geometry=geoms, index=index, crs="EPSG:4326")
+
+
+def _load_tiles(keys):
+    conn = cache_manager.get_connection()
+    try:
+        marks = ",".join("?" * len(keys))
+        rows = conn.execute(f"SELECT tile_key, payload, fetched_at FROM osm_tiles WHERE tile_key IN ({marks})",
+                            keys).fetchall()
+    except Exception:
+        rows = []
+    if rows: cache_manager.write(TOUCH_SQL, [(time.time(), k) for k, _, _ in rows])
+    return {k: (payload, fetched_at) for k, payload, fetched_at in rows}
+
+
+def _save_tiles(items, max_bytes):
+    """Karolar ve LRU silme cache_manager'ın arka plan yazıcısıyla toplu yazılır."""
+    now = time.time()
+    cache_manager.write(SAVE_SQL, [(k, p, len(p), now, now) for k, p in items])
+    cache_manager.write(EVICT_SQL, [(max_bytes,)])
+    print(f"  [CACHE] {len(items)} OSM karosu kayda gönderildi.")
+
+
+def _fetch_tiles(tiles, tags, size):
+    """Eksik karoların sınır kutusu için tek bir Overpass sorgusu atar ve sonucu karolara böler."""
+    boxes = [tile_bbox(t, size) for t in tiles]
+    bbox = (min(b[0] for b in boxes), min(b[1] for b in boxes), max(b[2] for b in boxes), max(b[3] for b in boxes))
+    upstream.get_bucket("overpass").acquire()
+    ox = upstream.osmnx()
+    with upstream.thread_limit("overpass"), metrics.upstream_timer("overpass"):
+        try:
+            gdf = ox.features.features_from_bbox(bbox=bbox, tags=tags)
+        except ox._errors.InsufficientResponseError:
+            gdf = gpd.GeoDataFrame(geometry=[], crs="EPSG:4326")
+    metrics.observe("ozellik_sayisi", len(gdf), kategori="overpass_yanit")
+    # Karolara yalnızca okunan sütunlar yazılır (disk ve bellek boyutu)
+    gdf = osm_fetcher.slim(gdf, tags)
+
+    parts = {}
+    for tile, (left, bottom, right, top) in zip(tiles, boxes):
+        parts[tile] = gdf.cx[left:right, bottom:top] if not gdf.empty else gdf
+    return parts
+
+
+def features_around(point, tags, dist, settings):
+    """features_from_point eşdeğeri: diski kapsayan karoları önbellekten toplar, eksikleri tek sorguda çeker."""
+    lat, lon = point
+    size = settings["karo_boyutu"]
+    ttl = settings["ttl_saat"] * 3600
+    thash = tags_hash(tags)
+
+    tiles = covering_tiles(lat, lon, dist, size)
+    keys = {t: _tile_key(t, thash, size) for t in tiles}
+    cached = _load_tiles(list(keys.values()))
+
+    now = time.time()
+    frames = {}
+    missing = []
+    for t in tiles:
+        hit = cached.get(keys[t])
+        if hit is None or cache_manager.expired(now - hit[1], ttl):
+            missing.append(t)
+        if hit is not None:
+            frames[t] = hit[0]
+
+    metrics.inc("osm_karo_toplam", len(tiles) - len(missing), durum="isabet")
+    metrics.inc("osm_karo_toplam", len(missing), durum="iskalama")
+    if missing:
+        try:
+            fresh = _fetch_tiles(missing, tags, size)
+            _save_tiles([(keys[t], _serialize(g)) for t, g in fresh.items()], settings["max_boyut_mb"] * 1024 * 1024)
+            frames.update({t: g for t, g in fresh.items()})
+        except Exception as e:
+            # Ağ hatasında süresi geçmiş karolarla devam et; hiç karo yoksa hatayı yükselt
+            stale = [t for t in missing if t in frames]
+            if len(stale) < len(missing): raise
+            print(f"  [CACHE] Overpass hatası, eski karolar kullanılıyor: {e}")
+    else:
+        print(f"  [CACHE] OSM karoları önbellekten geldi ({len(tiles)} karo).")
+
+    gdfs = []
+    for t in tiles:
+        g = frames.get(t)
+        if isinstance(g, bytes): g = _deserialize(g)
+        if g is not None and not g.empty: gdfs.append(g)
+    if not gdfs:
+        raise osm_fetcher.NoFeatures("Karolarda özellik bulunamadı")
+
+    gdf = pd.concat(gdfs)
+    gdf = gdf[~gdf.index.duplicated(keep="first")]
+    left, bottom, right, top = query_bbox(lat, lon, dist)
+    return gpd.GeoDataFrame(gdf.cx[left:right, bottom:top], crs="EPSG:4326")
+
+
+init_db()
@@ -0,0 +1,143 @@
+# upstream.py
+# (v1.0.0 - Paylaşılan HTTP İstemcileri ve Eşzamanlılık Sınırları)
+
+import asyncio
+import math
+import threading
+import time
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+import config
+
+_async_client = None
+_session = None
+_session_lock = threading.Lock()
+_limits = {}
+_thread_limits = {}
+_osmnx = None
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+
+class UpstreamBusy(Exception):
+    def __init__(self, name, retry_after):
+        """Upstream kuyruğu dolu; istemciye 429 + Retry-After dönülmeli."""
+        super().__init__(f"{name} yoğun, {retry_after:.1f}s sonra tekrar deneyin")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    def __init__(self, name, rate, burst, max_queue):
+        """rate: saniyede jeton, burst: kova boyutu, max_queue: jeton bekleyebilecek en fazla çağrı."""
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.max_queue = max_queue
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Bir jeton ayırır ve beklenmesi gereken süreyi döndürür; kuyruk doluysa UpstreamBusy."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            # Negatif jeton = kuyrukta bekleyen çağrı sayısı; kuyrukta yer açılana kadarki süre Retry-After olur
+            deficit = self.max_queue - (1 - self.tokens)
+            if deficit < 0:
+                raise UpstreamBusy(self.name, -deficit / self.rate)
+            self.tokens -= 1
+            return max(0.0, -self.tokens / self.rate)
+
+    def available(self):
+        """Ayırmadan şu anki jeton sayısı; negatifse kuyrukta bekleyen çağrı var."""
+        with self._lock:
+            return min(self.burst, self.tokens + (time.monotonic() - self.updated) * self.rate)
+
+    def acquire(self):
+        wait = self.reserve()
+        if wait: time.sleep(wait)
+
+    async def acquire_async(self):
+        wait = self.reserve()
+        if wait: await asyncio.sleep(wait)
+
+
+def get_bucket(name):
+    """Upstream başına süreç genelinde tek jeton kovası (config.UPSTREAM_HIZ_LIMITLERI)."""
+    with _buckets_lock:
+        if name not in _buckets:
+            s = config.UPSTREAM_HIZ_LIMITLERI[name]
+            _buckets[name] = TokenBucket(name, s["hiz"], s["patlama"], s["max_kuyruk"])
+    return _buckets[name]
+
+
+def retry_after_header(exc):
+    return {"Retry-After": str(max(1, math.ceil(exc.retry_after)))}
+
+
+def url(name):
+    """Upstream taban adresi (config.UPSTREAM_ADRESLERI)."""
+    return config.UPSTREAM_ADRESLERI[name]
+
+
+def osmnx():
+    """osmnx ilk Overpass / XML çağrısında yüklenir; yerel özüt ve karo isabetlerinde hiç yüklenmez."""
+    global _osmnx
+    if _osmnx is None:
+        import osmnx as ox
+        ox.settings.log_console = False
+        ox.settings.overpass_url = url("overpass")
+        _osmnx = ox
+    return _osmnx
+
+
+def get_async_client():
+    """Tüm async çağrıların paylaştığı bağlantı havuzlu istemci."""
+    global _async_client
+    if _async_client is None:
+        _async_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(10.0, connect=3.0),
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+        )
+    return _async_client
+
+
+def get_session():
+    """Senkron yol (toplu skorlama, CLI) için bağlantı havuzlu requests oturumu."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=10, pool_maxsize=50)
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+    return _session
+
+
+def get_limit(name):
+    """Upstream başına eşzamanlı çağrı sınırı (config.UPSTREAM_LIMITLERI)."""
+    if name not in _limits:
+        _limits[name] = asyncio.Semaphore(config.UPSTREAM_LIMITLERI[name])
+    return _limits[name]
+
+
+def thread_limit(name):
+    """get_limit'in iş parçacıkları için karşılığı: bloklayan ağ çağrısının (ör. osmnx) yalnızca kendisini sarar;
+    karo isabetleri ve yerel özüt okumaları sınıra takılmaz."""
+    with _buckets_lock:
+        if name not in _thread_limits:
+            _thread_limits[name] = threading.BoundedSemaphore(config.UPSTREAM_LIMITLERI[name])
+    return _thread_limits[name]
+
+
+async def close():
+    global _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None